@@ -1,11 +1,15 @@
 from __future__ import annotations
 from io import BytesIO
 import os
+import time
+import math
 import asyncio
-from typing import Optional, List, Dict, Any
-from fastapi import FastAPI, File, Form, HTTPException, Response, UploadFile
+from functools import partial
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Literal
+from fastapi import FastAPI, File, Form, HTTPException, Request, Response, UploadFile
 from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import json
 
@@ -13,25 +17,284 @@ import json
 load_dotenv("/home/xaje/Documents/contentWork/cred.env")
 
 # Import existing modules
-from imageAPIscrapers.meme_imgflip import scrape_meme
+from browserpool.cdp_async import AsyncBrowserPool, async_pool_stats, close_async_pools, register_async_pool
+from browserpool.driver_pool import DriverPool, register_pool, close_all_pools, pool_stats
+from browserpool.workers import BrowserWorkerPool
+from browserpool.profiles import ProfileStore, compact_idle_profiles, default_profile_root, register_profile_store
 from imageGeneration.editImage import generate_image
-from socialapiscrapers.scrape_reddit import (
-    get_oauth_token,
-    fetch_subreddit_new,
-    compute_engagement,
+from socialapiscrapers.scrape_reddit import compute_engagement, resolve_strategy
+from socialapiscrapers.reddit_async import (
+    fetch_subreddit_new_async,
+    fetch_subreddit_incremental_async,
+    fetch_multireddit_new_async,
+    fetch_subreddit_strategy_async,
 )
-from socialapiscrapers.scrapeTelegramChannel import scrape_channel as tg_scrape_channel
+from socialapiscrapers.reddit_store import get_reddit_store
+from socialapiscrapers.reddit_auth import close_reddit_token_manager, get_reddit_token_manager
+from socialapiscrapers.reddit_client import close_async_reddit_client, get_async_reddit_client, get_reddit_client
+from socialapiscrapers.scrapeTelegramChannel import (
+    fetch_channel_incremental,
+    rank_messages,
+    save_aggregated_json,
+    scrape_channel as tg_scrape_channel,
+)
+from socialapiscrapers.telegram_batch import Throttled, get_flood_scheduler, run_telegram_batch
+from socialapiscrapers.telegram_live import get_telegram_live, live_channels, start_telegram_live, stop_telegram_live
+from socialapiscrapers.telegram_store import get_telegram_store
+from socialapiscrapers.telegram_client import close_telegram_manager, get_telegram_manager, telegram_manager_stats
 from socialapiscrapers.scrapeInstagramPage import (
     login_with_prompt,
     fetch_medias_since,
     compute_engagement_from_metrics,
 )
-from footballapiscapers.league import scrape_league
-from footballapiscapers.match import scrape_match
-from footballapiscapers.player import scrape_player
-from imageAPIscrapers.gettyimage import scrape_image
+from footballapiscapers.league import scrape_league, resolve_league_id, fetch_league_table
+from footballapiscapers.match import scrape_match, resolve_match_id, fetch_match_details
+from footballapiscapers.player import scrape_player, resolve_player_id, fetch_player_data
+from footballapiscapers.batch import BatchSpec, run_batch
+from footballapiscapers.fixtures import get_fixtures_index
+from footballapiscapers.fotmob_browser import FOTMOB_PROFILE, build_fotmob_options, setup_fotmob_driver
+from footballapiscapers.fotmob_cdp import CDP_SETTINGS as FOTMOB_CDP_SETTINGS, scrape_async as fotmob_scrape_async
+from footballapiscapers.id_index import get_id_index, match_labels, player_labels, league_labels
+from footballapiscapers.payload_cache import get_payload_cache
+from footballapiscapers.live import LiveMatchHub
+from footballapiscapers.projection import invalid_paths, project
+from footballapiscapers.timing import FOTMOB_TIMER
+from footballapiscapers.search import FotmobSearchError, SEARCH_KINDS, search_fotmob
+from imageAPIscrapers.gettyimage import (
+    scrape_image, scrape_image_async, GETTY_PROFILE, CDP_SETTINGS as GETTY_CDP_SETTINGS, build_chrome_options as getty_options,
+)
+from imageAPIscrapers.meme_imgflip import (
+    scrape_meme, scrape_meme_async, IMGFLIP_PROFILE, CDP_SETTINGS as IMGFLIP_CDP_SETTINGS,
+    build_chrome_options as imgflip_options, setup_driver as imgflip_setup,
+)
+
+CHROMEDRIVER_PATH = "/home/xaje/Documents/contentWork/footballapiscapers/chromedriver"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+# (profile, options factory, per-driver setup) for every Selenium-driven site
+BROWSER_PROFILE_SPECS = [
+    (FOTMOB_PROFILE, build_fotmob_options, setup_fotmob_driver),
+    (GETTY_PROFILE, partial(getty_options, headless=True), None),
+    (IMGFLIP_PROFILE, partial(imgflip_options, headless=True), imgflip_setup),
+]
+BROWSER_WORKERS = _env_int("BROWSER_WORKERS", 0)
+browser_workers: Optional[BrowserWorkerPool] = None
+# lease_page / AsyncBrowserPool settings per profile for the CDP backend
+CDP_PROFILE_SETTINGS = {
+    FOTMOB_PROFILE: FOTMOB_CDP_SETTINGS,
+    GETTY_PROFILE: GETTY_CDP_SETTINGS,
+    IMGFLIP_PROFILE: IMGFLIP_CDP_SETTINGS,
+}
+SCRAPER_BACKENDS_AVAILABLE = ("selenium", "cdp")
+
+
+def _scraper_backend(profile: str) -> str:
+    """SCRAPER_BACKEND_<PROFILE>, else SCRAPER_BACKEND, else selenium."""
+    backend = os.getenv(f"SCRAPER_BACKEND_{profile.upper()}", os.getenv("SCRAPER_BACKEND", "selenium")).strip().lower()
+    if backend not in SCRAPER_BACKENDS_AVAILABLE:
+        print(f"[app] unknown scraper backend {backend!r} for {profile}; using selenium")
+        return "selenium"
+    return backend
+
+
+SCRAPER_BACKENDS = {name: _scraper_backend(name) for name, _factory, _setup in BROWSER_PROFILE_SPECS}
+
+
+def _uses_cdp(profile: str) -> bool:
+    return SCRAPER_BACKENDS.get(profile) == "cdp"
+
 
-app = FastAPI(title="ContentWork API", version="0.1.0")
+def _profile_store_settings(name: str, browsers: int) -> Optional[Dict[str, Any]]:
+    """ProfileStore kwargs for a site if BROWSER_PROFILES(_<PROFILE>) is on, else None."""
+    default_profiles = os.getenv("BROWSER_PROFILES", "0") != "0"
+    if os.getenv(f"BROWSER_PROFILES_{name.upper()}", "1" if default_profiles else "0") == "0":
+        return None
+    return {
+        "root": default_profile_root(),
+        "site": name,
+        "slots": _env_int("BROWSER_PROFILE_SLOTS", max(browsers, 1)),
+        "max_mb": float(os.getenv("BROWSER_PROFILE_MAX_MB", "512")),
+    }
+
+
+def _build_driver_pools() -> List[DriverPool]:
+    """
+    One warm pool per browser profile. Sizes default to BROWSER_POOL_SIZE and can be
+    overridden per profile, e.g. BROWSER_POOL_SIZE_FOTMOB=3. A size of 0 disables the
+    pool and that scraper goes back to a fresh driver per call.
+
+    BROWSER_PROFILES=1 (or BROWSER_PROFILES_<PROFILE>=1) runs that site's browsers
+    on persistent user-data-dirs that keep cache and cookies between launches.
+
+    Sites on the CDP backend get no Selenium pool; their remaining Selenium
+    callers (batches, live polling) fall back to a fresh driver per call.
+    """
+    default_size = _env_int("BROWSER_POOL_SIZE", 2)
+    max_uses = _env_int("BROWSER_POOL_MAX_USES", 50)
+    max_rss_mb = float(os.getenv("BROWSER_POOL_MAX_RSS_MB", "1500"))
+    pools = []
+    for name, factory, setup in BROWSER_PROFILE_SPECS:
+        if _uses_cdp(name):
+            continue
+        size = _env_int(f"BROWSER_POOL_SIZE_{name.upper()}", default_size)
+        settings = _profile_store_settings(name, size)
+        store = register_profile_store(name, ProfileStore(**settings)) if settings else None
+        if size <= 0:
+            continue
+        pools.append(DriverPool(
+            name,
+            CHROMEDRIVER_PATH,
+            factory,
+            size=size,
+            max_uses=max_uses,
+            max_rss_mb=max_rss_mb,
+            # a persistent profile is only worth it if its cookies survive
+            keep_cookies=store is not None,
+            setup=setup,
+            profiles=store,
+        ))
+    return pools
+
+
+def _build_browser_workers() -> BrowserWorkerPool:
+    """
+    Worker processes that run the scrapers, each with its own warm browser per site.
+    With BROWSER_PROFILES those browsers run on persistent profiles, one slot per
+    worker by default; the stores are registered here too so idle slots get compacted.
+    """
+    pool_specs = []
+    for name, factory, setup in BROWSER_PROFILE_SPECS:
+        settings = _profile_store_settings(name, BROWSER_WORKERS)
+        if settings:
+            register_profile_store(name, ProfileStore(**settings))
+        pool_specs.append((name, CHROMEDRIVER_PATH, factory, setup, settings))
+    return BrowserWorkerPool(
+        size=BROWSER_WORKERS,
+        pool_specs=pool_specs,
+        job_timeout=float(os.getenv("BROWSER_WORKER_JOB_TIMEOUT", "180")),
+        max_rss_mb=float(os.getenv("BROWSER_WORKER_MAX_RSS_MB", "2000")),
+        max_jobs=_env_int("BROWSER_WORKER_MAX_JOBS", 200),
+    )
+
+
+def _build_async_pools() -> List[AsyncBrowserPool]:
+    """
+    One shared Chrome per site on the CDP backend, serving up to CDP_MAX_PAGES
+    (or CDP_MAX_PAGES_<PROFILE>) concurrent pages, each in its own browser context.
+    """
+    default_pages = _env_int("CDP_MAX_PAGES", 8)
+    max_uses = _env_int("CDP_MAX_USES", 500)
+    return [
+        AsyncBrowserPool(
+            name,
+            max_pages=_env_int(f"CDP_MAX_PAGES_{name.upper()}", default_pages),
+            max_uses=max_uses,
+            **CDP_PROFILE_SETTINGS[name],
+        )
+        for name in CDP_PROFILE_SETTINGS
+        if _uses_cdp(name)
+    ]
+
+
+async def _run_scraper(func, **kwargs):
+    """Run a Selenium scraper in a browser worker process if enabled, else in a thread."""
+    if browser_workers is not None:
+        return await asyncio.to_thread(browser_workers.run, f"{func.__module__}:{func.__name__}", **kwargs)
+    return await asyncio.to_thread(func, **kwargs)
+
+
+def _scrape_in_worker(func):
+    """Sync variant of _run_scraper for code that already runs in a thread (batches)."""
+    def run(query: str, chromedriver_path: str):
+        if browser_workers is not None:
+            return browser_workers.run(f"{func.__module__}:{func.__name__}", query, chromedriver_path)
+        return func(query, chromedriver_path)
+    return run
+
+
+async def _sweep_profiles(interval: float) -> None:
+    """Compact persistent profiles no browser holds; held ones are compacted when their browser exits."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(compact_idle_profiles)
+        except Exception as e:
+            print(f"[profiles] sweep failed: {e!r}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global browser_workers
+    if BROWSER_WORKERS > 0:
+        # browsers live in the worker processes; none in the API process
+        browser_workers = _build_browser_workers()
+        await asyncio.to_thread(browser_workers.start)
+        pools = []
+    else:
+        pools = [register_pool(p) for p in _build_driver_pools()]
+    async_pools = [register_async_pool(p) for p in _build_async_pools()]
+    if os.getenv("BROWSER_POOL_WARM", "1") != "0":
+        await asyncio.gather(
+            *(asyncio.to_thread(p.start) for p in pools),
+            *(p.start() for p in async_pools),
+        )
+    sweep_interval = float(os.getenv("BROWSER_PROFILE_SWEEP", "3600"))
+    profile_sweep = asyncio.create_task(_sweep_profiles(sweep_interval)) if sweep_interval > 0 else None
+    fixtures = get_fixtures_index()
+    if os.getenv("FOTMOB_FIXTURES", "1") != "0":
+        fixtures.start()
+    if os.getenv("TELEGRAM_API_ID") and os.getenv("TELEGRAM_CONNECT_ON_START", "1") != "0":
+        try:
+            await _telegram_manager().client()
+        except Exception as e:
+            print(f"[telegram] connect on start failed: {e!r}")
+    telegram_live = None
+    if os.getenv("TELEGRAM_API_ID") and live_channels():
+        # backfill runs in the background; /telegram polls history until a channel is ready
+        telegram_live = asyncio.create_task(start_telegram_live(_telegram_manager(), live_channels()))
+    try:
+        yield
+    finally:
+        if profile_sweep is not None:
+            profile_sweep.cancel()
+        fixtures.stop()
+        close_reddit_token_manager()
+        if telegram_live is not None:
+            telegram_live.cancel()
+            await stop_telegram_live()
+        await close_telegram_manager()
+        await close_async_reddit_client()
+        await close_async_pools()
+        await asyncio.to_thread(close_all_pools)
+        if browser_workers is not None:
+            await asyncio.to_thread(browser_workers.close)
+            browser_workers = None
+
+
+app = FastAPI(title="ContentWork API", version="0.1.0", lifespan=lifespan)
+
+# Compress JSON responses (brotli when brotli-asgi is installed, gzip otherwise).
+# Event streams are left alone so live updates aren't held back in a buffer.
+COMPRESS_MIN_BYTES = _env_int("COMPRESS_MIN_BYTES", 1024)
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    from fastapi.middleware.gzip import GZipMiddleware
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES, compresslevel=6)
+else:
+    app.add_middleware(
+        BrotliMiddleware,
+        minimum_size=COMPRESS_MIN_BYTES,
+        gzip_fallback=True,
+        excluded_handlers=[r"^/football/match/[^/]+/live$", r"^/generateImage/"],
+    )
 
 
 @app.get("/health")
@@ -39,8 +302,29 @@ def health():
     return {"ok": True}
 
 
+@app.get("/browsers/stats")
+def browser_stats():
+    return pool_stats()
+
+
+@app.get("/browsers/cdp/stats")
+def browser_cdp_stats():
+    return {"backends": SCRAPER_BACKENDS, "pools": async_pool_stats()}
+
+
+@app.get("/browsers/workers/stats")
+def browser_worker_stats():
+    if browser_workers is None:
+        return {"enabled": False}
+    return {"enabled": True, **browser_workers.stats()}
+
+
 class RedditRequest(BaseModel):
-    subreddit: str
+    subreddit: Optional[str] = None
+    # several subreddits share one combined r/a+b+c/new listing
+    subreddits: Optional[List[str]] = None
+    # per-subreddit window overrides, e.g. {"soccer": 1}
+    days_by_subreddit: Optional[Dict[str, float]] = None
     days: float = 3.0
     top: int = 20
     alpha: float = 1.5
@@ -48,10 +332,15 @@ class RedditRequest(BaseModel):
     gamma: float = 2.0
     page_size: int = 100
     max_pages: int = 30
+    # page only what is new since the last call and refresh stored counts (see reddit_store);
+    # single subreddit only, the combined `subreddits` listing always walks /new in full
+    incremental: bool = True
+    # new | auto | top | hot | rising: which listing to take candidates from (see resolve_strategy)
+    strategy: str = "new"
 
 
 @app.post("/reddit")
-def reddit_top(req: RedditRequest):
+async def reddit_top(req: RedditRequest):
     client_id = os.getenv("REDDIT_CLIENT_ID")
     client_secret = os.getenv("REDDIT_CLIENT_SECRET")
     username = os.getenv("REDDIT_USERNAME")
@@ -67,15 +356,101 @@ def reddit_top(req: RedditRequest):
     if missing:
         raise HTTPException(status_code=500, detail=f"Missing env: {', '.join(missing)}")
 
-    token = get_oauth_token(client_id, client_secret, username, password, user_agent)
+    subs = list(dict.fromkeys(
+        x.strip().removeprefix("r/") for x in ([req.subreddit] if req.subreddit else []) + (req.subreddits or []) if x and x.strip()
+    ))
+    if not subs:
+        raise HTTPException(status_code=400, detail="Give a subreddit or subreddits")
+
+    tokens = get_reddit_token_manager(client_id, client_secret, username, password, user_agent)
+    token = await asyncio.to_thread(tokens.token)
 
     import time as _t
-    cutoff_ts = int(_t.time() - req.days * 86400)
-    posts = fetch_subreddit_new(req.subreddit, token, user_agent, cutoff_ts, page_limit=req.page_size, max_pages=req.max_pages)
+    now = _t.time()
+    days = {k.lower(): v for k, v in (req.days_by_subreddit or {}).items()}
+    cutoffs = {sub: int(now - days.get(sub.lower(), req.days) * 86400) for sub in subs}
+    try:
+        listings = {sub: resolve_strategy(req.strategy, now - cutoffs[sub])[0] for sub in subs}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if req.subreddits is None:
+        cutoff_ts = cutoffs[subs[0]]
+        report = None
+        if listings[subs[0]] != "new":
+            posts, report = await fetch_subreddit_strategy_async(
+                subs[0], req.strategy, token, user_agent, cutoff_ts, page_limit=req.page_size, max_pages=req.max_pages,
+                token_manager=tokens,
+            )
+        elif req.incremental:
+            posts, report = await fetch_subreddit_incremental_async(
+                subs[0], token, user_agent, cutoff_ts, page_limit=req.page_size, max_pages=req.max_pages, token_manager=tokens,
+            )
+        else:
+            posts = await fetch_subreddit_new_async(
+                subs[0], token, user_agent, cutoff_ts, page_limit=req.page_size, max_pages=req.max_pages, token_manager=tokens,
+            )
+        _rank_reddit(posts, req)
+        out = {"subreddit": subs[0], "top": posts[: req.top], "count": len(posts)}
+        if report is not None:
+            out["fetch"] = report
+        return out
+
+    # subreddits whose window needs /new share the combined listing; the rest go through their ranked listing
+    walked = [sub for sub in subs if listings[sub] == "new"]
+    ranked = [sub for sub in subs if listings[sub] != "new"]
+    by_sub, report = {}, {"requests": 0, "streams": 0, "narrowed": 0, "incomplete": []}
+    if walked:
+        # not backed by RedditStore: `incremental` does not apply here
+        by_sub, report = await fetch_multireddit_new_async(
+            walked, token, user_agent, {sub: cutoffs[sub] for sub in walked}, page_limit=req.page_size,
+            max_pages=req.max_pages, token_manager=tokens,
+        )
+    if ranked:
+        results = await asyncio.gather(*(
+            fetch_subreddit_strategy_async(
+                sub, req.strategy, token, user_agent, cutoffs[sub], page_limit=req.page_size, max_pages=req.max_pages,
+                token_manager=tokens,
+            )
+            for sub in ranked
+        ))
+        report["strategies"] = {}
+        for sub, (posts, sub_report) in zip(ranked, results):
+            for p in posts:
+                p.setdefault("subreddit", sub)
+            by_sub[sub] = posts
+            report["requests"] += sub_report["requests"]
+            report["strategies"][sub] = sub_report
+        report["saved"] = sum(r["saved"] for r in report["strategies"].values())
+    report["incremental"] = False
+    by_sub = {sub: by_sub[sub] for sub in subs}
+    merged = [p for posts in by_sub.values() for p in posts]
+    _rank_reddit(merged, req)
+    for posts in by_sub.values():
+        posts.sort(key=lambda x: x.get("_engagement_score", 0.0), reverse=True)
+    return {
+        "subreddits": {
+            sub: {"top": posts[: req.top], "count": len(posts), "complete": sub not in report["incomplete"]}
+            for sub, posts in by_sub.items()
+        },
+        "merged": {"top": merged[: req.top], "count": len(merged)},
+        "fetch": report,
+    }
+
+
+def _rank_reddit(posts: List[Dict[str, Any]], req: RedditRequest) -> None:
     for p in posts:
         p["_engagement_score"] = compute_engagement(p, req.alpha, req.beta, req.gamma)
     posts.sort(key=lambda x: x.get("_engagement_score", 0.0), reverse=True)
-    return {"subreddit": req.subreddit, "top": posts[: req.top], "count": len(posts)}
+
+
+@app.get("/reddit/stats")
+def reddit_stats():
+    return {
+        **get_reddit_client().stats(),
+        "async": get_async_reddit_client().stats(),
+        "store": get_reddit_store().stats(),
+    }
 
 
 class TelegramRequest(BaseModel):
@@ -83,18 +458,59 @@ class TelegramRequest(BaseModel):
     days: float = 3.0
     top: int = 20
     out_json: str = ""
+    # fetch only messages newer than the last call and refresh stored metrics (see telegram_store)
+    incremental: bool = True
 
 
-@app.post("/telegram")
-async def telegram_top(req: TelegramRequest):
+def _telegram_manager():
     api_id_env = os.getenv("TELEGRAM_API_ID")
     api_hash = os.getenv("TELEGRAM_API_HASH")
     if not api_id_env or not api_hash:
         raise HTTPException(status_code=500, detail="Missing TELEGRAM_API_ID / TELEGRAM_API_HASH in env")
-    api_id = int(api_id_env)
+    return get_telegram_manager(
+        int(api_id_env), api_hash, os.getenv("TELEGRAM_SESSION"), os.getenv("TELEGRAM_STRING_SESSION"),
+    )
+
 
-    # Run scraper and get posts data
-    posts = await tg_scrape_channel(
+# the shared client doesn't sleep through FloodWaits; /telegram waits out this much itself
+TELEGRAM_FLOOD_WAIT_MAX = float(os.getenv("TELEGRAM_FLOOD_WAIT_MAX", "60"))
+
+
+async def _telegram_call(manager, fn):
+    """manager.call(fn) scheduled around FloodWaits; 429 if the wait would pass TELEGRAM_FLOOD_WAIT_MAX."""
+    try:
+        return await get_flood_scheduler().run(
+            lambda: manager.call(fn), time.time() + TELEGRAM_FLOOD_WAIT_MAX, bound_call=False,
+        )
+    except Throttled as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+@app.post("/telegram")
+async def telegram_top(req: TelegramRequest):
+    live = get_telegram_live()
+    answer = live.query(req.channel, req.days, req.top) if live is not None and not req.out_json else None
+    if answer is not None:
+        return {"channel": req.channel, **answer, "saved": False, "source": "live"}
+
+    manager = _telegram_manager()
+    api_id, api_hash, session_path, string_session = manager.credentials
+
+    if req.incremental:
+        posts, report = await _telegram_call(manager, lambda client: fetch_channel_incremental(client, req.channel, req.days))
+        rank_messages(posts)
+        if req.out_json:
+            save_aggregated_json(req.out_json, req.channel, req.days, posts, 1.5, 1.0, 1.0, 2.0)
+        return {
+            "channel": req.channel,
+            "top": posts[:req.top],
+            "count": len(posts),
+            "saved": bool(req.out_json),
+            "fetch": report,
+        }
+
+    # Run scraper on the shared client and get posts data
+    posts = await _telegram_call(manager, lambda client: tg_scrape_channel(
         api_id=api_id,
         api_hash=api_hash,
         channel=req.channel,
@@ -108,10 +524,11 @@ async def telegram_top(req: TelegramRequest):
         delta=1.0,
         gamma=2.0,
         award_scale=1.0,
-        session_path=os.getenv("TELEGRAM_SESSION"),
-        string_session=os.getenv("TELEGRAM_STRING_SESSION"),
+        session_path=session_path,
+        string_session=string_session,
         do_login_and_print_string=False,
-    )
+        client=client,
+    ))
     
     # Return the actual posts data
     return {
@@ -122,6 +539,41 @@ async def telegram_top(req: TelegramRequest):
     }
 
 
+TELEGRAM_BATCH_MAX_CONCURRENCY = _env_int("TELEGRAM_BATCH_MAX_CONCURRENCY", 8)
+
+
+class TelegramBatchRequest(BaseModel):
+    channels: List[str]
+    days: float = 3.0
+    top: int = 20
+    concurrency: int = 4
+    # seconds per channel before it is returned throttled with what is stored
+    deadline: float = 30.0
+    deadlines: Optional[Dict[str, float]] = None
+
+
+@app.post("/telegram/batch")
+async def telegram_batch(req: TelegramBatchRequest):
+    channels = [c.strip().removeprefix("t/") for c in req.channels if c and c.strip()]
+    if not channels:
+        raise HTTPException(status_code=400, detail="channels must not be empty")
+    concurrency = max(1, min(req.concurrency, TELEGRAM_BATCH_MAX_CONCURRENCY))
+    return await run_telegram_batch(
+        _telegram_manager(), channels, req.days, top=req.top, concurrency=concurrency,
+        deadline=req.deadline, deadlines=req.deadlines,
+    )
+
+
+@app.get("/telegram/stats")
+def telegram_stats():
+    return {
+        **telegram_manager_stats(),
+        "flood": get_flood_scheduler().stats(),
+        "live": get_telegram_live().stats() if get_telegram_live() is not None else None,
+        "store": get_telegram_store().stats(),
+    }
+
+
 class InstagramRequest(BaseModel):
     target: str
     days: float = 3.0
@@ -199,49 +651,236 @@ def instagram_top(req: InstagramRequest):
     return {"target": req.target, "top": items[: req.top], "count": len(items)}
 
 
+def _check_projection(kind: str, fields: Optional[List[str]], exclude: Optional[List[str]]) -> None:
+    bad = invalid_paths(kind, (fields or []) + (exclude or []))
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Unknown {kind} fields: {', '.join(map(str, bad))}")
+
+
 class FotmobLeagueRequest(BaseModel):
     query: str
     save_json: Optional[str] = None
+    fields: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
 
 
 @app.post("/football/league")
-def football_league(req: FotmobLeagueRequest):
-    data = scrape_league(league_search_query=req.query, chromedriver_path="/home/xaje/Documents/contentWork/footballapiscapers/chromedriver", save_json_path=req.save_json)
-    return data
+async def football_league(req: FotmobLeagueRequest):
+    _check_projection("league", req.fields, req.exclude)
+    if _uses_cdp(FOTMOB_PROFILE):
+        data = await fotmob_scrape_async("league", req.query, req.save_json)
+    else:
+        data = await _run_scraper(
+            scrape_league, league_search_query=req.query, chromedriver_path=CHROMEDRIVER_PATH, save_json_path=req.save_json,
+        )
+    return project(data, req.fields, req.exclude)
 
 
 class FotmobMatchRequest(BaseModel):
     query: str
     save_json: Optional[str] = None
+    fields: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
 
 
 @app.post("/football/match")
-def football_match(req: FotmobMatchRequest):
-    data = scrape_match(search_query=req.query, chromedriver_path="/home/xaje/Documents/contentWork/footballapiscapers/chromedriver", save_json_path=req.save_json)
-    return data
+async def football_match(req: FotmobMatchRequest):
+    _check_projection("match", req.fields, req.exclude)
+    if _uses_cdp(FOTMOB_PROFILE):
+        data = await fotmob_scrape_async("match", req.query, req.save_json)
+    else:
+        data = await _run_scraper(
+            scrape_match, search_query=req.query, chromedriver_path=CHROMEDRIVER_PATH, save_json_path=req.save_json,
+        )
+    return project(data, req.fields, req.exclude)
 
 
 class FotmobPlayerRequest(BaseModel):
     query: str
     save_json: Optional[str] = None
+    fields: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
 
 
 @app.post("/football/player")
-def football_player(req: FotmobPlayerRequest):
-    data = scrape_player(player_search_query=req.query, chromedriver_path="/home/xaje/Documents/contentWork/footballapiscapers/chromedriver", save_json_path=req.save_json)
-    return data
+async def football_player(req: FotmobPlayerRequest):
+    _check_projection("player", req.fields, req.exclude)
+    if _uses_cdp(FOTMOB_PROFILE):
+        data = await fotmob_scrape_async("player", req.query, req.save_json)
+    else:
+        data = await _run_scraper(
+            scrape_player, player_search_query=req.query, chromedriver_path=CHROMEDRIVER_PATH, save_json_path=req.save_json,
+        )
+    return project(data, req.fields, req.exclude)
+
+
+live_matches = LiveMatchHub(lambda match_id: fetch_match_details(match_id, CHROMEDRIVER_PATH, fresh=True))
+
+
+def _sse(event: str, payload) -> str:
+    if event == "ping":
+        return ": ping\n\n"
+    seq = payload.get("seq") if isinstance(payload, dict) else None
+    head = f"id: {seq}\n" if seq is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(payload, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+@app.get("/football/match/{match_id}/live")
+async def football_match_live(match_id: str, request: Request):
+    """
+    Server-Sent Events: a `snapshot` of matchDetails, then `diff` events carrying
+    only the changed paths (JSON Patch ops). One upstream poller per match is
+    shared by all subscribers.
+    """
+    if not match_id.isdigit():
+        raise HTTPException(status_code=400, detail="match_id must be a FotMob numeric id")
+
+    async def events():
+        async for event, payload in live_matches.stream(match_id):
+            if event == "ping" and await request.is_disconnected():
+                break
+            yield _sse(event, payload)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/football/live/stats")
+async def football_live_stats():
+    return {"feeds": live_matches.stats()}
+
+
+class FotmobSearchRequest(BaseModel):
+    query: str
+    kinds: Optional[List[str]] = None
+    limit: int = 10
+
+
+FOOTBALL_BATCH_MAX_CONCURRENCY = _env_int("FOOTBALL_BATCH_MAX_CONCURRENCY", 8)
+FOOTBALL_BATCH_SPECS = {
+    "match": BatchSpec("match", resolve_match_id, fetch_match_details, _scrape_in_worker(scrape_match), match_labels),
+    "player": BatchSpec("player", resolve_player_id, fetch_player_data, _scrape_in_worker(scrape_player), player_labels),
+    "league": BatchSpec("league", resolve_league_id, fetch_league_table, _scrape_in_worker(scrape_league), league_labels),
+}
+
+
+class FotmobBatchRequest(BaseModel):
+    queries: List[str]
+    concurrency: int = 4
+
+
+async def _football_batch(kind: str, req: FotmobBatchRequest):
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="queries must not be empty")
+    concurrency = max(1, min(req.concurrency, FOOTBALL_BATCH_MAX_CONCURRENCY))
+    return await run_batch(FOOTBALL_BATCH_SPECS[kind], req.queries, CHROMEDRIVER_PATH, concurrency=concurrency)
+
+
+@app.post("/football/match/batch")
+async def football_match_batch(req: FotmobBatchRequest):
+    return await _football_batch("match", req)
+
+
+@app.post("/football/player/batch")
+async def football_player_batch(req: FotmobBatchRequest):
+    return await _football_batch("player", req)
+
+
+@app.post("/football/league/batch")
+async def football_league_batch(req: FotmobBatchRequest):
+    return await _football_batch("league", req)
+
+
+@app.post("/football/search")
+def football_search(req: FotmobSearchRequest):
+    bad = [k for k in (req.kinds or []) if k not in SEARCH_KINDS]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Unknown kinds: {', '.join(bad)} (use {', '.join(SEARCH_KINDS)})")
+    try:
+        candidates = search_fotmob(req.query, kinds=req.kinds, limit=req.limit)
+    except FotmobSearchError as e:
+        raise HTTPException(status_code=502, detail=f"FotMob search failed: {e}")
+    return {"query": req.query, "candidates": candidates, "count": len(candidates)}
+
+
+@app.get("/football/index/stats")
+def football_index_stats():
+    return get_id_index().stats()
+
+
+class FotmobIndexInvalidateRequest(BaseModel):
+    kind: Optional[str] = None
+    query: Optional[str] = None
+    entity_id: Optional[str] = None
+
+
+@app.post("/football/index/invalidate")
+def football_index_invalidate(req: FotmobIndexInvalidateRequest):
+    try:
+        removed = get_id_index().invalidate(kind=req.kind, query=req.query, entity_id=req.entity_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"removed": removed}
+
+
+@app.get("/football/fixtures/stats")
+def football_fixtures_stats():
+    return get_fixtures_index().stats()
+
+
+class FotmobFixtureLookupRequest(BaseModel):
+    query: str
+
+
+@app.post("/football/fixtures/lookup")
+def football_fixtures_lookup(req: FotmobFixtureLookupRequest):
+    fixture = get_fixtures_index().lookup(req.query)
+    if fixture is None:
+        raise HTTPException(status_code=404, detail="No fixture in the current matchday window")
+    return fixture
+
+
+@app.get("/football/timings")
+def football_timings():
+    return FOTMOB_TIMER.stats()
+
+
+@app.get("/football/cache/stats")
+def football_cache_stats():
+    return get_payload_cache().stats()
+
+
+class FotmobCacheInvalidateRequest(BaseModel):
+    kind: Optional[Literal["match", "player", "league"]] = None
+    entity_id: Optional[str] = Field(default=None, pattern=r"^[0-9]+$")
+
+
+@app.post("/football/cache/invalidate")
+def football_cache_invalidate(req: FotmobCacheInvalidateRequest):
+    try:
+        removed = get_payload_cache().invalidate(kind=req.kind, entity_id=req.entity_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"removed": removed}
 
 
 class ImageRequest(BaseModel):
     query: str
 
 @app.post("/images/")
-def football_player(req: ImageRequest):
+async def grab_image_endpoint(req: ImageRequest):
     try:
-        result = scrape_image(
-            player_search_query=req.query,
-            chromedriver_path="/home/xaje/Documents/contentWork/footballapiscapers/chromedriver"
-        )
+        if _uses_cdp(GETTY_PROFILE):
+            result = await scrape_image_async(req.query)
+        else:
+            result = await _run_scraper(
+                scrape_image,
+                player_search_query=req.query,
+                chromedriver_path=CHROMEDRIVER_PATH,
+            )
         return JSONResponse(content=json.loads(result))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -250,10 +889,15 @@ def football_player(req: ImageRequest):
 @app.post("/grabMeme/")
 async def grab_meme_endpoint(req: ImageRequest):
     try:
-        result = scrape_meme(
-            memeQuery=req.query,
-            chromedriver_path="/home/xaje/Documents/contentWork/footballapiscapers/chromedriver"
-        )
+        if _uses_cdp(IMGFLIP_PROFILE):
+            result = await scrape_meme_async(req.query)
+        else:
+            # off the event loop: waiting for a pooled browser must not block it
+            result = await _run_scraper(
+                scrape_meme,
+                memeQuery=req.query,
+                chromedriver_path=CHROMEDRIVER_PATH,
+            )
         return JSONResponse(content=json.loads(result))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,485 @@
+"""
+cdp_async.py
+
+asyncio-native browser automation over the Chrome DevTools Protocol, as an
+alternative to the Selenium path for the scrapers.
+
+One Chrome process per profile is driven over a single websocket; every lease
+gets its own browser context (separate cookies/storage, like a fresh
+incognito window) with one page in it. Waiting for selectors, typing and
+page loads are all awaits on the event loop, so many concurrent scraper
+sessions share one browser and no OS threads sit blocked in WebDriverWait.
+
+    async with lease_page("fotmob") as page:
+        await page.goto("https://www.fotmob.com")
+        await page.wait_for("input[placeholder='Search']")
+
+Pools are registered per profile at app startup (like driver_pool); without
+one, lease_page() launches a throwaway Chrome for the single call.
+"""
+from __future__ import annotations
+import os
+import re
+import json
+import base64
+import random
+import shutil
+import asyncio
+import tempfile
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+CHROME_CANDIDATES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+_DEVTOOLS_RE = re.compile(r"DevTools listening on (ws://\S+)")
+
+
+class CDPError(RuntimeError):
+    """A DevTools command failed or the browser went away."""
+
+
+def find_chrome() -> str:
+    binary = os.getenv("CHROME_BINARY")
+    if binary:
+        return binary
+    for name in CHROME_CANDIDATES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise CDPError("no Chrome binary found; set CHROME_BINARY")
+
+
+def _js(value) -> str:
+    return json.dumps(value)
+
+
+class AsyncChrome:
+    """A Chrome process plus its browser-level DevTools connection."""
+
+    def __init__(self, args: tuple[str, ...] | list[str] = (), headless: bool = True):
+        self.args = list(args)
+        self.headless = headless
+        self._proc: asyncio.subprocess.Process | None = None
+        self._ws = None
+        self._user_data_dir: str | None = None
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        # sessionId -> AsyncPage, for routing events
+        self._pages: Dict[str, "AsyncPage"] = {}
+        self._reader: asyncio.Task | None = None
+        self._stderr: asyncio.Task | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._reader is not None and not self._reader.done()
+
+    async def start(self, timeout: float = 30.0) -> None:
+        self._user_data_dir = tempfile.mkdtemp(prefix="cdp-chrome-")
+        argv = [
+            find_chrome(),
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self._user_data_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *(["--headless=new"] if self.headless else []),
+            *self.args,
+            "about:blank",
+        ]
+        self._proc = await asyncio.create_subprocess_exec(
+            *argv, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            ws_url = await asyncio.wait_for(self._devtools_url(), timeout)
+            self._ws = await connect(ws_url, max_size=None, ping_interval=None)
+        except Exception:
+            await self.close()
+            raise
+        # keep draining stderr so Chrome never blocks on a full pipe
+        self._stderr = asyncio.create_task(self._drain_stderr())
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def _devtools_url(self) -> str:
+        while True:
+            line = await self._proc.stderr.readline()
+            if not line:
+                raise CDPError("Chrome exited before DevTools was ready")
+            m = _DEVTOOLS_RE.search(line.decode(errors="replace"))
+            if m:
+                return m.group(1)
+
+    async def _drain_stderr(self) -> None:
+        while self._proc and self._proc.stderr and await self._proc.stderr.readline():
+            pass
+
+    async def _read_loop(self) -> None:
+        try:
+            async for raw in self._ws:
+                msg = json.loads(raw)
+                if "id" in msg:
+                    fut = self._pending.pop(msg["id"], None)
+                    if fut is not None and not fut.done():
+                        if "error" in msg:
+                            fut.set_exception(CDPError(str(msg["error"])))
+                        else:
+                            fut.set_result(msg.get("result") or {})
+                    continue
+                page = self._pages.get(msg.get("sessionId"))
+                if page is not None:
+                    page._on_event(msg.get("method"), msg.get("params") or {})
+        except (WebSocketException, OSError, ValueError):
+            pass
+        finally:
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(CDPError("browser connection closed"))
+            self._pending.clear()
+
+    async def send(self, method: str, params: dict | None = None, session_id: str | None = None,
+                   timeout: float = 30.0) -> dict:
+        if self._ws is None:
+            raise CDPError("browser not started")
+        self._next_id += 1
+        msg_id = self._next_id
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = fut
+        msg = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        try:
+            await self._ws.send(json.dumps(msg))
+            return await asyncio.wait_for(fut, timeout)
+        except (WebSocketException, OSError) as e:
+            raise CDPError(str(e)) from e
+        finally:
+            self._pending.pop(msg_id, None)
+
+    async def new_page(self, blocked_urls: list[str] | tuple = (), url_patterns: tuple[str, ...] = ()) -> "AsyncPage":
+        ctx = (await self.send("Target.createBrowserContext", {"disposeOnDetach": True}))["browserContextId"]
+        try:
+            target = (await self.send("Target.createTarget", {"url": "about:blank", "browserContextId": ctx}))["targetId"]
+            session = (await self.send("Target.attachToTarget", {"targetId": target, "flatten": True}))["sessionId"]
+        except Exception:
+            await self.send("Target.disposeBrowserContext", {"browserContextId": ctx})
+            raise
+        page = AsyncPage(self, ctx, session, url_patterns)
+        self._pages[session] = page
+        await page.send("Network.enable", {
+            "maxResourceBufferSize": 20 * 1024 * 1024,
+            "maxTotalBufferSize": 60 * 1024 * 1024,
+        })
+        if blocked_urls:
+            await page.send("Network.setBlockedURLs", {"urls": list(blocked_urls)})
+        return page
+
+    async def close_page(self, page: "AsyncPage") -> None:
+        self._pages.pop(page.session_id, None)
+        try:
+            await self.send("Target.disposeBrowserContext", {"browserContextId": page.context_id}, timeout=10)
+        except (CDPError, asyncio.TimeoutError):
+            pass
+
+    async def close(self) -> None:
+        if self._ws is not None:
+            try:
+                await self.send("Browser.close", timeout=5)
+            except (CDPError, asyncio.TimeoutError):
+                pass
+            await self._ws.close()
+            self._ws = None
+        if self._proc is not None and self._proc.returncode is None:
+            try:
+                await asyncio.wait_for(self._proc.wait(), 5)
+            except asyncio.TimeoutError:
+                self._proc.kill()
+                await self._proc.wait()
+        for task in (self._reader, self._stderr):
+            if task is not None:
+                task.cancel()
+        if self._user_data_dir:
+            shutil.rmtree(self._user_data_dir, ignore_errors=True)
+            self._user_data_dir = None
+
+
+class AsyncPage:
+    """One page in its own browser context. Selector helpers take CSS selectors."""
+
+    def __init__(self, browser: AsyncChrome, context_id: str, session_id: str, url_patterns: tuple[str, ...] = ()):
+        self.browser = browser
+        self.context_id = context_id
+        self.session_id = session_id
+        self.url_patterns = tuple(url_patterns)
+        # requestId -> {"url", "headers", "status"} for requests matching url_patterns
+        self._requests: Dict[str, dict] = {}
+        self._finished: list[str] = []
+        self._changed = asyncio.Event()
+
+    async def send(self, method: str, params: dict | None = None, timeout: float = 30.0) -> dict:
+        return await self.browser.send(method, params, session_id=self.session_id, timeout=timeout)
+
+    # ---- network ----
+
+    def _on_event(self, method: str, params: dict) -> None:
+        if method == "Network.requestWillBeSent":
+            req = params.get("request") or {}
+            url = req.get("url", "")
+            if any(p in url for p in self.url_patterns):
+                self._requests[params.get("requestId")] = {"url": url, "headers": req.get("headers") or {}, "status": None}
+                self._changed.set()
+        elif method == "Network.responseReceived":
+            entry = self._requests.get(params.get("requestId"))
+            if entry is not None:
+                entry["status"] = (params.get("response") or {}).get("status")
+        elif method == "Network.loadingFinished":
+            if params.get("requestId") in self._requests:
+                self._finished.append(params["requestId"])
+                self._changed.set()
+
+    @staticmethod
+    def _matches(url: str, marker: str, entity_id) -> bool:
+        return marker in url and (entity_id is None or str(entity_id) in url)
+
+    async def _wait_request(self, marker: str, entity_id, finished: bool, timeout: float) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            ids = self._finished if finished else list(self._requests)
+            for rid in reversed(ids):
+                if self._matches(self._requests[rid]["url"], marker, entity_id):
+                    return rid
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+    async def request_headers(self, marker: str, entity_id=None, timeout: float = 20) -> Optional[dict]:
+        rid = await self._wait_request(marker, entity_id, finished=False, timeout=timeout)
+        return self._requests[rid]["headers"] if rid else None
+
+    async def response_body(self, marker: str, entity_id=None, timeout: float = 20) -> Optional[str]:
+        """Body of the page's own 2xx response for a matching URL, or None."""
+        rid = await self._wait_request(marker, entity_id, finished=True, timeout=timeout)
+        if rid is None:
+            return None
+        status = self._requests[rid]["status"]
+        if status is not None and not 200 <= int(status) < 300:
+            return None
+        try:
+            res = await self.send("Network.getResponseBody", {"requestId": rid}, timeout=10)
+        except (CDPError, asyncio.TimeoutError):
+            return None
+        body = res.get("body")
+        if body is not None and res.get("base64Encoded"):
+            body = base64.b64decode(body).decode("utf-8", errors="replace")
+        return body
+
+    async def cookies(self) -> list[dict]:
+        return (await self.send("Network.getCookies")).get("cookies", [])
+
+    # ---- DOM ----
+
+    async def evaluate(self, expression: str, timeout: float = 30.0):
+        res = await self.send("Runtime.evaluate", {
+            "expression": expression, "returnByValue": True, "awaitPromise": True,
+        }, timeout=timeout)
+        if res.get("exceptionDetails"):
+            raise CDPError(str(res["exceptionDetails"].get("text") or res["exceptionDetails"]))
+        return (res.get("result") or {}).get("value")
+
+    async def goto(self, url: str, wait_for_state: tuple[str, ...] = ("interactive", "complete"), timeout: float = 30.0) -> None:
+        res = await self.send("Page.navigate", {"url": url}, timeout=timeout)
+        if res.get("errorText"):
+            raise CDPError(f"navigation to {url} failed: {res['errorText']}")
+        if wait_for_state:
+            await self.wait_until(f"{_js(list(wait_for_state))}.includes(document.readyState)", timeout)
+
+    async def wait_until(self, expression: str, timeout: float = 15.0, interval: float = 0.1):
+        """Poll a JS expression until it is truthy; returns its value. asyncio.TimeoutError on timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            try:
+                value = await self.evaluate(expression)
+            except CDPError:
+                value = None  # mid-navigation: the execution context went away
+            if value:
+                return value
+            if loop.time() >= deadline:
+                raise asyncio.TimeoutError(f"timed out waiting for {expression}")
+            await asyncio.sleep(interval)
+
+    async def wait_for(self, selector: str, timeout: float = 15.0, visible: bool = False) -> None:
+        check = f"document.querySelector({_js(selector)})"
+        if visible:
+            check = f"(() => {{ const el = {check}; return !!(el && el.getClientRects().length); }})()"
+        else:
+            check = f"!!{check}"
+        await self.wait_until(check, timeout)
+
+    async def attribute(self, selector: str, name: str):
+        """DOM property if it is a string (absolute href/src), else the attribute."""
+        return await self.evaluate(
+            f"(() => {{ const el = document.querySelector({_js(selector)}); if (!el) return null; const v = el[{_js(name)}]; return typeof v === 'string' ? v : el.getAttribute({_js(name)}); }})()"
+        )
+
+    async def click(self, selector: str, same_tab: bool = True) -> None:
+        # same_tab drops target=_blank so the navigation stays on this page
+        detach = "el.removeAttribute('target');" if same_tab else ""
+        await self.evaluate(
+            f"(() => {{ const el = document.querySelector({_js(selector)});"
+            f" if (!el) throw new Error('no element ' + {_js(selector)});"
+            f" {detach} el.click(); }})()"
+        )
+
+    async def focus(self, selector: str) -> None:
+        await self.evaluate(f"document.querySelector({_js(selector)}).focus()")
+
+    async def type(self, selector: str, text: str, min_delay: float = 0.05, max_delay: float = 0.18) -> None:
+        await self.focus(selector)
+        for ch in text:
+            await self.send("Input.dispatchKeyEvent", {"type": "char", "text": ch})
+            await asyncio.sleep(random.uniform(min_delay, max_delay))
+
+    async def press_enter(self) -> None:
+        key = {"key": "Enter", "code": "Enter", "windowsVirtualKeyCode": 13, "nativeVirtualKeyCode": 13}
+        await self.send("Input.dispatchKeyEvent", {"type": "keyDown", "text": "\r", **key})
+        await self.send("Input.dispatchKeyEvent", {"type": "keyUp", **key})
+
+    async def url(self) -> str:
+        return await self.evaluate("location.href")
+
+    async def user_agent(self) -> str:
+        return await self.evaluate("navigator.userAgent")
+
+    async def content(self) -> str:
+        return await self.evaluate("document.documentElement.outerHTML")
+
+
+class AsyncBrowserPool:
+    """
+    One shared Chrome per profile; up to max_pages concurrent pages (contexts)
+    on it. The browser is relaunched if it dies and recycled once it has
+    served max_uses pages and is idle.
+    """
+
+    def __init__(self, name: str, args: tuple[str, ...] | list[str] = (), blocked_urls: tuple[str, ...] | list[str] = (),
+                 url_patterns: tuple[str, ...] = (), headless: bool = True, max_pages: int = 8, max_uses: int = 500):
+        self.name = name
+        self.args = list(args)
+        self.blocked_urls = list(blocked_urls)
+        self.url_patterns = tuple(url_patterns)
+        self.headless = headless
+        self.max_pages = max(1, int(max_pages))
+        self.max_uses = max(1, int(max_uses))
+        self._sem = asyncio.Semaphore(self.max_pages)
+        self._lock = asyncio.Lock()
+        self._browser: AsyncChrome | None = None
+        self._open = 0
+        self._uses = 0
+        self._stats = {"leases": 0, "launches": 0, "recycled": 0}
+
+    async def _ensure_browser(self) -> AsyncChrome:
+        async with self._lock:
+            if self._browser is not None and not self._browser.alive:
+                await self._browser.close()
+                self._browser = None
+            if self._browser is not None and self._uses >= self.max_uses and self._open == 0:
+                await self._browser.close()
+                self._browser = None
+                self._stats["recycled"] += 1
+            if self._browser is None:
+                browser = AsyncChrome(self.args, headless=self.headless)
+                await browser.start()
+                self._browser = browser
+                self._uses = 0
+                self._stats["launches"] += 1
+            return self._browser
+
+    async def start(self) -> None:
+        """Launch the browser up front; a failure is logged and retried on first lease."""
+        try:
+            await self._ensure_browser()
+        except (CDPError, OSError, asyncio.TimeoutError) as e:
+            print(f"[cdp:{self.name}] warm start failed: {e}")
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[AsyncPage]:
+        async with self._sem:
+            browser = await self._ensure_browser()
+            page = await browser.new_page(self.blocked_urls, self.url_patterns)
+            self._open += 1
+            self._uses += 1
+            self._stats["leases"] += 1
+            try:
+                yield page
+            finally:
+                self._open -= 1
+                await browser.close_page(page)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "running": self._browser is not None and self._browser.alive,
+            "open_pages": self._open,
+            "max_pages": self.max_pages,
+            **self._stats,
+        }
+
+
+# ---------- registry ----------
+
+_ASYNC_POOLS: Dict[str, AsyncBrowserPool] = {}
+
+
+def register_async_pool(pool: AsyncBrowserPool) -> AsyncBrowserPool:
+    _ASYNC_POOLS[pool.name] = pool
+    return pool
+
+
+def get_async_pool(name: str) -> Optional[AsyncBrowserPool]:
+    return _ASYNC_POOLS.get(name)
+
+
+async def close_async_pools() -> None:
+    pools = list(_ASYNC_POOLS.values())
+    _ASYNC_POOLS.clear()
+    await asyncio.gather(*(p.close() for p in pools), return_exceptions=True)
+
+
+def async_pool_stats() -> dict:
+    return {name: p.stats() for name, p in list(_ASYNC_POOLS.items())}
+
+
+@asynccontextmanager
+async def lease_page(profile: str, args: tuple[str, ...] | list[str] = (), blocked_urls: tuple[str, ...] | list[str] = (),
+                     url_patterns: tuple[str, ...] = (), headless: bool = True) -> AsyncIterator[AsyncPage]:
+    """
+    A page from the async pool registered under `profile`; without one (CLI
+    use) a throwaway Chrome with the given settings is started and closed.
+    """
+    pool = get_async_pool(profile)
+    if pool is not None:
+        async with pool.page() as page:
+            yield page
+        return
+    browser = AsyncChrome(args, headless=headless)
+    await browser.start()
+    try:
+        page = await browser.new_page(blocked_urls, url_patterns)
+        try:
+            yield page
+        finally:
+            await browser.close_page(page)
+    finally:
+        await browser.close()
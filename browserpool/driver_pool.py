@@ -0,0 +1,366 @@
+"""
+driver_pool.py
+
+Keeps a few warm Chrome instances around so the Selenium scrapers don't pay
+browser startup on every request.
+
+One DriverPool exists per browser profile (e.g. "fotmob", "getty", "imgflip"),
+because each site needs different ChromeOptions. Pools are registered by name
+at app startup; scrapers call lease_driver(profile, ...) which uses the
+registered pool if there is one and otherwise falls back to a one-off driver,
+so the scripts still run standalone.
+"""
+from __future__ import annotations
+import os
+import time
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+from browserpool.profiles import ProfileLease, ProfileStore, get_profile_store
+
+OptionsFactory = Callable[[], webdriver.ChromeOptions]
+DriverSetup = Callable[[webdriver.Chrome], None]
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no browser became free within the lease timeout."""
+
+
+def _children_of(pid: int) -> list[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as fh:
+            return [int(x) for x in fh.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def process_tree(pid: int) -> list[int]:
+    """Return pid plus all of its descendants (Linux /proc only, [] elsewhere)."""
+    if not os.path.exists(f"/proc/{pid}"):
+        return []
+    seen = [pid]
+    i = 0
+    while i < len(seen):
+        seen.extend(c for c in _children_of(seen[i]) if c not in seen)
+        i += 1
+    return seen
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", "r") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def driver_rss_mb(driver: webdriver.Chrome) -> float:
+    """Resident memory of chromedriver + every chrome process under it."""
+    try:
+        root = driver.service.process.pid
+    except AttributeError:
+        return 0.0
+    return sum(rss_mb(p) for p in process_tree(root))
+
+
+class _PooledDriver:
+    __slots__ = ("driver", "uses", "created_at", "home_handle", "profile")
+
+    def __init__(self, driver: webdriver.Chrome, profile: Optional[ProfileLease] = None):
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+        self.home_handle = driver.current_window_handle
+        self.profile = profile
+
+
+def _launch(chromedriver_path: str, options_factory: OptionsFactory,
+            profiles: Optional[ProfileStore]) -> tuple[webdriver.Chrome, Optional[ProfileLease]]:
+    """Start Chrome, on a locked persistent profile from `profiles` when one is free."""
+    options = options_factory()
+    lease = profiles.acquire() if profiles is not None else None
+    if lease is not None:
+        options.add_argument(f"--user-data-dir={lease.path}")
+    try:
+        driver = webdriver.Chrome(service=Service(executable_path=chromedriver_path), options=options)
+    except Exception:
+        if lease is not None:
+            lease.release()
+        raise
+    return driver, lease
+
+
+class DriverPool:
+    """
+    Fixed-size pool of Chrome drivers sharing one options profile.
+
+    - at most `size` browsers exist at once; lease() blocks until one is free
+    - after each lease the browser is reset (extra tabs closed, cookies/storage
+      cleared unless keep_cookies, navigated to about:blank)
+    - a browser is recycled after `max_uses` leases or once its process tree
+      exceeds `max_rss_mb`
+    - with `profiles`, each browser runs on its own locked persistent
+      user-data-dir (see profiles.py); usually combined with keep_cookies
+    """
+
+    def __init__(
+        self,
+        name: str,
+        chromedriver_path: str,
+        options_factory: OptionsFactory,
+        size: int = 2,
+        max_uses: int = 50,
+        max_rss_mb: float = 1500.0,
+        lease_timeout: float = 60.0,
+        keep_cookies: bool = False,
+        setup: Optional[DriverSetup] = None,
+        profiles: Optional[ProfileStore] = None,
+    ):
+        self.name = name
+        self.chromedriver_path = chromedriver_path
+        self.options_factory = options_factory
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.max_rss_mb = float(max_rss_mb)
+        self.lease_timeout = float(lease_timeout)
+        self.keep_cookies = keep_cookies
+        self.setup = setup
+        self.profiles = profiles
+
+        self._idle: "queue.LifoQueue[_PooledDriver]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._live = 0
+
+        self._stats = {
+            "leases": 0,
+            "created": 0,
+            "recycled": 0,
+            "broken": 0,
+            "timeouts": 0,
+            "wait_total_s": 0.0,
+            "wait_max_s": 0.0,
+            "wait_last_s": 0.0,
+        }
+
+    # ---- lifecycle ----
+
+    def _new_driver(self) -> _PooledDriver:
+        driver, profile = _launch(self.chromedriver_path, self.options_factory, self.profiles)
+        try:
+            if self.setup:
+                self.setup(driver)
+            pooled = _PooledDriver(driver, profile)
+        except Exception:
+            _quit_quietly(driver)
+            if profile is not None:
+                profile.release()
+            raise
+        with self._lock:
+            self._live += 1
+            self._stats["created"] += 1
+        return pooled
+
+    def _discard(self, pooled: _PooledDriver, reason: str) -> None:
+        _quit_quietly(pooled.driver)
+        if pooled.profile is not None:
+            # only unlocked once Chrome has exited and let go of the directory
+            pooled.profile.release()
+        with self._lock:
+            self._live -= 1
+            self._stats[reason] += 1
+
+    def start(self, warm: Optional[int] = None) -> None:
+        """Launch `warm` browsers up front (defaults to the pool size)."""
+        n = self.size if warm is None else max(0, min(int(warm), self.size))
+        if n == 0:
+            return
+
+        def _spawn(_):
+            try:
+                self._idle.put(self._new_driver())
+            except WebDriverException as e:
+                print(f"[pool:{self.name}] warm start failed: {e}")
+
+        with ThreadPoolExecutor(max_workers=n) as ex:
+            list(ex.map(_spawn, range(n)))
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled, "recycled")
+
+    # ---- leasing ----
+
+    def _reset(self, pooled: _PooledDriver) -> None:
+        driver = pooled.driver
+        for handle in list(driver.window_handles):
+            if handle != pooled.home_handle:
+                driver.switch_to.window(handle)
+                driver.close()
+        driver.switch_to.window(pooled.home_handle)
+        if not self.keep_cookies:
+            origin = driver.execute_script("return location.origin")
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            if origin and origin != "null":
+                # HTTP cache is deliberately kept warm; only per-site state goes
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                    "origin": origin,
+                    "storageTypes": "local_storage,session_storage,indexeddb,service_workers",
+                })
+        driver.get("about:blank")
+
+    def _should_recycle(self, pooled: _PooledDriver) -> bool:
+        if pooled.uses >= self.max_uses:
+            return True
+        if self.max_rss_mb > 0 and driver_rss_mb(pooled.driver) > self.max_rss_mb:
+            return True
+        return False
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[webdriver.Chrome]:
+        if self._closed:
+            raise RuntimeError(f"driver pool '{self.name}' is closed")
+        timeout = self.lease_timeout if timeout is None else timeout
+
+        t0 = time.perf_counter()
+        if not self._slots.acquire(timeout=timeout):
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise PoolTimeout(f"no '{self.name}' browser free after {timeout:.0f}s")
+        try:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                pooled = self._new_driver()
+        except Exception:
+            self._slots.release()
+            raise
+        waited = time.perf_counter() - t0
+
+        with self._lock:
+            self._stats["leases"] += 1
+            self._stats["wait_total_s"] += waited
+            self._stats["wait_last_s"] = waited
+            self._stats["wait_max_s"] = max(self._stats["wait_max_s"], waited)
+
+        try:
+            yield pooled.driver
+        finally:
+            pooled.uses += 1
+            try:
+                if self._closed:
+                    self._discard(pooled, "recycled")
+                elif self._should_recycle(pooled):
+                    self._discard(pooled, "recycled")
+                else:
+                    try:
+                        self._reset(pooled)
+                        self._idle.put(pooled)
+                    except WebDriverException:
+                        self._discard(pooled, "broken")
+            finally:
+                self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            live = self._live
+        leases = s["leases"] or 1
+        return {
+            "name": self.name,
+            "size": self.size,
+            "live": live,
+            "idle": self._idle.qsize(),
+            "leases": s["leases"],
+            "created": s["created"],
+            "recycled": s["recycled"],
+            "broken": s["broken"],
+            "timeouts": s["timeouts"],
+            "wait_avg_ms": round(1000.0 * s["wait_total_s"] / leases, 2),
+            "wait_max_ms": round(1000.0 * s["wait_max_s"], 2),
+            "wait_last_ms": round(1000.0 * s["wait_last_s"], 2),
+            "profiles": self.profiles.stats() if self.profiles is not None else None,
+        }
+
+
+def _quit_quietly(driver: webdriver.Chrome) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+# ---------- registry ----------
+
+_POOLS: Dict[str, DriverPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def register_pool(pool: DriverPool) -> DriverPool:
+    with _POOLS_LOCK:
+        old = _POOLS.get(pool.name)
+        _POOLS[pool.name] = pool
+    if old is not None:
+        old.close()
+    return pool
+
+
+def get_pool(name: str) -> Optional[DriverPool]:
+    return _POOLS.get(name)
+
+
+def close_all_pools() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for p in pools:
+        p.close()
+
+
+def pool_stats() -> dict:
+    return {name: p.stats() for name, p in list(_POOLS.items())}
+
+
+@contextmanager
+def lease_driver(
+    profile: str,
+    chromedriver_path: str,
+    options_factory: OptionsFactory,
+    setup: Optional[DriverSetup] = None,
+) -> Iterator[webdriver.Chrome]:
+    """
+    Lease a browser from the pool registered under `profile`; if no pool is
+    registered (CLI use), start a throwaway driver and quit it afterwards
+    (on a persistent profile if a profile store is registered for `profile`).
+    """
+    pool = get_pool(profile)
+    if pool is not None:
+        with pool.lease() as driver:
+            yield driver
+        return
+
+    driver, lease = _launch(chromedriver_path, options_factory, get_profile_store(profile))
+    try:
+        if setup:
+            setup(driver)
+        yield driver
+    finally:
+        _quit_quietly(driver)
+        if lease is not None:
+            lease.release()
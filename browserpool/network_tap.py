@@ -0,0 +1,324 @@
+"""
+network_tap.py
+
+Event-driven view of a Selenium-driven Chrome's network traffic.
+
+Opens a second DevTools connection to the browser chromedriver started,
+auto-attaches to its pages and enables the Network domain on each. A reader
+thread resolves futures as soon as a matching Network.requestWillBeSent event
+arrives, instead of polling driver.get_log("performance"). Finished responses
+for matching URLs can be read back with Network.getResponseBody, so data the
+page already downloaded doesn't have to be fetched a second time.
+
+Only requests whose URL contains one of the tap's url_patterns are decoded;
+everything else is dropped on a substring check of the raw frame. The only
+retained state is a few small rings of recent matches, so a waiter registered
+just after the request went out is still satisfied.
+"""
+from __future__ import annotations
+import json
+import base64
+import time
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import websocket
+
+RECENT_MATCHES = 32
+
+
+class NetworkTapError(RuntimeError):
+    """The browser's DevTools endpoint could not be reached."""
+
+
+def browser_ws_url(driver) -> str:
+    caps = driver.capabilities or {}
+    address = (caps.get("goog:chromeOptions") or {}).get("debuggerAddress")
+    if not address:
+        raise NetworkTapError("driver exposes no goog:chromeOptions.debuggerAddress")
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=5) as resp:
+            return json.loads(resp.read())["webSocketDebuggerUrl"]
+    except (OSError, ValueError, KeyError) as e:
+        raise NetworkTapError(f"DevTools endpoint at {address} unavailable: {e}") from e
+
+
+class _Waiter:
+    """A pending wait for the first request/response whose URL has url_marker (and entity_id)."""
+    __slots__ = ("url_marker", "entity_id", "future")
+
+    def __init__(self, url_marker: str, entity_id: Optional[str]):
+        self.url_marker = url_marker
+        self.entity_id = None if entity_id is None else str(entity_id)
+        self.future: Future = Future()
+
+    def matches(self, url: str) -> bool:
+        return self.url_marker in url and (self.entity_id is None or self.entity_id in url)
+
+
+class NetworkTap:
+    def __init__(self, driver, url_patterns: tuple[str, ...] | list[str]):
+        self.url_patterns = tuple(url_patterns)
+        try:
+            self._ws = websocket.create_connection(
+                browser_ws_url(driver), timeout=10, suppress_origin=True, enable_multithread=True,
+            )
+        except (OSError, websocket.WebSocketException) as e:
+            raise NetworkTapError(f"could not connect to DevTools: {e}") from e
+        self._ws.settimeout(None)
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pending: dict[int, Future] = {}
+        self._waiters: list[_Waiter] = []
+        self._body_waiters: list[_Waiter] = []
+        self._recent: deque = deque(maxlen=RECENT_MATCHES)
+        # requestId -> [url, sessionId, status] for matching requests still loading
+        self._inflight: dict[str, list] = {}
+        # (url, requestId, sessionId, status) of matching requests that finished loading
+        self._finished: deque = deque(maxlen=RECENT_MATCHES)
+        self._attached: set[str] = set()
+        self._closed = False
+        self._reader = threading.Thread(target=self._read_loop, name="network-tap", daemon=True)
+        self._reader.start()
+
+        try:
+            self.command("Target.setAutoAttach", {
+                "autoAttach": True,
+                "waitForDebuggerOnStart": False,
+                "flatten": True,
+                "filter": [{"type": "page"}, {"exclude": True}],
+            }).result(timeout=10)
+            # pages that were open before auto-attach was switched on
+            targets = self.command("Target.getTargets").result(timeout=10).get("targetInfos", [])
+            for t in targets:
+                if t.get("type") == "page" and t.get("targetId") not in self._attached:
+                    self.command("Target.attachToTarget", {"targetId": t["targetId"], "flatten": True})
+        except (FutureTimeout, NetworkTapError) as e:
+            self.close()
+            raise NetworkTapError(f"could not attach to browser pages: {e}") from e
+
+    # ---- DevTools plumbing ----
+
+    def command(self, method: str, params: dict | None = None, session_id: str | None = None) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._closed:
+                fut.set_exception(NetworkTapError("tap is closed"))
+                return fut
+            self._next_id += 1
+            msg_id = self._next_id
+            self._pending[msg_id] = fut
+        msg = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+        try:
+            self._ws.send(json.dumps(msg))
+        except (OSError, websocket.WebSocketException) as e:
+            with self._lock:
+                self._pending.pop(msg_id, None)
+            fut.set_exception(NetworkTapError(str(e)))
+        return fut
+
+    def _wanted(self, raw: str) -> bool:
+        """Cheap pre-JSON filter over the raw frame."""
+        if raw.startswith('{"id"'):
+            return True
+        if '"Target.attachedToTarget"' in raw:
+            return True
+        if '"Network.requestWillBeSent"' in raw or '"Network.responseReceived"' in raw:
+            return any(p in raw for p in self.url_patterns)
+        if '"Network.loadingFinished"' in raw or '"Network.loadingFailed"' in raw:
+            return any(f'"{rid}"' in raw for rid in list(self._inflight))
+        return False
+
+    def _read_loop(self) -> None:
+        while True:
+            try:
+                raw = self._ws.recv()
+            except Exception:
+                break
+            if not raw or not self._wanted(raw):
+                continue
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue
+            if "id" in msg:
+                with self._lock:
+                    fut = self._pending.pop(msg["id"], None)
+                if fut is not None and not fut.done():
+                    if "error" in msg:
+                        fut.set_exception(NetworkTapError(str(msg["error"])))
+                    else:
+                        fut.set_result(msg.get("result") or {})
+                continue
+            self._on_event(msg.get("method"), msg.get("params") or {}, msg.get("sessionId"))
+        self._shutdown()
+
+    def _on_event(self, method: str, params: dict, session_id: str | None) -> None:
+        if method == "Target.attachedToTarget":
+            self._attached.add((params.get("targetInfo") or {}).get("targetId"))
+            # large buffers so JSON API bodies are still there when we ask for them
+            self.command("Network.enable", {
+                "maxResourceBufferSize": 20 * 1024 * 1024,
+                "maxTotalBufferSize": 60 * 1024 * 1024,
+            }, session_id=params.get("sessionId"))
+        elif method == "Network.requestWillBeSent":
+            req = params.get("request") or {}
+            self._on_request(req.get("url", ""), req.get("headers") or {}, params.get("requestId"), session_id)
+        elif method == "Network.responseReceived":
+            entry = self._inflight.get(params.get("requestId"))
+            if entry is not None:
+                entry[2] = (params.get("response") or {}).get("status")
+        elif method == "Network.loadingFinished":
+            self._on_finished(params.get("requestId"), failed=False)
+        elif method == "Network.loadingFailed":
+            self._on_finished(params.get("requestId"), failed=True)
+
+    def _on_request(self, url: str, headers: dict, request_id: str | None, session_id: str | None) -> None:
+        if not any(p in url for p in self.url_patterns):
+            return
+        with self._lock:
+            self._recent.append((url, headers))
+            if request_id:
+                self._inflight[request_id] = [url, session_id, None]
+                while len(self._inflight) > RECENT_MATCHES:
+                    self._inflight.pop(next(iter(self._inflight)))
+            hits = [w for w in self._waiters if w.matches(url)]
+            for w in hits:
+                self._waiters.remove(w)
+        for w in hits:
+            if not w.future.done():
+                w.future.set_result(headers)
+
+    def _on_finished(self, request_id: str | None, failed: bool) -> None:
+        with self._lock:
+            entry = self._inflight.pop(request_id, None)
+            if entry is None or failed:
+                return
+            url, session_id, status = entry
+            done = (url, request_id, session_id, status)
+            self._finished.append(done)
+            hits = [w for w in self._body_waiters if w.matches(url)]
+            for w in hits:
+                self._body_waiters.remove(w)
+        for w in hits:
+            if not w.future.done():
+                w.future.set_result(done)
+
+    def _shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            pending, self._pending = list(self._pending.values()), {}
+            waiters, self._waiters = self._waiters + self._body_waiters, []
+            self._body_waiters = []
+        for fut in pending:
+            if not fut.done():
+                fut.set_exception(NetworkTapError("tap closed"))
+        for w in waiters:
+            if not w.future.done():
+                w.future.set_result(None)
+
+    # ---- public API ----
+
+    def expect_request(self, url_marker: str, entity_id=None) -> Future:
+        """Future resolving to the request headers of the first matching request (None if the tap closes)."""
+        waiter = _Waiter(url_marker, entity_id)
+        with self._lock:
+            for url, headers in reversed(self._recent):
+                if waiter.matches(url):
+                    waiter.future.set_result(headers)
+                    return waiter.future
+            if self._closed:
+                waiter.future.set_result(None)
+                return waiter.future
+            self._waiters.append(waiter)
+        return waiter.future
+
+    def wait_for_request_headers(self, url_marker: str, entity_id=None, timeout: float = 20) -> Optional[dict]:
+        fut = self.expect_request(url_marker, entity_id)
+        try:
+            return fut.result(timeout=timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._waiters = [w for w in self._waiters if w.future is not fut]
+            return None
+
+    def expect_response(self, url_marker: str, entity_id=None) -> Future:
+        """Future resolving to (url, requestId, sessionId, status) once a matching response has fully loaded."""
+        waiter = _Waiter(url_marker, entity_id)
+        with self._lock:
+            for done in reversed(self._finished):
+                if waiter.matches(done[0]):
+                    waiter.future.set_result(done)
+                    return waiter.future
+            if self._closed:
+                waiter.future.set_result(None)
+                return waiter.future
+            self._body_waiters.append(waiter)
+        return waiter.future
+
+    def wait_for_response_body(self, url_marker: str, entity_id=None, timeout: float = 20) -> Optional[str]:
+        """
+        Body of the page's own (2xx) response for a matching URL, read with
+        Network.getResponseBody. None if it wasn't seen in time or Chrome no
+        longer has it.
+        """
+        deadline = time.monotonic() + timeout
+        fut = self.expect_response(url_marker, entity_id)
+        try:
+            done = fut.result(timeout=timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._body_waiters = [w for w in self._body_waiters if w.future is not fut]
+            return None
+        if not done:
+            return None
+        _, request_id, session_id, status = done
+        if status is not None and not 200 <= int(status) < 300:
+            return None
+        try:
+            res = self.command("Network.getResponseBody", {"requestId": request_id}, session_id=session_id).result(
+                timeout=max(1.0, deadline - time.monotonic())
+            )
+        except (FutureTimeout, NetworkTapError):
+            return None
+        body = res.get("body")
+        if body is None:
+            return None
+        if res.get("base64Encoded"):
+            body = base64.b64decode(body).decode("utf-8", errors="replace")
+        return body
+
+    def close(self) -> None:
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+        self._reader.join(timeout=2)
+        self._shutdown()
+
+    def __enter__(self) -> "NetworkTap":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@contextmanager
+def network_tap(driver, url_patterns) -> Iterator[Optional[NetworkTap]]:
+    """NetworkTap for driver, or None if DevTools isn't reachable (e.g. a remote driver)."""
+    try:
+        tap = NetworkTap(driver, url_patterns)
+    except NetworkTapError as e:
+        print(f"[network-tap] disabled: {e}")
+        yield None
+        return
+    try:
+        yield tap
+    finally:
+        tap.close()
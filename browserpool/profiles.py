@@ -0,0 +1,260 @@
+"""
+profiles.py
+
+Persistent Chrome user-data directories, a few per site, so browsers start
+with a warm HTTP cache, compiled JS and the cookies/consent choices of
+earlier runs instead of an empty profile.
+
+Each profile directory ("slot") is guarded by an fcntl lock file next to it,
+so two drivers - in this process or another worker - never run on the same
+directory (Chrome corrupts profiles that are shared). When every slot is
+taken the caller gets None and launches with a throwaway profile instead of
+waiting.
+
+Profiles are compacted while locked and Chrome is not running on them - when
+a browser starts on a slot, after it exits, and from compact_idle(), which the
+API calls periodically for slots no browser holds: caches that are cheap to
+rebuild (GPU/shader/code caches, crash dumps) are dropped every
+compact_interval, the HTTP cache too if the directory is still over max_mb, and
+a profile older than max_age is wiped completely. A browser that stays up
+longer than that keeps its caches until it is recycled.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import shutil
+import threading
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; profiles are then disabled
+    fcntl = None
+
+MARKER = ".contentwork-profile.json"
+# relative to the user-data-dir; dropped on every compaction
+DISPOSABLE = (
+    "Crashpad",
+    "BrowserMetrics",
+    "ShaderCache",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "Default/GPUCache",
+    "Default/Code Cache",
+    "Default/DawnCache",
+    "Default/blob_storage",
+    "Default/Service Worker/CacheStorage",
+    "Default/Service Worker/ScriptCache",
+)
+# dropped only while the profile is still over max_mb
+HTTP_CACHE = ("Default/Cache",)
+# left behind by a Chrome that crashed; harmless to remove once we hold the lock
+SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+
+def dir_size_mb(path: str) -> float:
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total / (1024.0 * 1024.0)
+
+
+class ProfileLease:
+    """An exclusively locked profile directory; release() unlocks it."""
+
+    def __init__(self, store: "ProfileStore", slot: int, path: str, fh):
+        self.store = store
+        self.slot = slot
+        self.path = path
+        self._fh = fh
+
+    def release(self) -> None:
+        """Unlock; call once Chrome has exited. The slot is compacted first if that is due."""
+        if self._fh is None:
+            return
+        try:
+            self.store.compact(self.path)
+        except OSError as e:
+            print(f"[profiles:{self.store.site}] compaction of slot {self.slot} failed: {e}")
+        try:
+            fcntl.flock(self._fh, fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+            self.store._released(self)
+
+
+class ProfileStore:
+    def __init__(
+        self,
+        root: str,
+        site: str,
+        slots: int = 2,
+        max_mb: float = 512.0,
+        compact_interval: float = 6 * 3600.0,
+        max_age: float = 7 * 86400.0,
+    ):
+        self.site = site
+        self.dir = os.path.join(root, site)
+        self.slots = max(1, int(slots))
+        self.max_mb = float(max_mb)
+        self.compact_interval = float(compact_interval)
+        self.max_age = float(max_age)
+        self._lock = threading.Lock()
+        self._held: set[int] = set()
+        self._stats = {"acquired": 0, "contended": 0, "compactions": 0, "resets": 0, "freed_mb": 0.0}
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, slot: int) -> str:
+        return os.path.join(self.dir, f"slot-{slot}")
+
+    # ---- locking ----
+
+    def _try_lock(self, slot: int) -> Optional[ProfileLease]:
+        with self._lock:
+            if slot in self._held:
+                return None
+            self._held.add(slot)
+        fh = open(self._path(slot) + ".lock", "a+")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            # another process has it
+            fh.close()
+            with self._lock:
+                self._held.discard(slot)
+            return None
+        return ProfileLease(self, slot, self._path(slot), fh)
+
+    def acquire(self) -> Optional[ProfileLease]:
+        """Lock the first free slot (compacting it if due), or None if all are in use."""
+        if fcntl is None:
+            return None
+        for slot in range(self.slots):
+            lease = self._try_lock(slot)
+            if lease is None:
+                continue
+            try:
+                self.compact(lease.path)
+            except OSError as e:
+                print(f"[profiles:{self.site}] compaction of slot {slot} failed: {e}")
+            with self._lock:
+                self._stats["acquired"] += 1
+            return lease
+        with self._lock:
+            self._stats["contended"] += 1
+        return None
+
+    def _released(self, lease: ProfileLease) -> None:
+        with self._lock:
+            self._held.discard(lease.slot)
+
+    def compact_idle(self) -> int:
+        """Compact (if due) every slot no browser holds, in any process. Returns how many were checked."""
+        if fcntl is None:
+            return 0
+        checked = 0
+        for slot in range(self.slots):
+            if not os.path.isdir(self._path(slot)):
+                continue
+            lease = self._try_lock(slot)
+            if lease is not None:
+                # release() compacts
+                lease.release()
+                checked += 1
+        return checked
+
+    # ---- maintenance (caller holds the slot lock) ----
+
+    def _read_marker(self, path: str) -> dict:
+        try:
+            with open(os.path.join(path, MARKER), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_marker(self, path: str, marker: dict) -> None:
+        with open(os.path.join(path, MARKER), "w", encoding="utf-8") as fh:
+            json.dump(marker, fh)
+
+    def _remove(self, path: str) -> float:
+        if not os.path.exists(path):
+            return 0.0
+        size = dir_size_mb(path) if os.path.isdir(path) else os.path.getsize(path) / (1024.0 * 1024.0)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+        return size
+
+    def compact(self, path: str, force: bool = False) -> None:
+        now = time.time()
+        os.makedirs(path, exist_ok=True)
+        for name in SINGLETON_FILES:
+            try:
+                os.remove(os.path.join(path, name))
+            except OSError:
+                pass
+
+        marker = self._read_marker(path)
+        if not marker or now - marker.get("created_at", now) > self.max_age:
+            if marker:
+                freed = self._remove(path)
+                os.makedirs(path, exist_ok=True)
+                with self._lock:
+                    self._stats["resets"] += 1
+                    self._stats["freed_mb"] += freed
+                print(f"[profiles:{self.site}] reset {os.path.basename(path)} ({freed:.0f} MB)")
+            self._write_marker(path, {"created_at": now, "compacted_at": now})
+            return
+
+        if not force and now - marker.get("compacted_at", 0.0) < self.compact_interval:
+            return
+        freed = sum(self._remove(os.path.join(path, rel)) for rel in DISPOSABLE)
+        if self.max_mb > 0 and dir_size_mb(path) > self.max_mb:
+            freed += sum(self._remove(os.path.join(path, rel)) for rel in HTTP_CACHE)
+        marker["compacted_at"] = now
+        self._write_marker(path, marker)
+        with self._lock:
+            self._stats["compactions"] += 1
+            self._stats["freed_mb"] += freed
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            held = len(self._held)
+        s["freed_mb"] = round(s["freed_mb"], 1)
+        return {"dir": self.dir, "slots": self.slots, "in_use": held, **s}
+
+
+# ---------- registry ----------
+
+_STORES: Dict[str, ProfileStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def register_profile_store(name: str, store: ProfileStore) -> ProfileStore:
+    with _STORES_LOCK:
+        _STORES[name] = store
+    return store
+
+
+def get_profile_store(name: str) -> Optional[ProfileStore]:
+    return _STORES.get(name)
+
+
+def compact_idle_profiles() -> int:
+    """ProfileStore.compact_idle() on every registered store."""
+    with _STORES_LOCK:
+        stores = list(_STORES.values())
+    return sum(store.compact_idle() for store in stores)
+
+
+def default_profile_root() -> str:
+    data_dir = os.getenv("CONTENTWORK_DATA_DIR", os.path.expanduser("~/.cache/contentwork"))
+    return os.getenv("BROWSER_PROFILE_DIR", os.path.join(data_dir, "chrome_profiles"))
@@ -0,0 +1,357 @@
+"""
+workers.py
+
+Runs the Selenium scrapers in supervised worker processes instead of the API
+process's threadpool, so a hung driver.quit() or a leaking Chrome can be
+killed without restarting the service.
+
+- each worker is a spawned Python process running one job at a time, with
+  its own size-1 DriverPool per browser profile (warm across jobs), on a
+  persistent Chrome profile when the spec carries ProfileStore settings (the
+  slots are file-locked, so the workers share one store directory)
+- a job that exceeds its wall-clock timeout gets the worker's whole process
+  tree (python, chromedriver, chrome) SIGKILLed and the worker respawned
+- a worker is recycled once its process tree's RSS passes max_rss_mb or after
+  max_jobs jobs
+- every worker exports CONTENTWORK_BROWSER_WORKER=<supervisor pid>:<serial>,
+  which chromedriver and Chrome inherit; a reaper thread kills processes that
+  carry a marker of a worker that no longer exists (or of a supervisor that
+  died), so orphans don't pile up over days of uptime
+
+Jobs are named "module:function" and called with picklable args; the result
+must be picklable too (the scrapers return dicts / JSON strings).
+"""
+from __future__ import annotations
+import os
+import time
+import queue
+import signal
+import importlib
+import threading
+import multiprocessing as mp
+from typing import Any, Optional
+
+from browserpool.driver_pool import PoolTimeout, process_tree, rss_mb
+
+MARKER_ENV = "CONTENTWORK_BROWSER_WORKER"
+REAP_INTERVAL = 30.0
+
+
+class WorkerJobError(RuntimeError):
+    """The job raised inside the worker; the message carries the original type and text."""
+
+
+class WorkerTimeout(RuntimeError):
+    """The job ran past its timeout; the worker was killed and is being respawned."""
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process died during the job."""
+
+
+# ---------- inside the worker process ----------
+
+def _resolve(target: str):
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _worker_main(conn, marker: str, pool_specs: list) -> None:
+    os.environ[MARKER_ENV] = marker
+    # the supervisor decides when we stop; don't die on the terminal's Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from browserpool.driver_pool import DriverPool, close_all_pools, register_pool
+    from browserpool.profiles import ProfileStore, register_profile_store
+    for name, chromedriver_path, options_factory, setup, profile_settings in pool_specs:
+        store = None
+        if profile_settings is not None:
+            store = register_profile_store(name, ProfileStore(**profile_settings))
+        register_pool(DriverPool(
+            name, chromedriver_path, options_factory, size=1, max_rss_mb=0, setup=setup,
+            keep_cookies=store is not None, profiles=store,
+        ))
+
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            target, args, kwargs = job
+            try:
+                conn.send(("ok", _resolve(target)(*args, **kwargs)))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        close_all_pools()
+
+
+# ---------- supervisor side ----------
+
+def _kill_tree(pid: int) -> int:
+    # collect first: once the parent dies its children are reparented and lost
+    pids = process_tree(pid)
+    for p in reversed(pids):
+        try:
+            os.kill(p, signal.SIGKILL)
+        except OSError:
+            pass
+    return len(pids)
+
+
+def _marker_of(pid: int) -> Optional[str]:
+    try:
+        with open(f"/proc/{pid}/environ", "rb") as fh:
+            env = fh.read()
+    except OSError:
+        return None
+    key = MARKER_ENV.encode() + b"="
+    for item in env.split(b"\0"):
+        if item.startswith(key):
+            return item[len(key):].decode(errors="replace")
+    return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+class _Worker:
+    __slots__ = ("serial", "process", "conn", "jobs", "started_at")
+
+    def __init__(self, serial: int, process, conn):
+        self.serial = serial
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+        self.started_at = time.time()
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    def rss_mb(self) -> float:
+        return sum(rss_mb(p) for p in process_tree(self.pid))
+
+
+class BrowserWorkerPool:
+    def __init__(
+        self,
+        size: int = 2,
+        pool_specs: list | None = None,
+        job_timeout: float = 180.0,
+        max_rss_mb: float = 2000.0,
+        max_jobs: int = 200,
+        lease_timeout: float = 120.0,
+    ):
+        self.size = max(1, int(size))
+        self.pool_specs = list(pool_specs or [])
+        self.job_timeout = float(job_timeout)
+        self.max_rss_mb = float(max_rss_mb)
+        self.max_jobs = max(1, int(max_jobs))
+        self.lease_timeout = float(lease_timeout)
+        self._ctx = mp.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._live: dict[int, _Worker] = {}
+        # serials whose process is starting; already marked, not yet in _live
+        self._starting: set[int] = set()
+        self._lock = threading.Lock()
+        self._serial = 0
+        self._closed = False
+        self._stop = threading.Event()
+        self._reaper: threading.Thread | None = None
+        self._stats = {"jobs": 0, "errors": 0, "timeouts": 0, "crashes": 0, "recycled": 0,
+                       "spawned": 0, "spawn_failures": 0, "reaped": 0}
+
+    # ---- lifecycle ----
+
+    def _spawn(self) -> Optional[_Worker]:
+        with self._lock:
+            if self._closed:
+                return None
+            self._serial += 1
+            serial = self._serial
+            self._starting.add(serial)
+        parent, child = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child, f"{os.getpid()}:{serial}", self.pool_specs),
+            name=f"browser-worker-{serial}",
+            daemon=True,
+        )
+        try:
+            process.start()
+        except OSError as e:
+            with self._lock:
+                self._starting.discard(serial)
+                self._stats["spawn_failures"] += 1
+            print(f"[workers] spawn failed: {e}")
+            return None
+        child.close()
+        worker = _Worker(serial, process, parent)
+        with self._lock:
+            self._starting.discard(serial)
+            self._live[serial] = worker
+            self._stats["spawned"] += 1
+        self._idle.put(worker)
+        return worker
+
+    def _respawn_later(self) -> None:
+        def _run():
+            for delay in (0, 1, 5, 15, 30):
+                if self._stop.wait(delay):
+                    return
+                if self._spawn() is not None:
+                    return
+        threading.Thread(target=_run, name="browser-worker-respawn", daemon=True).start()
+
+    def _retire(self, worker: _Worker, kill: bool) -> None:
+        with self._lock:
+            self._live.pop(worker.serial, None)
+        if not kill:
+            try:
+                worker.conn.send(None)
+                worker.process.join(timeout=15)
+            except (OSError, ValueError):
+                pass
+        if worker.process.is_alive() or kill:
+            _kill_tree(worker.pid)
+            worker.process.join(timeout=5)
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+
+    def start(self) -> None:
+        for _ in range(self.size):
+            self._spawn()
+        self._reaper = threading.Thread(target=self._reap_loop, name="browser-worker-reaper", daemon=True)
+        self._reaper.start()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers = list(self._live.values())
+        self._stop.set()
+        for w in workers:
+            self._retire(w, kill=False)
+        self.reap_orphans()
+
+    # ---- jobs ----
+
+    def run(self, target: str, *args, timeout: float | None = None, **kwargs) -> Any:
+        """Run target ("module:function") in a worker and return its result."""
+        if self._closed:
+            raise RuntimeError("browser worker pool is closed")
+        timeout = self.job_timeout if timeout is None else float(timeout)
+        try:
+            worker = self._idle.get(timeout=self.lease_timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"no browser worker free after {self.lease_timeout:.0f}s")
+
+        if not worker.process.is_alive():
+            self._on_dead(worker, "crashes")
+            return self.run(target, *args, timeout=timeout, **kwargs)
+
+        try:
+            worker.conn.send((target, args, kwargs))
+            ready = worker.conn.poll(timeout)
+            reply = worker.conn.recv() if ready else None
+        except (EOFError, OSError):
+            self._on_dead(worker, "crashes")
+            raise WorkerCrashed(f"browser worker {worker.serial} died running {target}")
+        if reply is None:
+            self._on_dead(worker, "timeouts")
+            raise WorkerTimeout(f"{target} took longer than {timeout:.0f}s; worker {worker.serial} killed")
+
+        worker.jobs += 1
+        with self._lock:
+            self._stats["jobs"] += 1
+        if worker.jobs >= self.max_jobs or (self.max_rss_mb > 0 and worker.rss_mb() > self.max_rss_mb):
+            with self._lock:
+                self._stats["recycled"] += 1
+            threading.Thread(target=self._recycle, args=(worker,), daemon=True).start()
+        else:
+            self._idle.put(worker)
+
+        status, value = reply
+        if status == "error":
+            with self._lock:
+                self._stats["errors"] += 1
+            raise WorkerJobError(value)
+        return value
+
+    def _on_dead(self, worker: _Worker, reason: str) -> None:
+        with self._lock:
+            self._stats[reason] += 1
+        self._retire(worker, kill=True)
+        self._respawn_later()
+
+    def _recycle(self, worker: _Worker) -> None:
+        self._retire(worker, kill=False)
+        self._spawn()
+
+    # ---- orphans ----
+
+    def reap_orphans(self) -> int:
+        """SIGKILL processes marked by a worker that is gone (ours or a dead supervisor's)."""
+        me = os.getpid()
+        with self._lock:
+            live = set(self._live) | self._starting
+        killed = 0
+        for entry in os.listdir("/proc") if os.path.isdir("/proc") else []:
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            marker = _marker_of(pid)
+            if not marker:
+                continue
+            owner, _, serial = marker.partition(":")
+            try:
+                owner_pid, serial_no = int(owner), int(serial)
+            except ValueError:
+                continue
+            if owner_pid == me:
+                orphan = serial_no not in live
+            else:
+                orphan = not _pid_alive(owner_pid)
+            if orphan:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                    killed += 1
+                except OSError:
+                    pass
+        if killed:
+            with self._lock:
+                self._stats["reaped"] += killed
+            print(f"[workers] reaped {killed} orphaned browser process(es)")
+        return killed
+
+    def _reap_loop(self) -> None:
+        while not self._stop.wait(REAP_INTERVAL):
+            try:
+                self.reap_orphans()
+            except Exception as e:
+                print(f"[workers] reaper failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            workers = list(self._live.values())
+        s["size"] = self.size
+        s["idle"] = self._idle.qsize()
+        s["workers"] = [
+            {"serial": w.serial, "pid": w.pid, "jobs": w.jobs, "rss_mb": round(w.rss_mb(), 1),
+             "uptime_s": round(time.time() - w.started_at, 1)}
+            for w in workers
+        ]
+        return s
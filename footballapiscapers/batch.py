@@ -0,0 +1,97 @@
+"""
+Batch execution for the football endpoints.
+
+A batch is resolved in two phases: every distinct query is first turned into
+a FotMob id without a browser (index, then search API), then each distinct id
+is fetched once. Queries that could not be resolved fall back to the full
+scraper (browser search). The phases run one after the other, resolve then
+fetch; within each phase the items run concurrently under one limit (the
+fetches and the fallback scrapes share it), so a phase takes roughly as long
+as its slowest item rather than the sum.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from typing import Any, Callable, NamedTuple
+
+from footballapiscapers.id_index import get_id_index, normalize_query
+
+
+class BatchSpec(NamedTuple):
+    kind: str
+    resolve: Callable[[str], Any]           # query -> id | None (no browser)
+    fetch: Callable[[str, str], Any]        # (id, chromedriver_path) -> payload
+    scrape: Callable[..., Any]              # full scraper, used when resolve misses
+    labels: Callable[[Any], list]           # payload -> names for the id index
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000.0, 1)
+
+
+async def run_batch(spec: BatchSpec, queries: list[str], chromedriver_path: str, concurrency: int = 4) -> dict:
+    t_batch = time.perf_counter()
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    # 1) distinct queries (normalized), in first-seen order
+    unique: dict[str, str] = {}
+    for q in queries:
+        unique.setdefault(normalize_query(spec.kind, q), q)
+
+    async def resolve(q: str):
+        async with sem:
+            try:
+                return await asyncio.to_thread(spec.resolve, q)
+            except Exception:
+                return None
+
+    ids = dict(zip(unique, await asyncio.gather(*(resolve(q) for q in unique.values()))))
+
+    # 2) one fetch per distinct id, one full scrape per unresolved query
+    async def fetch(entity_id: str) -> dict:
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                data = await asyncio.to_thread(spec.fetch, entity_id, chromedriver_path)
+                return {"ok": True, "id": entity_id, "data": data, "latency_ms": _ms(t0)}
+            except Exception as e:
+                return {"ok": False, "id": entity_id, "error": str(e), "latency_ms": _ms(t0)}
+
+    async def scrape(q: str) -> dict:
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                data = await asyncio.to_thread(spec.scrape, q, chromedriver_path)
+                return {"ok": True, "id": None, "data": data, "latency_ms": _ms(t0), "via": "browser"}
+            except Exception as e:
+                return {"ok": False, "id": None, "error": str(e), "latency_ms": _ms(t0), "via": "browser"}
+
+    distinct_ids = list(dict.fromkeys(i for i in ids.values() if i))
+    unresolved = [k for k, i in ids.items() if not i]
+    fetched, scraped = await asyncio.gather(
+        asyncio.gather(*(fetch(i) for i in distinct_ids)),
+        asyncio.gather(*(scrape(unique[k]) for k in unresolved)),
+    )
+    by_id = dict(zip(distinct_ids, fetched))
+    by_key = dict(zip(unresolved, scraped))
+
+    index = get_id_index()
+    for key, entity_id in ids.items():
+        res = by_id.get(entity_id)
+        if entity_id and res and res["ok"]:
+            index.record(spec.kind, unique[key], entity_id, labels=spec.labels(res["data"]))
+
+    # 3) back to input order; repeated queries / ids share one result
+    results = []
+    for q in queries:
+        key = normalize_query(spec.kind, q)
+        entity_id = ids.get(key)
+        res = by_id[entity_id] if entity_id else by_key[key]
+        results.append({"query": q, **res})
+
+    return {
+        "results": results,
+        "count": len(results),
+        "unique": len(distinct_ids) + len(unresolved),
+        "elapsed_ms": _ms(t_batch),
+    }
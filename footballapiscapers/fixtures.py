@@ -0,0 +1,259 @@
+"""
+Matchday fixtures index.
+
+A background thread pulls FotMob's per-date fixtures listing
+(/api/matches?date=YYYYMMDD) for a rolling window around today and keeps an
+in-memory map of team names/aliases -> fixtures. "chelsea vs benfica" then
+resolves with a couple of dict lookups instead of an API or browser search.
+
+Refreshes are incremental: only days whose data may have changed are fetched
+again (today often, upcoming days hourly, past days rarely) and days that
+leave the window are dropped.
+"""
+from __future__ import annotations
+import os
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from footballapiscapers.fotmob_session import FOTMOB_BASE, FotmobAuthError, get_fotmob_session
+from footballapiscapers.id_index import match_sides, normalize_text, side_matches
+
+FIXTURES_URL = f"{FOTMOB_BASE}/api/matches?date={{day}}"
+DAYS_BACK = int(os.getenv("FOTMOB_FIXTURES_DAYS_BACK", "1"))
+DAYS_AHEAD = int(os.getenv("FOTMOB_FIXTURES_DAYS_AHEAD", "3"))
+REFRESH_INTERVAL = float(os.getenv("FOTMOB_FIXTURES_INTERVAL", "60"))
+# how long a fetched day stays fresh, by position relative to today
+TODAY_TTL = float(os.getenv("FOTMOB_FIXTURES_TODAY_TTL", "300"))
+FUTURE_TTL = 3600.0
+PAST_TTL = 6 * 3600.0
+
+# affixes dropped to get the name people actually type ("AFC Bournemouth" -> "bournemouth")
+_CLUB_AFFIXES = {"fc", "cf", "afc", "sc", "ac", "cd", "sv", "fk", "sk", "bk", "if"}
+# common nicknames FotMob doesn't use as a name
+TEAM_ALIASES = {
+    "manchester united": ("man utd", "man united"),
+    "manchester city": ("man city",),
+    "tottenham hotspur": ("spurs", "tottenham"),
+    "wolverhampton wanderers": ("wolves",),
+    "paris saint-germain": ("psg",),
+    "barcelona": ("barca",),
+    "internazionale": ("inter", "inter milan"),
+    "bayern munchen": ("bayern", "bayern munich"),
+}
+
+
+def team_aliases(*names: str | None) -> set[str]:
+    """Normalized lookup keys for a team from its FotMob name variants."""
+    out = set()
+    for name in names:
+        n = normalize_text(name or "")
+        if not n:
+            continue
+        out.add(n)
+        tokens = [t for t in n.split() if t not in _CLUB_AFFIXES]
+        if tokens and len(tokens) != len(n.split()):
+            out.add(" ".join(tokens))
+    for key in list(out):
+        out.update(TEAM_ALIASES.get(key, ()))
+    return out
+
+
+def _status(status: dict) -> str:
+    if status.get("cancelled"):
+        return "cancelled"
+    if status.get("finished"):
+        return "finished"
+    if status.get("started") or status.get("ongoing"):
+        return "live"
+    return "upcoming"
+
+
+def _kickoff(m: dict) -> float | None:
+    ts = m.get("timeTS")
+    if isinstance(ts, (int, float)):
+        return ts / 1000.0
+    utc = (m.get("status") or {}).get("utcTime")
+    if utc:
+        try:
+            return datetime.fromisoformat(str(utc).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def parse_fixtures(payload, day: str) -> list[dict]:
+    fixtures = []
+    for league in (payload or {}).get("leagues") or []:
+        for m in league.get("matches") or []:
+            home, away = m.get("home") or {}, m.get("away") or {}
+            if m.get("id") is None or not home.get("name") or not away.get("name"):
+                continue
+            fixtures.append({
+                "id": str(m["id"]),
+                "home": home["name"],
+                "away": away["name"],
+                "home_aliases": team_aliases(home.get("name"), home.get("longName"), home.get("shortName")),
+                "away_aliases": team_aliases(away.get("name"), away.get("longName"), away.get("shortName")),
+                "kickoff": _kickoff(m),
+                "status": _status(m.get("status") or {}),
+                "league": league.get("name"),
+                "day": day,
+            })
+    return fixtures
+
+
+def _public(f: dict) -> dict:
+    return {k: v for k, v in f.items() if not k.endswith("_aliases")}
+
+
+class FixturesIndex:
+    def __init__(self, days_back: int = DAYS_BACK, days_ahead: int = DAYS_AHEAD):
+        self.days_back = max(0, int(days_back))
+        self.days_ahead = max(0, int(days_ahead))
+        self._lock = threading.Lock()
+        self._days: dict[str, list[dict]] = {}
+        self._fetched_at: dict[str, float] = {}
+        self._fixtures: dict[str, dict] = {}
+        self._by_alias: dict[str, set[str]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats = {"hits": 0, "fuzzy_hits": 0, "misses": 0, "fetches": 0, "errors": 0, "last_refresh": None}
+
+    # ---- refresh ----
+
+    def window(self, now: float | None = None) -> list[str]:
+        today = datetime.fromtimestamp(now or time.time(), tz=timezone.utc).date()
+        return [(today + timedelta(days=d)).strftime("%Y%m%d") for d in range(-self.days_back, self.days_ahead + 1)]
+
+    def _ttl(self, day: str, today: str) -> float:
+        if day == today:
+            return TODAY_TTL
+        return FUTURE_TTL if day > today else PAST_TTL
+
+    def _fetch_day(self, day: str) -> list[dict] | None:
+        try:
+            payload = get_fotmob_session().get_json(FIXTURES_URL.format(day=day), timeout=15)
+        except (FotmobAuthError, requests.RequestException, ValueError) as e:
+            with self._lock:
+                self._stats["errors"] += 1
+            print(f"[fixtures] {day}: {e}")
+            return None
+        with self._lock:
+            self._stats["fetches"] += 1
+        return parse_fixtures(payload, day)
+
+    def _rebuild(self) -> None:
+        # caller holds self._lock
+        self._fixtures = {f["id"]: f for fixtures in self._days.values() for f in fixtures}
+        by_alias: dict[str, set[str]] = {}
+        for f in self._fixtures.values():
+            for alias in f["home_aliases"] | f["away_aliases"]:
+                by_alias.setdefault(alias, set()).add(f["id"])
+        self._by_alias = by_alias
+
+    def refresh_once(self, now: float | None = None) -> int:
+        """Fetch the days in the window that are missing or stale. Returns how many were fetched."""
+        now = now or time.time()
+        days = self.window(now)
+        today = days[self.days_back]
+        with self._lock:
+            dropped = [d for d in self._days if d not in days]
+            for d in dropped:
+                self._days.pop(d, None)
+                self._fetched_at.pop(d, None)
+            stale = [d for d in days if now - self._fetched_at.get(d, 0.0) > self._ttl(d, today)]
+        fetched = {}
+        for day in stale:
+            fixtures = self._fetch_day(day)
+            if fixtures is not None:
+                fetched[day] = fixtures
+        if fetched or dropped:
+            with self._lock:
+                for day, fixtures in fetched.items():
+                    self._days[day] = fixtures
+                    self._fetched_at[day] = now
+                self._rebuild()
+                self._stats["last_refresh"] = now
+        return len(fetched)
+
+    def _loop(self, interval: float) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh_once()
+            except Exception as e:
+                print(f"[fixtures] refresh failed: {e}")
+            self._stop.wait(interval)
+
+    def start(self, interval: float = REFRESH_INTERVAL) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,), name="fotmob-fixtures", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # ---- lookup ----
+
+    def _team_ids(self, side: str, fuzzy: bool) -> set[str]:
+        ids = set(self._by_alias.get(side, ()))
+        if not ids and fuzzy:
+            for alias, alias_ids in self._by_alias.items():
+                if side_matches(side, alias):
+                    ids |= alias_ids
+        return ids
+
+    def lookup(self, query: str, now: float | None = None) -> dict | None:
+        """Fixture for a 'home vs away' query (either order), nearest to now if the teams meet twice."""
+        sides = match_sides(query)
+        if len(sides) != 2:
+            return None
+        now = now or time.time()
+        with self._lock:
+            if not self._fixtures:
+                return None
+            fuzzy = False
+            common = self._team_ids(sides[0], False) & self._team_ids(sides[1], False)
+            if not common:
+                fuzzy = True
+                common = self._team_ids(sides[0], True) & self._team_ids(sides[1], True)
+            candidates = [self._fixtures[i] for i in common if self._fixtures[i]["status"] != "cancelled"]
+            if not candidates:
+                self._stats["misses"] += 1
+                return None
+            self._stats["fuzzy_hits" if fuzzy else "hits"] += 1
+            best = min(candidates, key=lambda f: abs((f["kickoff"] or now) - now))
+            return _public(best)
+
+    def resolve(self, query: str) -> str | None:
+        f = self.lookup(query)
+        return f["id"] if f else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                days=sorted(self._days),
+                fixtures=len(self._fixtures),
+                aliases=len(self._by_alias),
+                running=self._thread is not None and self._thread.is_alive(),
+            )
+
+
+_index: FixturesIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_fixtures_index() -> FixturesIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FixturesIndex()
+        return _index
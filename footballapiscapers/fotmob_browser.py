@@ -0,0 +1,154 @@
+"""
+Browser setup shared by the FotMob scrapers (match / player / league).
+
+The scrapers only need the DOM (search box, result links) and the page's own
+API calls, so by default the browser skips images, media, fonts, ads and
+trackers and returns from driver.get() at DOMContentLoaded ("eager").
+Configure with FOTMOB_BLOCK (comma-separated categories, or "none") and
+FOTMOB_PAGE_LOAD ("eager", "normal" or "none").
+"""
+from __future__ import annotations
+import os
+from selenium import webdriver
+from selenium.webdriver.support.ui import WebDriverWait
+
+FOTMOB_PROFILE = "fotmob"
+# substrings of the FotMob API requests the network tap decodes; everything else is skipped unparsed
+FOTMOB_API_PATTERNS = ("/api/",)
+FALLBACK_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+# Network.setBlockedURLs patterns per category (trailing * keeps query strings matching)
+BLOCK_CATEGORIES = {
+    "images": ("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"),
+    "media": ("*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*"),
+    "fonts": ("*.woff*", "*.ttf*", "*.otf*", "*.eot*"),
+    "ads": (
+        "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*adservice.google.*",
+        "*amazon-adsystem.com*", "*adnxs.com*", "*criteo.*", "*taboola.com*", "*outbrain.com*",
+        "*pubmatic.com*", "*rubiconproject.com*", "*casalemedia.com*", "*openx.net*",
+    ),
+    "trackers": (
+        "*google-analytics.com*", "*googletagmanager.com*", "*connect.facebook.net*", "*hotjar.com*",
+        "*scorecardresearch.com*", "*quantserve.com*", "*chartbeat.com*", "*segment.io*",
+        "*clarity.ms*", "*bat.bing.com*",
+    ),
+}
+DEFAULT_BLOCK = ("images", "media", "fonts", "ads", "trackers")
+
+
+def _block_from_env() -> tuple[str, ...]:
+    raw = os.getenv("FOTMOB_BLOCK")
+    if raw is None:
+        return DEFAULT_BLOCK
+    if raw.strip().lower() in ("", "0", "none"):
+        return ()
+    wanted = tuple(c.strip().lower() for c in raw.split(",") if c.strip())
+    unknown = [c for c in wanted if c not in BLOCK_CATEGORIES]
+    if unknown:
+        print(f"[fotmob-browser] ignoring unknown FOTMOB_BLOCK categories: {', '.join(unknown)}")
+    return tuple(c for c in wanted if c in BLOCK_CATEGORIES)
+
+
+class FotmobBrowserProfile:
+    """Chrome options + per-driver CDP setup for one blocking / page-load configuration."""
+
+    def __init__(self, block: tuple[str, ...] | list[str] | None = None, page_load_strategy: str | None = None,
+                 headless: bool = True):
+        self.block = tuple(_block_from_env() if block is None else block)
+        self.page_load_strategy = page_load_strategy or os.getenv("FOTMOB_PAGE_LOAD", "eager")
+        self.headless = headless
+
+    def blocked_urls(self) -> list[str]:
+        return [p for c in self.block for p in BLOCK_CATEGORIES.get(c, ())]
+
+    def options(self) -> webdriver.ChromeOptions:
+        options = webdriver.ChromeOptions()
+        options.page_load_strategy = self.page_load_strategy
+        options.add_argument("--start-maximized")
+        if self.headless:
+            options.add_argument("--headless=new")
+        if "images" in self.block:
+            # also covers tabs the CDP block list below isn't applied to
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        if "media" in self.block:
+            options.add_argument("--autoplay-policy=user-gesture-required")
+        return options
+
+    def chrome_args(self) -> list[str]:
+        """Command-line equivalent of options() for the CDP backend (no prefs, no chromedriver)."""
+        args = []
+        if "images" in self.block:
+            args.append("--blink-settings=imagesEnabled=false")
+        if "media" in self.block:
+            args.append("--autoplay-policy=user-gesture-required")
+        return args
+
+    def setup(self, driver) -> None:
+        urls = self.blocked_urls()
+        if not urls:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": urls})
+
+    def describe(self) -> str:
+        return f"block={','.join(self.block) or 'none'} page_load={self.page_load_strategy}"
+
+
+DEFAULT_PROFILE = FotmobBrowserProfile()
+
+
+def build_fotmob_options() -> webdriver.ChromeOptions:
+    return DEFAULT_PROFILE.options()
+
+
+def setup_fotmob_driver(driver) -> None:
+    DEFAULT_PROFILE.setup(driver)
+
+
+def wait_dom_ready(driver, timeout: float = 20) -> None:
+    """Wait until the DOM is parsed; subresources (already mostly blocked) aren't waited for."""
+    WebDriverWait(driver, timeout).until(
+        lambda d: d.execute_script("return document.readyState") in ("interactive", "complete")
+    )
+
+
+def clean_headers(raw_headers: dict):
+    """Remove pseudo-headers (':method', ':authority', etc.) and ensure strings."""
+    if not raw_headers:
+        return {}
+    cleaned = {}
+    for k, v in raw_headers.items():
+        if isinstance(k, str) and k.startswith(":"):
+            continue
+        cleaned[str(k)] = str(v)
+    return cleaned
+
+
+def user_agent_of(driver) -> str:
+    try:
+        return driver.execute_script("return navigator.userAgent") or FALLBACK_USER_AGENT
+    except Exception:
+        return FALLBACK_USER_AGENT
+
+
+def harvest_browser_session(driver, url_marker: str, entity_id: str | None, referer: str | None, tap=None, timeout: float = 20):
+    """
+    Collect what a plain HTTP client needs to talk to the FotMob API as this
+    browser: the headers of the page's own API request seen by `tap` (or a
+    UA/Referer fallback) plus the browser's cookies. Returns (headers, cookies).
+    """
+    found_headers = tap.wait_for_request_headers(url_marker, entity_id, timeout=timeout) if tap else None
+    if found_headers:
+        headers = clean_headers(found_headers)
+    else:
+        headers = {
+            "Accept": "application/json, text/plain, */*",
+            "Referer": referer or "https://www.fotmob.com",
+        }
+    if not any(k.lower() == "user-agent" for k in headers):
+        headers["User-Agent"] = user_agent_of(driver)
+    try:
+        cookies = driver.get_cookies()
+    except Exception:
+        cookies = []
+    return headers, cookies
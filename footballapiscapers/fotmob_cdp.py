@@ -0,0 +1,253 @@
+"""
+asyncio/CDP backend for the FotMob scrapers (match / player / league).
+
+Same flow as the Selenium scrapers - resolve the id without a browser if
+possible, otherwise drive the FotMob search UI - but the browser part runs on
+browserpool.cdp_async, so a request waiting on a page costs a coroutine
+instead of a thread. Payloads go through the same payload cache, id index,
+fixtures index and shared FotmobSession as the Selenium path.
+
+Selected in the API with SCRAPER_BACKEND=cdp (or SCRAPER_BACKEND_FOTMOB=cdp).
+"""
+from __future__ import annotations
+import json
+import asyncio
+
+import requests
+
+from browserpool.cdp_async import AsyncPage, CDPError, lease_page
+from footballapiscapers.fotmob_browser import (
+    DEFAULT_PROFILE,
+    FALLBACK_USER_AGENT,
+    FOTMOB_API_PATTERNS,
+    FOTMOB_PROFILE,
+    clean_headers,
+)
+from footballapiscapers.fotmob_session import FotmobAuthError, get_fotmob_session
+from footballapiscapers.id_index import get_id_index, league_labels, match_labels, player_labels
+from footballapiscapers.league import extract_league_id, resolve_league_id
+from footballapiscapers.match import extract_match_id, resolve_match_id
+from footballapiscapers.payload_cache import get_payload_cache
+from footballapiscapers.player import extract_player_id, resolve_player_id
+from footballapiscapers.timing import FOTMOB_TIMER
+
+# AsyncBrowserPool / lease_page settings for FotMob pages
+CDP_SETTINGS = {
+    "args": DEFAULT_PROFILE.chrome_args(),
+    "blocked_urls": DEFAULT_PROFILE.blocked_urls(),
+    "url_patterns": FOTMOB_API_PATTERNS,
+    "headless": DEFAULT_PROFILE.headless,
+}
+# document.readyState values goto() waits for, per page-load strategy
+READY_STATES = {"eager": ("interactive", "complete"), "normal": ("complete",), "none": ()}
+# single flight for browser refreshes on the loop (FotmobSession.refresh_lock is the threaded one)
+_refresh_lock = asyncio.Lock()
+
+# kind -> (api url, url marker, entity page url, first search result, id extractor, resolver, labels)
+KINDS = {
+    "match": (
+        "https://www.fotmob.com/api/data/matchDetails?matchId={}",
+        "matchDetails",
+        "https://www.fotmob.com/match/{}",
+        "div.css-1vahj0u-MatchSearchItemCSS a",
+        extract_match_id,
+        resolve_match_id,
+        match_labels,
+    ),
+    "player": (
+        "https://www.fotmob.com/api/data/playerData?id={}",
+        "playerData",
+        "https://www.fotmob.com/players/{}",
+        "a[href*='/players/']",
+        extract_player_id,
+        resolve_player_id,
+        player_labels,
+    ),
+    "league": (
+        "https://www.fotmob.com/api/data/tltable?leagueId={}",
+        "tltable",
+        "https://www.fotmob.com/leagues/{}/overview",
+        "a[href*='/leagues/']",
+        extract_league_id,
+        resolve_league_id,
+        league_labels,
+    ),
+}
+
+
+def _ready_states() -> tuple[str, ...]:
+    return READY_STATES.get(DEFAULT_PROFILE.page_load_strategy, READY_STATES["eager"])
+
+
+async def harvest_page_session(page: AsyncPage, url_marker: str, entity_id, referer: str | None, timeout: float = 20):
+    """CDP twin of fotmob_browser.harvest_browser_session. Returns (headers, cookies)."""
+    found = await page.request_headers(url_marker, entity_id, timeout=timeout)
+    if found:
+        headers = clean_headers(found)
+    else:
+        headers = {
+            "Accept": "application/json, text/plain, */*",
+            "Referer": referer or "https://www.fotmob.com",
+        }
+    if not any(k.lower() == "user-agent" for k in headers):
+        try:
+            headers["User-Agent"] = await page.user_agent() or FALLBACK_USER_AGENT
+        except CDPError:
+            headers["User-Agent"] = FALLBACK_USER_AGENT
+    try:
+        cookies = await page.cookies()
+    except CDPError:
+        cookies = []
+    return headers, cookies
+
+
+async def _body_from_page(page: AsyncPage, url_marker: str, entity_id, timeout: float = 20):
+    body = await page.response_body(url_marker, entity_id, timeout=timeout)
+    if body is None:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+async def _api_from_page(page: AsyncPage, api_url: str, url_marker: str, entity_id, page_url: str):
+    """
+    With the page on (or past) the entity page: take the API body it downloaded,
+    refresh the shared session from its request headers, and only hit the API
+    directly if the page's own call wasn't seen.
+    """
+    session = get_fotmob_session()
+    data = await _body_from_page(page, url_marker, entity_id)
+    if data is None or not session.is_valid():
+        # the body wait above already covered the page's request; its headers are seen or not by now
+        headers, cookies = await harvest_page_session(page, url_marker, entity_id, page_url, timeout=1.0)
+        session.store(headers, cookies)
+    if data is None:
+        data = await asyncio.to_thread(session.get_json, api_url)
+    return data
+
+
+async def fetch_by_id_async(kind: str, entity_id: str, fresh: bool = False):
+    """Async fetch_match_details / fetch_player_data / fetch_league_table."""
+    api_fmt, marker, page_fmt = KINDS[kind][:3]
+    cache = get_payload_cache()
+    data = None if fresh else cache.get(kind, entity_id)
+    if data is not None:
+        return data
+    api_url = api_fmt.format(entity_id)
+    session = get_fotmob_session()
+    generation = session.generation
+    data = None
+    if session.is_valid():
+        try:
+            data = await asyncio.to_thread(session.get_json, api_url)
+        except FotmobAuthError:
+            session.invalidate(generation)
+    if data is None:
+        async with _refresh_lock:
+            if session.generation != generation and session.is_valid():
+                # refreshed by the call we queued behind
+                data = await asyncio.to_thread(session.get_json, api_url)
+            else:
+                page_url = page_fmt.format(entity_id)
+                async with lease_page(FOTMOB_PROFILE, **CDP_SETTINGS) as page:
+                    await page.goto(page_url, _ready_states())
+                    data = await _api_from_page(page, api_url, marker, entity_id, page_url)
+    cache.put(kind, entity_id, data)
+    return data
+
+
+async def search_in_page(page: AsyncPage, kind: str, query: str):
+    """Drive the FotMob search UI to the first result of this kind. Returns (entity_id, current_url)."""
+    result_selector, extract = KINDS[kind][3], KINDS[kind][4]
+    ready = _ready_states()
+    await page.goto("https://fotmob.com", ready)
+    await page.wait_for("input[placeholder='Search']", timeout=15)
+    await page.type("input[placeholder='Search']", query)
+    await page.press_enter()
+
+    await page.wait_for(result_selector, timeout=15, visible=True)
+    href_before = await page.attribute(result_selector, "href")
+    initial_url = await page.url()
+    await page.click(result_selector)
+
+    try:
+        await page.wait_until(f"location.href !== {json.dumps(initial_url)} || location.hash !== ''", timeout=12)
+    except asyncio.TimeoutError:
+        pass
+    if ready:
+        await page.wait_until(f"{json.dumps(list(ready))}.includes(document.readyState)", timeout=20)
+    try:
+        await page.wait_for("#main-content", timeout=20)
+    except asyncio.TimeoutError:
+        pass
+    await asyncio.sleep(0.5)
+
+    location_hash = await page.evaluate("location.hash") or ""
+    current_url = await page.url()
+    entity_id = extract(location_hash) or extract(current_url) or extract(href_before)
+
+    if not entity_id and href_before:
+        await page.goto(href_before, ready)
+        location_hash = await page.evaluate("location.hash") or ""
+        current_url = await page.url()
+        entity_id = extract(location_hash) or extract(current_url)
+
+    if not entity_id:
+        entity_id = extract(await page.content())
+
+    if not entity_id:
+        raise ValueError(f"Could not determine {kind} id")
+    return entity_id, current_url
+
+
+async def scrape_async(kind: str, query: str, save_json_path: str | None = None) -> dict:
+    """Async scrape_match / scrape_player / scrape_league."""
+    api_fmt, marker = KINDS[kind][:2]
+    resolve, labels = KINDS[kind][5], KINDS[kind][6]
+    with FOTMOB_TIMER.phase(f"{kind}.resolve"):
+        # sqlite + fixtures lookups and maybe one search API call
+        entity_id = await asyncio.to_thread(resolve, query)
+    if entity_id:
+        with FOTMOB_TIMER.phase(f"{kind}.fetch"):
+            data = await fetch_by_id_async(kind, entity_id)
+    else:
+        async with lease_page(FOTMOB_PROFILE, **CDP_SETTINGS) as page:
+            with FOTMOB_TIMER.phase(f"{kind}.browser_search"):
+                entity_id, current_url = await search_in_page(page, kind, query)
+            with FOTMOB_TIMER.phase(f"{kind}.browser_api"):
+                data = await _api_from_page(page, api_fmt.format(entity_id), marker, entity_id, current_url)
+        get_payload_cache().put(kind, entity_id, data)
+    get_id_index().record(kind, query, entity_id, labels=labels(data))
+
+    if save_json_path:
+        with open(save_json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    return data
+
+
+async def scrape_match_async(search_query: str, save_json_path: str | None = None) -> dict:
+    return await scrape_async("match", search_query, save_json_path)
+
+
+async def scrape_player_async(player_search_query: str, save_json_path: str | None = None) -> dict:
+    return await scrape_async("player", player_search_query, save_json_path)
+
+
+async def scrape_league_async(league_search_query: str, save_json_path: str | None = None) -> dict:
+    return await scrape_async("league", league_search_query, save_json_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Scrape FotMob over the asyncio CDP backend.")
+    parser.add_argument("--kind", choices=tuple(KINDS), default="match")
+    parser.add_argument("--query", default="chelsea vs benfica")
+    args = parser.parse_args()
+    try:
+        out = asyncio.run(scrape_async(args.kind, args.query))
+    except (CDPError, requests.RequestException) as e:
+        raise SystemExit(f"[fotmob-cdp] {e}")
+    print(json.dumps({"_summary": "ok", "keys": sorted(out)[:10] if isinstance(out, dict) else None}, indent=2))
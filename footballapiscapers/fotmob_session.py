@@ -0,0 +1,185 @@
+"""
+Shared FotMob HTTP session.
+
+The FotMob API only answers requests that look like they came from the site,
+so the scrapers used to open Chrome on every call just to copy the headers of
+the page's own API request. FotmobSession keeps those headers and cookies
+(with an expiry) on a pooled requests.Session, so API calls go out directly and
+the browser is only needed again when FotMob answers 401/403.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from browserpool.driver_pool import lease_driver
+from browserpool.network_tap import network_tap
+from footballapiscapers.fotmob_browser import (
+    FALLBACK_USER_AGENT,
+    FOTMOB_API_PATTERNS,
+    FOTMOB_PROFILE,
+    build_fotmob_options,
+    harvest_browser_session,
+    setup_fotmob_driver,
+)
+
+FOTMOB_BASE = "https://www.fotmob.com"
+DEFAULT_SESSION_TTL = float(os.getenv("FOTMOB_SESSION_TTL", "1800"))
+# when a browser is already on the page, take the API body it downloaded instead of refetching
+USE_BROWSER_BODY = os.getenv("FOTMOB_BROWSER_BODY", "1") != "0"
+# sent before any browser headers were captured; enough for some endpoints (e.g. search)
+BOOTSTRAP_HEADERS = {
+    "User-Agent": FALLBACK_USER_AGENT,
+    "Accept": "application/json, text/plain, */*",
+    "Referer": FOTMOB_BASE + "/",
+}
+
+
+class FotmobAuthError(RuntimeError):
+    """FotMob rejected the request (401/403): captured headers are stale."""
+
+
+class FotmobSession:
+    def __init__(self, ttl_seconds: float = DEFAULT_SESSION_TTL, pool_maxsize: int = 16):
+        self.ttl_seconds = ttl_seconds
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self._headers: dict = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        # bumped on every store(); lets a caller tell whether headers changed since it looked
+        self.generation = 0
+        # single flight: one browser refresh at a time, the callers queued behind it reuse its headers
+        self.refresh_lock = threading.Lock()
+
+    def is_valid(self) -> bool:
+        return bool(self._headers) and time.time() < self._expires_at
+
+    def store(self, headers: dict, cookies: list[dict] | None = None, ttl: float | None = None) -> None:
+        headers = dict(headers or {})
+        with self._lock:
+            if cookies:
+                # let the cookie jar own cookies so they follow Set-Cookie updates
+                headers = {k: v for k, v in headers.items() if k.lower() != "cookie"}
+                self.http.cookies.clear()
+                for c in cookies:
+                    self.http.cookies.set(
+                        c.get("name"), c.get("value"),
+                        domain=c.get("domain", ""), path=c.get("path", "/"),
+                    )
+            self._headers = headers
+            self._expires_at = time.time() + (self.ttl_seconds if ttl is None else ttl)
+            self.generation += 1
+
+    def invalidate(self, generation: int | None = None) -> None:
+        """Drop the headers; with `generation`, only if nobody stored fresh ones since."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._headers = {}
+            self._expires_at = 0.0
+
+    def get_json(self, url: str, timeout: float = 20):
+        resp = self.http.get(url, headers=self._headers or BOOTSTRAP_HEADERS, timeout=timeout)
+        if resp.status_code in (401, 403):
+            raise FotmobAuthError(f"FotMob returned {resp.status_code} for {url}")
+        resp.raise_for_status()
+        return resp.json()
+
+
+_session: FotmobSession | None = None
+_session_lock = threading.Lock()
+
+
+def get_fotmob_session() -> FotmobSession:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = FotmobSession()
+        return _session
+
+
+def refresh_from_driver(
+    driver, url_marker: str, entity_id: str | None, referer: str | None, tap=None, timeout: float = 20,
+) -> FotmobSession:
+    session = get_fotmob_session()
+    headers, cookies = harvest_browser_session(driver, url_marker, entity_id, referer, tap=tap, timeout=timeout)
+    session.store(headers, cookies)
+    return session
+
+
+def body_from_tap(tap, url_marker: str, entity_id: str | None, timeout: float = 20):
+    """Parsed JSON the page itself received for this API call, or None."""
+    if tap is None:
+        return None
+    body = tap.wait_for_response_body(url_marker, entity_id, timeout=timeout)
+    if body is None:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+def fetch_fotmob_json(
+    api_url: str,
+    *,
+    url_marker: str,
+    entity_id: str | None,
+    page_url: str,
+    driver=None,
+    tap=None,
+    chromedriver_path: str | None = None,
+    use_browser_body: bool | None = None,
+):
+    """
+    Fetch a FotMob API payload.
+
+    With a `driver` already on the page that issues this API call (and the
+    `tap` that watched it), the response body the page received is returned
+    directly when use_browser_body is on. Otherwise the shared session is
+    used; if it is empty/expired or FotMob answers 401/403, headers are
+    re-captured from a browser (the caller's, or a leased one sent to
+    page_url, whose own response body is again preferred).
+    """
+    if use_browser_body is None:
+        use_browser_body = USE_BROWSER_BODY
+    session = get_fotmob_session()
+    generation = session.generation
+    header_wait = 20.0
+
+    if driver is not None and use_browser_body and tap is not None:
+        data = body_from_tap(tap, url_marker, entity_id)
+        if data is not None:
+            if not session.is_valid():
+                refresh_from_driver(driver, url_marker, entity_id, page_url, tap=tap)
+            return data
+        # already waited for this request once; if it was seen its headers are in the tap's ring
+        header_wait = 1.0
+
+    if session.is_valid():
+        try:
+            return session.get_json(api_url)
+        except FotmobAuthError:
+            session.invalidate(generation)
+
+    if driver is not None:
+        refresh_from_driver(driver, url_marker, entity_id, page_url, tap=tap, timeout=header_wait)
+    else:
+        with session.refresh_lock:
+            if session.generation != generation and session.is_valid():
+                # refreshed by the caller we queued behind
+                return session.get_json(api_url)
+            with lease_driver(FOTMOB_PROFILE, chromedriver_path, build_fotmob_options, setup=setup_fotmob_driver) as d:
+                with network_tap(d, FOTMOB_API_PATTERNS) as own_tap:
+                    d.get(page_url)
+                    refresh_from_driver(d, url_marker, entity_id, page_url, tap=own_tap)
+                    data = body_from_tap(own_tap, url_marker, entity_id, timeout=5) if use_browser_body else None
+        if data is not None:
+            return data
+    return session.get_json(api_url)
@@ -0,0 +1,279 @@
+"""
+Persistent query -> FotMob id index.
+
+Every successful search is recorded here (the raw query plus names taken from
+the payload, e.g. "Chelsea vs Benfica" or the player's full name), so asking
+for the same thing again skips the browser search and goes straight to the
+API. Lookups try an exact normalized key first, then a fuzzy pass over the
+names known for that kind.
+
+Match entries expire (fixtures between the same teams repeat), player and
+league entries don't.
+"""
+from __future__ import annotations
+import os
+import re
+import time
+import sqlite3
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+
+KINDS = ("match", "player", "league")
+DEFAULT_MAX_AGE = {"match": 3 * 86400.0, "player": None, "league": None}
+FUZZY_THRESHOLD = 0.86
+
+_MATCH_SPLIT = re.compile(r"\s+(?:vs\.?|v\.?|x|-)\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s-]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def match_sides(query: str) -> list[str]:
+    """Normalized team names of a 'home vs away' query (one element if there is no separator)."""
+    return [s.strip() for s in _MATCH_SPLIT.split(normalize_text(query)) if s.strip()]
+
+
+def normalize_query(kind: str, query: str) -> str:
+    """Normalized index key. Match keys are side-order independent: 'a vs b' == 'b vs a'."""
+    q = normalize_text(query)
+    if kind == "match":
+        sides = match_sides(q)
+        if len(sides) == 2:
+            return " vs ".join(sorted(sides))
+    return q
+
+
+# tokens that name a different team of the same club: "arsenal" is not "arsenal women" or "arsenal u21"
+_QUALIFIER = re.compile(r"^(?:u\d{2}|women|womens|w|ladies|fem|femenino|feminino|frauen|ii|b|reserves|res|youth|academy)$")
+# club-type affixes that don't change which team is meant: "chelsea" == "chelsea fc", "milan" == "ac milan"
+_AFFIXES = {"fc", "afc", "cf", "sc", "ac", "as", "cd", "sv", "fk", "sk", "bk", "if", "club", "calcio"}
+# scored for two names that share tokens but mean different teams (well below FUZZY_THRESHOLD)
+MISMATCH_SCORE = 0.5
+
+
+def _qualifiers(tokens: list[str]) -> set[str]:
+    return {t for t in tokens if _QUALIFIER.match(t)}
+
+
+def _similarity(a: str, b: str, min_subset_tokens: int = 1) -> float:
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = a.split(), b.split()
+    # "cole palmer" vs "cole jermaine palmer": one name's tokens contained in the other's
+    if set(ta) <= set(tb) or set(tb) <= set(ta):
+        shorter = min((a, b), key=len)
+        ok = (
+            len(shorter) >= 4
+            and min(len(ta), len(tb)) >= min_subset_tokens
+            and abs(len(ta) - len(tb)) <= 1
+        )
+        return 0.9 if ok else 0.8
+    return SequenceMatcher(None, " ".join(sorted(ta)), " ".join(sorted(tb))).ratio()
+
+
+def side_similarity(a: str, b: str) -> float:
+    """
+    Similarity of two normalized team names. Stricter than player names: beyond
+    club affixes ("chelsea" == "chelsea fc") any extra token names another team
+    ("inter" is not "inter miami"), and so does a differing qualifier ("arsenal
+    women", "chelsea u21").
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = a.split(), b.split()
+    if _qualifiers(ta) != _qualifiers(tb):
+        return MISMATCH_SCORE
+    sa, sb = set(ta), set(tb)
+    if sa <= sb or sb <= sa:
+        ok = (sa ^ sb) <= _AFFIXES and len(min((a, b), key=len)) >= 4
+        return 0.9 if ok else MISMATCH_SCORE
+    return SequenceMatcher(None, " ".join(sorted(ta)), " ".join(sorted(tb))).ratio()
+
+
+def side_matches(a: str, b: str, threshold: float = FUZZY_THRESHOLD) -> bool:
+    """Whether two normalized team names are the same team for a fuzzy lookup."""
+    return side_similarity(a, b) >= threshold
+
+
+def fuzzy_score(kind: str, query_key: str, candidate_key: str) -> float:
+    if kind == "match":
+        qs, cs = query_key.split(" vs "), candidate_key.split(" vs ")
+        if len(qs) != 2 or len(cs) != 2:
+            return 0.0
+        # each side is scored on its own; the weaker side decides
+        straight = min(side_similarity(qs[0], cs[0]), side_similarity(qs[1], cs[1]))
+        swapped = min(side_similarity(qs[0], cs[1]), side_similarity(qs[1], cs[0]))
+        return max(straight, swapped)
+    # a bare surname ("pedro") is too ambiguous to map onto a full player name
+    return _similarity(query_key, candidate_key, min_subset_tokens=2)
+
+
+class IdIndex:
+    def __init__(self, path: str, max_age: dict | None = None, fuzzy_threshold: float = FUZZY_THRESHOLD):
+        self.path = path
+        self.max_age = dict(DEFAULT_MAX_AGE, **(max_age or {}))
+        self.fuzzy_threshold = fuzzy_threshold
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                entity_id TEXT NOT NULL,
+                label TEXT,
+                created_at REAL NOT NULL,
+                last_hit_at REAL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kind, key)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_entity ON entries (kind, entity_id)")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._counters = {k: {"hits": 0, "fuzzy_hits": 0, "misses": 0} for k in KINDS}
+
+    def _expired(self, kind: str, created_at: float, now: float) -> bool:
+        max_age = self.max_age.get(kind)
+        return max_age is not None and now - created_at > max_age
+
+    def _touch(self, kind: str, key: str, now: float) -> None:
+        self._db.execute(
+            "UPDATE entries SET hits = hits + 1, last_hit_at = ? WHERE kind = ? AND key = ?",
+            (now, kind, key),
+        )
+        self._db.commit()
+
+    def lookup(self, kind: str, query: str) -> str | None:
+        """Return the FotMob id for query, or None on a miss."""
+        key = normalize_query(kind, query)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT entity_id, created_at FROM entries WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row and not self._expired(kind, row[1], now):
+                self._touch(kind, key, now)
+                self._counters[kind]["hits"] += 1
+                return row[0]
+
+            best_key, best_id, best_score = None, None, 0.0
+            for cand_key, cand_id, created_at in self._db.execute(
+                "SELECT key, entity_id, created_at FROM entries WHERE kind = ?", (kind,)
+            ):
+                if self._expired(kind, created_at, now):
+                    continue
+                score = fuzzy_score(kind, key, cand_key)
+                if score > best_score:
+                    best_key, best_id, best_score = cand_key, cand_id, score
+            if best_key is not None and best_score >= self.fuzzy_threshold:
+                self._touch(kind, best_key, now)
+                self._counters[kind]["fuzzy_hits"] += 1
+                return best_id
+
+            self._counters[kind]["misses"] += 1
+            return None
+
+    def record(self, kind: str, query: str, entity_id, labels: list[str] | tuple = ()) -> None:
+        """Remember that query (and any labels/aliases) resolve to entity_id."""
+        if entity_id is None:
+            return
+        now = time.time()
+        keys = {normalize_query(kind, q) for q in (query, *labels) if q}
+        keys.discard("")
+        label = next((l for l in labels if l), None)
+        with self._lock:
+            self._db.executemany(
+                """
+                INSERT INTO entries (kind, key, entity_id, label, created_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (kind, key) DO UPDATE SET
+                    entity_id = excluded.entity_id, label = excluded.label, created_at = excluded.created_at
+                """,
+                [(kind, k, str(entity_id), label, now) for k in keys],
+            )
+            self._db.commit()
+
+    def add_alias(self, kind: str, alias: str, entity_id, label: str | None = None) -> None:
+        self.record(kind, alias, entity_id, labels=(label,) if label else ())
+
+    def invalidate(self, kind: str | None = None, query: str | None = None, entity_id=None) -> int:
+        """Delete matching entries (everything if no filter). Returns rows removed."""
+        clauses, params = [], []
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        if query:
+            if not kind:
+                raise ValueError("invalidating by query needs a kind")
+            clauses.append("key = ?")
+            params.append(normalize_query(kind, query))
+        if entity_id is not None:
+            clauses.append("entity_id = ?")
+            params.append(str(entity_id))
+        sql = "DELETE FROM entries" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        with self._lock:
+            cur = self._db.execute(sql, params)
+            self._db.commit()
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = dict(self._db.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+            counters = {k: dict(v) for k, v in self._counters.items()}
+        for k in KINDS:
+            counters[k]["entries"] = rows.get(k, 0)
+        return counters
+
+
+_index: IdIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_id_index() -> IdIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            data_dir = os.getenv("CONTENTWORK_DATA_DIR", os.path.expanduser("~/.cache/contentwork"))
+            _index = IdIndex(os.getenv("FOTMOB_INDEX_PATH", os.path.join(data_dir, "fotmob_index.sqlite3")))
+        return _index
+
+
+# ---------- labels taken from API payloads ----------
+
+def match_labels(data) -> list[str]:
+    if not isinstance(data, dict):
+        return []
+    general = data.get("general") or {}
+    home = (general.get("homeTeam") or {}).get("name")
+    away = (general.get("awayTeam") or {}).get("name")
+    return [f"{home} vs {away}"] if home and away else []
+
+
+def player_labels(data) -> list[str]:
+    name = data.get("name") if isinstance(data, dict) else None
+    return [name] if name else []
+
+
+def league_labels(data) -> list[str]:
+    # tltable is a list of {"data": {"leagueName": ...}} blocks
+    blocks = data if isinstance(data, list) else [data]
+    for b in blocks:
+        d = (b or {}).get("data") if isinstance(b, dict) else None
+        if isinstance(d, dict) and d.get("leagueName"):
+            return [d["leagueName"]]
+    return []
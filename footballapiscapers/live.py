@@ -0,0 +1,204 @@
+"""
+Live match feeds.
+
+One poller per match id fetches matchDetails every interval, diffs it against
+the previous snapshot and fans the changed paths out to every subscriber, so
+N clients watching the same match cost one upstream request per interval.
+The poller starts with the first subscriber and stops when the last one
+leaves (or the match finishes).
+
+Diffs are JSON Patch style operations:
+    {"op": "replace", "path": "/header/teams/0/score", "value": 2}
+"""
+from __future__ import annotations
+import os
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable
+
+from footballapiscapers.payload_cache import match_status
+
+LIVE_POLL_INTERVAL = float(os.getenv("FOTMOB_LIVE_INTERVAL", "10"))
+# matches that haven't kicked off yet are polled less often
+LIVE_IDLE_INTERVAL = float(os.getenv("FOTMOB_LIVE_IDLE_INTERVAL", "60"))
+LIVE_MAX_FAILURES = 5
+SUBSCRIBER_QUEUE = 64
+
+
+def _escape(key) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def json_diff(old: Any, new: Any, path: str = "") -> list[dict]:
+    """JSON Patch operations turning old into new (only the paths that changed)."""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(new, dict):
+        ops = []
+        for k in old:
+            if k not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(k)}"})
+        for k, v in new.items():
+            if k not in old:
+                ops.append({"op": "add", "path": f"{path}/{_escape(k)}", "value": v})
+            else:
+                ops.extend(json_diff(old[k], v, f"{path}/{_escape(k)}"))
+        return ops
+    if isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for i in range(common):
+            ops.extend(json_diff(old[i], new[i], f"{path}/{i}"))
+        # appended events etc. become adds; a shrunk list is trimmed from the end
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        return ops
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+class LiveMatchFeed:
+    """Shared poller for one match; subscribers receive (event, payload) tuples on a queue."""
+
+    def __init__(self, match_id: str, fetch: Callable[[str], Any], interval: float = LIVE_POLL_INTERVAL,
+                 idle_interval: float = LIVE_IDLE_INTERVAL, on_stop: Callable[["LiveMatchFeed"], None] | None = None):
+        self.match_id = str(match_id)
+        self.fetch = fetch
+        self.interval = max(1.0, float(interval))
+        self.idle_interval = max(self.interval, float(idle_interval))
+        self.on_stop = on_stop
+        self.snapshot = None
+        self.seq = 0
+        self.polls = 0
+        self.started_at = time.time()
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _publish(self, event: str, payload) -> None:
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait((event, payload))
+            except asyncio.QueueFull:
+                # slow client: throw its backlog away and resync it from the current snapshot
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(("snapshot", {"seq": self.seq, "data": self.snapshot}))
+
+    async def _run(self) -> None:
+        failures = 0
+        try:
+            while self._subscribers:
+                t0 = time.monotonic()
+                try:
+                    data = await asyncio.to_thread(self.fetch, self.match_id)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    self._publish("error", {"error": str(e), "failures": failures})
+                    if failures >= LIVE_MAX_FAILURES:
+                        self._publish("end", {"reason": "upstream failing"})
+                        break
+                    data = None
+                self.polls += 1
+
+                status = "upcoming"
+                if data is not None:
+                    status = match_status(data)
+                    if self.snapshot is None:
+                        self.snapshot = data
+                        self._publish("snapshot", {"seq": self.seq, "data": data})
+                    else:
+                        ops = json_diff(self.snapshot, data)
+                        self.snapshot = data
+                        if ops:
+                            self.seq += 1
+                            self._publish("diff", {"seq": self.seq, "ops": ops})
+                    if status == "finished":
+                        self._publish("end", {"reason": "finished", "seq": self.seq})
+                        break
+
+                wait = self.interval if status == "live" else self.idle_interval
+                await asyncio.sleep(max(0.0, wait - (time.monotonic() - t0)))
+        finally:
+            if self._task is asyncio.current_task():
+                self._stopped()
+
+    def _stopped(self) -> None:
+        self._task = None
+        if self.on_stop:
+            self.on_stop(self)
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        if self.snapshot is not None:
+            q.put_nowait(("snapshot", {"seq": self.seq, "data": self.snapshot}))
+        self._subscribers.add(q)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"live-match-{self.match_id}")
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._subscribers.discard(q)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._stopped()
+
+    def stats(self) -> dict:
+        return {
+            "match_id": self.match_id,
+            "subscribers": self.subscribers,
+            "polls": self.polls,
+            "seq": self.seq,
+            "status": match_status(self.snapshot) if self.snapshot is not None else None,
+            "running_s": round(time.time() - self.started_at, 1),
+        }
+
+
+class LiveMatchHub:
+    """Registry of running feeds, one per match id."""
+
+    def __init__(self, fetch: Callable[[str], Any], interval: float = LIVE_POLL_INTERVAL,
+                 idle_interval: float = LIVE_IDLE_INTERVAL):
+        self.fetch = fetch
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self._feeds: dict[str, LiveMatchFeed] = {}
+
+    def _forget(self, feed: LiveMatchFeed) -> None:
+        if self._feeds.get(feed.match_id) is feed:
+            del self._feeds[feed.match_id]
+
+    async def stream(self, match_id: str, keepalive: float = 15.0) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Yield (event, payload) for one subscriber: a snapshot first, then diffs,
+        and ("ping", None) every keepalive seconds of silence. Ends after "end".
+        Leaving the iterator unsubscribes; the last one out stops the poller.
+        """
+        match_id = str(match_id)
+        feed = self._feeds.get(match_id)
+        if feed is None:
+            feed = LiveMatchFeed(match_id, self.fetch, self.interval, self.idle_interval, on_stop=self._forget)
+            self._feeds[match_id] = feed
+        q = feed.subscribe()
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(q.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield "ping", None
+                    continue
+                yield event, payload
+                if event == "end":
+                    break
+        finally:
+            feed.unsubscribe(q)
+
+    def stats(self) -> list[dict]:
+        return [f.stats() for f in self._feeds.values()]
@@ -0,0 +1,212 @@
+"""
+TTL cache for FotMob API payloads, keyed by (kind, id).
+
+The TTL depends on what the payload is:
+ - match: finished -> kept forever, live ("ongoing") -> a few seconds,
+   not started yet -> minutes
+ - player / league: fixed TTLs
+
+Lookups hit an in-memory LRU first, then a gzip-compressed disk tier. Only
+entries that live long enough to be worth it (forever or >= DISK_MIN_TTL) are
+written to disk, so live matches never touch the filesystem.
+"""
+from __future__ import annotations
+import os
+import gzip
+import json
+import time
+import threading
+from collections import OrderedDict
+
+FOREVER = None
+LIVE_MATCH_TTL = float(os.getenv("FOTMOB_CACHE_LIVE_TTL", "5"))
+UPCOMING_MATCH_TTL = float(os.getenv("FOTMOB_CACHE_UPCOMING_TTL", "300"))
+PLAYER_TTL = float(os.getenv("FOTMOB_CACHE_PLAYER_TTL", str(6 * 3600)))
+LEAGUE_TTL = float(os.getenv("FOTMOB_CACHE_LEAGUE_TTL", "900"))
+DISK_MIN_TTL = 60.0
+KINDS = ("match", "player", "league")
+_POLICY = object()
+
+
+def match_status(data) -> str:
+    """'finished', 'live' or 'upcoming' for a matchDetails payload."""
+    if not isinstance(data, dict):
+        return "upcoming"
+    status = ((data.get("header") or {}).get("status")) or {}
+    general = data.get("general") or {}
+    if status.get("finished") or general.get("finished"):
+        return "finished"
+    if data.get("ongoing") or status.get("ongoing") or status.get("started") or general.get("started"):
+        return "live"
+    return "upcoming"
+
+
+def ttl_for(kind: str, data) -> float | None:
+    """Seconds to keep this payload, or None for forever."""
+    if kind == "match":
+        return {
+            "finished": FOREVER,
+            "live": LIVE_MATCH_TTL,
+            "upcoming": UPCOMING_MATCH_TTL,
+        }[match_status(data)]
+    if kind == "player":
+        return PLAYER_TTL
+    if kind == "league":
+        return LEAGUE_TTL
+    return 0.0
+
+
+def check_kind(kind: str) -> str:
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r} (use {', '.join(KINDS)})")
+    return kind
+
+
+def check_entity_id(entity_id) -> str:
+    """The id as a string; ValueError unless it is a FotMob numeric id (it becomes a file name)."""
+    entity_id = str(entity_id)
+    if not (entity_id.isascii() and entity_id.isdigit()):
+        raise ValueError(f"entity_id must be a FotMob numeric id, got {entity_id!r}")
+    return entity_id
+
+
+class PayloadCache:
+    def __init__(self, disk_dir: str | None, memory_items: int = 256):
+        self.disk_dir = disk_dir
+        self.memory_items = max(1, int(memory_items))
+        self._mem: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "disk_writes": 0}
+
+    def _inside(self, path: str) -> str:
+        """realpath of path; ValueError if it resolves outside disk_dir (e.g. through a symlink)."""
+        root = os.path.realpath(self.disk_dir)
+        real = os.path.realpath(path)
+        if os.path.commonpath([root, real]) != root:
+            raise ValueError(f"{path!r} is outside the cache directory")
+        return real
+
+    def _path(self, kind: str, entity_id) -> str:
+        return self._inside(os.path.join(self.disk_dir, check_kind(kind), f"{check_entity_id(entity_id)}.json.gz"))
+
+    def _remember(self, key: tuple, expires_at: float | None, data) -> None:
+        with self._lock:
+            self._mem[key] = (expires_at, data)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.memory_items:
+                self._mem.popitem(last=False)
+
+    def get(self, kind: str, entity_id):
+        key = (kind, str(entity_id))
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is not None:
+                expires_at, data = hit
+                if expires_at is None or expires_at > now:
+                    self._mem.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return data
+                del self._mem[key]
+
+        if self.disk_dir:
+            path = self._path(kind, key[1])
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as fh:
+                    envelope = json.load(fh)
+            except (OSError, ValueError):
+                envelope = None
+            if envelope is not None:
+                expires_at = envelope.get("expires_at")
+                if expires_at is None or expires_at > now:
+                    self._remember(key, expires_at, envelope.get("data"))
+                    with self._lock:
+                        self._stats["disk_hits"] += 1
+                    return envelope.get("data")
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, kind: str, entity_id, data, ttl=_POLICY) -> None:
+        """Store data for ttl seconds (None = forever); defaults to the policy for kind."""
+        if ttl is _POLICY:
+            ttl = ttl_for(kind, data)
+        if ttl is not None and ttl <= 0:
+            return
+        key = (kind, str(entity_id))
+        now = time.time()
+        expires_at = None if ttl is None else now + ttl
+        self._remember(key, expires_at, data)
+        with self._lock:
+            self._stats["stores"] += 1
+
+        if self.disk_dir and (ttl is None or ttl >= DISK_MIN_TTL):
+            path = self._path(kind, key[1])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+                    json.dump({"stored_at": now, "expires_at": expires_at, "data": data}, fh, ensure_ascii=False)
+                os.replace(tmp, path)
+                with self._lock:
+                    self._stats["disk_writes"] += 1
+            except OSError as e:
+                print(f"[payload-cache] disk write failed for {kind}/{entity_id}: {e}")
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def invalidate(self, kind: str | None = None, entity_id=None) -> int:
+        if kind is not None:
+            check_kind(kind)
+        if entity_id is not None:
+            entity_id = check_entity_id(entity_id)
+        removed = 0
+        with self._lock:
+            for key in [k for k in self._mem if (kind is None or k[0] == kind)
+                        and (entity_id is None or k[1] == str(entity_id))]:
+                del self._mem[key]
+                removed += 1
+        if self.disk_dir and os.path.isdir(self.disk_dir):
+            for k in [kind] if kind else KINDS:
+                try:
+                    d = self._inside(os.path.join(self.disk_dir, k))
+                except ValueError as e:
+                    print(f"[payload-cache] not invalidating {k}: {e}")
+                    continue
+                if not os.path.isdir(d):
+                    continue
+                names = [f"{entity_id}.json.gz"] if entity_id is not None else os.listdir(d)
+                for name in names:
+                    try:
+                        os.remove(self._inside(os.path.join(d, name)))
+                        removed += 1
+                    except (OSError, ValueError):
+                        pass
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, memory_items=len(self._mem))
+
+
+_cache: PayloadCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_payload_cache() -> PayloadCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            data_dir = os.getenv("CONTENTWORK_DATA_DIR", os.path.expanduser("~/.cache/contentwork"))
+            _cache = PayloadCache(
+                os.getenv("FOTMOB_CACHE_DIR", os.path.join(data_dir, "fotmob_payloads")),
+                memory_items=int(os.getenv("FOTMOB_CACHE_MEMORY_ITEMS", "256")),
+            )
+        return _cache
@@ -3,15 +3,27 @@ import random
 import time
 import re
 import json
-import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from browserpool.driver_pool import lease_driver
+from browserpool.network_tap import network_tap
+from footballapiscapers.fotmob_browser import (
+    FOTMOB_API_PATTERNS,
+    FOTMOB_PROFILE,
+    build_fotmob_options,
+    setup_fotmob_driver,
+    wait_dom_ready,
+)
+from footballapiscapers.fotmob_session import fetch_fotmob_json
+from footballapiscapers.id_index import get_id_index, player_labels
+from footballapiscapers.payload_cache import get_payload_cache
+from footballapiscapers.search import resolve_id_via_search
+from footballapiscapers.timing import FOTMOB_TIMER
+
 # ---- defaults (can be overridden by function args) ----
 CHROMEDRIVER_PATH = "./chromedriver"
 DEFAULT_PLAYER_SEARCH_QUERY = "joao pedro"
@@ -42,165 +54,135 @@ def extract_player_id(text: str):
     return None
 
 
-def clean_headers(raw_headers: dict):
-    """Remove pseudo-headers (':method', ':authority', etc.) and ensure strings."""
-    if not raw_headers:
-        return {}
-    cleaned = {}
-    for k, v in raw_headers.items():
-        if isinstance(k, str) and k.startswith(":"):
-            continue
-        cleaned[str(k)] = str(v)
-    return cleaned
+def _search_player_in_browser(driver, player_search_query: str):
+    """Drive the FotMob search UI to the first player result. Returns (player_id, current_url)."""
+    driver.get("https://fotmob.com")
+    input_element = WebDriverWait(driver, 15).until(
+        EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Search']"))
+    )
+    human_type(input_element, player_search_query)
+    input_element.send_keys(Keys.ENTER)
 
+    first_result = WebDriverWait(driver, 15).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='/players/']"))
+    )
+    href_before = first_result.get_attribute("href")
 
-def scrape_player(
-    player_search_query: str = DEFAULT_PLAYER_SEARCH_QUERY,
-    chromedriver_path: str = CHROMEDRIVER_PATH,
-    save_json_path: str | None = None,
-) -> dict:
-    """Search for a player on FotMob, capture headers, fetch playerData, return JSON."""
-    service = Service(executable_path=chromedriver_path)
-    options = webdriver.ChromeOptions()
-    options.add_argument("--start-maximized")
-    options.add_argument("--headless=new")
-    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
-    driver = webdriver.Chrome(service=service, options=options)
+    initial_handles = driver.window_handles.copy()
+    initial_url = driver.current_url
+    first_result.click()
 
     try:
-        driver.get("https://fotmob.com")
-        input_element = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, "//input[@placeholder='Search']"))
+        WebDriverWait(driver, 12).until(
+            lambda d: len(d.window_handles) > len(initial_handles)
+                      or d.current_url != initial_url
+                      or (d.execute_script("return location.hash") or "") != ""
         )
-        human_type(input_element, player_search_query)
-        input_element.send_keys(Keys.ENTER)
+    except TimeoutException:
+        pass
 
-        first_result = WebDriverWait(driver, 15).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "a[href*='/players/']"))
-        )
-        href_before = first_result.get_attribute("href")
-
-        try:
-            _ = driver.get_log("performance")
-        except Exception:
-            pass
+    if len(driver.window_handles) > len(initial_handles):
+        new_handle = [h for h in driver.window_handles if h not in initial_handles][0]
+        driver.switch_to.window(new_handle)
 
-        initial_handles = driver.window_handles.copy()
-        initial_url = driver.current_url
-        first_result.click()
+    wait_dom_ready(driver, 20)
+    try:
+        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "#main-content")))
+    except TimeoutException:
+        pass
 
-        try:
-            WebDriverWait(driver, 12).until(
-                lambda d: len(d.window_handles) > len(initial_handles)
-                          or d.current_url != initial_url
-                          or (d.execute_script("return location.hash") or "") != ""
-            )
-        except TimeoutException:
-            pass
-
-        if len(driver.window_handles) > len(initial_handles):
-            new_handle = [h for h in driver.window_handles if h not in initial_handles][0]
-            driver.switch_to.window(new_handle)
-
-        WebDriverWait(driver, 20).until(lambda d: d.execute_script("return document.readyState") == "complete")
-        try:
-            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "#main-content")))
-        except TimeoutException:
-            pass
+    time.sleep(0.5)
 
-        time.sleep(0.5)
+    try:
+        location_hash = driver.execute_script("return location.hash") or ""
+    except WebDriverException:
+        location_hash = ""
+    current_url = driver.current_url
+    player_id = (
+        extract_player_id(location_hash)
+        or extract_player_id(current_url)
+        or extract_player_id(href_before)
+    )
 
+    if not player_id and href_before:
+        driver.get(href_before)
+        wait_dom_ready(driver, 15)
         try:
             location_hash = driver.execute_script("return location.hash") or ""
         except WebDriverException:
             location_hash = ""
         current_url = driver.current_url
-        player_id = (
-            extract_player_id(location_hash)
-            or extract_player_id(current_url)
-            or extract_player_id(href_before)
-        )
+        player_id = extract_player_id(location_hash) or extract_player_id(current_url)
+
+    if not player_id:
+        page_src = driver.page_source
+        player_id = extract_player_id(page_src)
+
+    if not player_id:
+        raise ValueError("Could not determine playerId")
+
+    return player_id, current_url
 
-        if not player_id and href_before:
-            driver.get(href_before)
-            WebDriverWait(driver, 15).until(lambda d: d.execute_script("return document.readyState") == "complete")
-            try:
-                location_hash = driver.execute_script("return location.hash") or ""
-            except WebDriverException:
-                location_hash = ""
-            current_url = driver.current_url
-            player_id = extract_player_id(location_hash) or extract_player_id(current_url)
-
-        if not player_id:
-            page_src = driver.page_source
-            player_id = extract_player_id(page_src)
-
-        if not player_id:
-            raise ValueError("Could not determine playerId")
-
-        api_url = f"https://www.fotmob.com/api/data/playerData?id={player_id}"
-
-        found_headers = None
-        deadline = time.time() + 20
-        checked_messages = set()
-        while time.time() < deadline and found_headers is None:
-            try:
-                logs = driver.get_log("performance")
-            except Exception:
-                logs = []
-            for entry in logs:
-                try:
-                    msg = json.loads(entry["message"])["message"]
-                except Exception:
-                    continue
-                uid = json.dumps(msg, sort_keys=True)
-                if uid in checked_messages:
-                    continue
-                checked_messages.add(uid)
-
-                if msg.get("method") == "Network.requestWillBeSent":
-                    params = msg.get("params", {})
-                    req = params.get("request", {})
-                    url = req.get("url", "")
-                    if "playerData" in url and str(player_id) in url:
-                        found_headers = req.get("headers", {})
-                        break
-            if found_headers is None:
-                time.sleep(0.4)
-
-        if not found_headers:
-            try:
-                ua = driver.execute_script("return navigator.userAgent")
-            except Exception:
-                ua = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-            cookies = driver.get_cookies()
-            cookie_header = "; ".join(f"{c['name']}={c['value']}" for c in cookies) if cookies else ""
-            request_headers = {
-                "User-Agent": ua,
-                "Accept": "application/json, text/plain, */*",
-                "Referer": current_url or "https://www.fotmob.com",
-            }
-            if cookie_header:
-                request_headers["Cookie"] = cookie_header
-        else:
-            request_headers = clean_headers(found_headers)
-
-        if "User-Agent" not in request_headers:
-            try:
-                request_headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
-            except Exception:
-                request_headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-
-        resp = requests.get(api_url, headers=request_headers, timeout=20)
-        resp.raise_for_status()
-        data = resp.json()
-
-        if save_json_path:
-            with open(save_json_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+
+def resolve_player_id(player_search_query: str) -> str | None:
+    """Player id from the local index or the FotMob search API, without a browser."""
+    return get_id_index().lookup("player", player_search_query) or resolve_id_via_search("player", player_search_query)
+
+
+def fetch_player_data(player_id: str, chromedriver_path: str = CHROMEDRIVER_PATH):
+    """
+    Fetch the API payload for a known id: from the payload cache if fresh,
+    otherwise straight from the API (a browser only opens if the session
+    headers need refreshing).
+    """
+    cache = get_payload_cache()
+    data = cache.get("player", player_id)
+    if data is not None:
         return data
-    finally:
-        driver.quit()
+    data = fetch_fotmob_json(
+        f"https://www.fotmob.com/api/data/playerData?id={player_id}",
+        url_marker="playerData",
+        entity_id=player_id,
+        page_url=f"https://www.fotmob.com/players/{player_id}",
+        chromedriver_path=chromedriver_path,
+    )
+    cache.put("player", player_id, data)
+    return data
+
+
+def scrape_player(
+    player_search_query: str = DEFAULT_PLAYER_SEARCH_QUERY,
+    chromedriver_path: str = CHROMEDRIVER_PATH,
+    save_json_path: str | None = None,
+) -> dict:
+    """Search for a player on FotMob, capture headers, fetch playerData, return JSON."""
+    with FOTMOB_TIMER.phase("player.resolve"):
+        player_id = resolve_player_id(player_search_query)
+    if player_id:
+        with FOTMOB_TIMER.phase("player.fetch"):
+            data = fetch_player_data(player_id, chromedriver_path)
+    else:
+        with lease_driver(FOTMOB_PROFILE, chromedriver_path, build_fotmob_options, setup=setup_fotmob_driver) as driver, \
+                network_tap(driver, FOTMOB_API_PATTERNS) as tap:
+            with FOTMOB_TIMER.phase("player.browser_search"):
+                player_id, current_url = _search_player_in_browser(driver, player_search_query)
+            api_url = f"https://www.fotmob.com/api/data/playerData?id={player_id}"
+            with FOTMOB_TIMER.phase("player.browser_api"):
+                data = fetch_fotmob_json(
+                    api_url,
+                    url_marker="playerData",
+                    entity_id=player_id,
+                    page_url=current_url,
+                    driver=driver,
+                    tap=tap,
+                )
+        get_payload_cache().put("player", player_id, data)
+    get_id_index().record("player", player_search_query, player_id, labels=player_labels(data))
+
+    if save_json_path:
+        with open(save_json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    return data
 
 
 if __name__ == "__main__":
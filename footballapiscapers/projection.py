@@ -0,0 +1,106 @@
+"""
+Field projection for FotMob payloads.
+
+Paths are dotted ("content.matchFacts", "header.teams.name"). A path that
+crosses a list applies to every element of it. `fields` keeps only the listed
+paths, `exclude` drops them; both can be given (include first, then exclude).
+
+Paths are validated against `<kind>_schema.json` next to this module when one
+exists (currently only match_schema.json). Leaves in the schema ("Object",
+"Array<Object>", ...) are opaque, so anything below them is accepted;
+nothing is accepted below a scalar ("String", "Number", "Boolean").
+"""
+from __future__ import annotations
+import os
+import json
+from functools import lru_cache
+
+SCHEMA_DIR = os.path.dirname(os.path.abspath(__file__))
+SCALAR_TYPES = ("String", "Number", "Boolean")
+
+
+@lru_cache(maxsize=None)
+def load_schema(kind: str) -> dict | None:
+    path = os.path.join(SCHEMA_DIR, f"{kind}_schema.json")
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _split(path: str) -> list[str]:
+    return [p for p in str(path).strip().split(".") if p]
+
+
+def invalid_paths(kind: str, paths) -> list[str]:
+    """The entries of paths that are empty or don't exist in kind's schema."""
+    schema = load_schema(kind)
+    bad = []
+    for path in paths or []:
+        parts = _split(path)
+        if not parts:
+            bad.append(path)
+            continue
+        node = schema
+        for part in parts:
+            if isinstance(node, str) and node.split()[0] in SCALAR_TYPES:
+                bad.append(path)
+                break
+            if not isinstance(node, dict):
+                break  # opaque leaf: deeper keys can't be checked
+            if part not in node:
+                bad.append(path)
+                break
+            node = node[part]
+    return bad
+
+
+def _tree(paths) -> dict:
+    """['a.b', 'a.c', 'd'] -> {'a': {'b': True, 'c': True}, 'd': True}"""
+    tree: dict = {}
+    for path in paths:
+        parts = _split(path)
+        node = tree
+        for part in parts[:-1]:
+            nxt = node.get(part)
+            if nxt is True:
+                break  # a shorter path already takes the whole subtree
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def _pick(node, tree):
+    if tree is True:
+        return node
+    if isinstance(node, list):
+        return [_pick(x, tree) for x in node]
+    if isinstance(node, dict):
+        return {k: _pick(node[k], sub) for k, sub in tree.items() if k in node}
+    return node
+
+
+def _drop(node, tree):
+    # copies only along the dropped paths, so cached payloads are never mutated
+    if isinstance(node, list):
+        return [_drop(x, tree) for x in node]
+    if not isinstance(node, dict):
+        return node
+    out = {}
+    for k, v in node.items():
+        sub = tree.get(k)
+        if sub is True:
+            continue
+        out[k] = v if sub is None else _drop(v, sub)
+    return out
+
+
+def project(data, fields=None, exclude=None):
+    """data restricted to fields (if given) and without exclude (if given)."""
+    if fields:
+        data = _pick(data, _tree(fields))
+    if exclude:
+        data = _drop(data, _tree(exclude))
+    return data
@@ -0,0 +1,140 @@
+"""
+Direct FotMob search.
+
+Calls FotMob's search-suggestion API with the shared session instead of
+typing the query into the site's search box, and returns ranked candidates
+(matches, players, leagues, teams) with their ids. The scrapers use this to
+resolve ids; the Selenium search UI is only used when this returns nothing.
+"""
+from __future__ import annotations
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+import requests
+
+from footballapiscapers.fotmob_session import FOTMOB_BASE, FotmobAuthError, get_fotmob_session
+from footballapiscapers.id_index import fuzzy_score, match_sides, normalize_query, normalize_text
+
+SEARCH_SUGGEST_URL = f"{FOTMOB_BASE}/api/search/suggest"
+SEARCH_KINDS = ("match", "player", "league", "team")
+# candidates below this similarity to the query are not used to resolve ids
+MIN_RESOLVE_SCORE = 0.75
+
+
+class FotmobSearchError(RuntimeError):
+    """The search API could not be used (auth rejected, network, bad payload)."""
+
+
+def _parse_time(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) / (1000.0 if value > 1e11 else 1.0)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).astimezone(timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def _iter_suggestions(payload):
+    """Walk the suggest payload and yield every dict that looks like a result."""
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            if node.get("type") in SEARCH_KINDS and node.get("id") is not None:
+                yield node
+            else:
+                stack.extend(reversed([v for v in node.values() if isinstance(v, (list, dict))]))
+
+
+def _candidate(node: dict, position: int) -> dict:
+    kind = node["type"]
+    cand = {"kind": kind, "id": str(node["id"]), "position": position}
+    if kind == "match":
+        home = node.get("homeTeamName") or (node.get("homeTeam") or {}).get("name")
+        away = node.get("awayTeamName") or (node.get("awayTeam") or {}).get("name")
+        cand["name"] = f"{home} vs {away}" if home and away else node.get("name")
+        cand["home"] = home
+        cand["away"] = away
+        cand["kickoff"] = node.get("matchDate") or node.get("utcTime")
+        cand["league"] = node.get("leagueName")
+    else:
+        cand["name"] = node.get("name")
+        for key in ("teamName", "leagueName", "ccode"):
+            if node.get(key) is not None:
+                cand[key] = node[key]
+    return cand
+
+
+def _rank(query: str, candidates: list[dict], now: float) -> list[dict]:
+    for c in candidates:
+        kind = c["kind"]
+        key_kind = "match" if kind == "match" else "player"
+        sim = fuzzy_score(key_kind, normalize_query(key_kind, query), normalize_query(key_kind, c.get("name") or ""))
+        if kind != "match" and c.get("name"):
+            # leagues/teams are often searched by a prefix ("premier" -> "Premier League")
+            qn, nn = normalize_text(query), normalize_text(c["name"])
+            if nn.startswith(qn) and len(qn) >= 4:
+                sim = max(sim, 0.85)
+        # upstream order breaks near-ties
+        score = sim - 0.01 * min(c["position"], 10)
+        if kind == "match":
+            kickoff = _parse_time(c.get("kickoff"))
+            if kickoff is not None:
+                # prefer the fixture closest to now (next / most recent meeting)
+                score -= min(abs(kickoff - now) / (86400.0 * 365), 0.2)
+        c["score"] = round(score, 4)
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    for c in candidates:
+        c.pop("position", None)
+    return candidates
+
+
+def _suggest(term: str, timeout: float) -> list[dict]:
+    url = f"{SEARCH_SUGGEST_URL}?{urlencode({'term': term, 'lang': 'en', 'hits': 50})}"
+    try:
+        payload = get_fotmob_session().get_json(url, timeout=timeout)
+    except (FotmobAuthError, requests.RequestException, ValueError) as e:
+        raise FotmobSearchError(str(e)) from e
+    seen = set()
+    out = []
+    for node in _iter_suggestions(payload):
+        k = (node["type"], str(node["id"]))
+        if k in seen:
+            continue
+        seen.add(k)
+        out.append(_candidate(node, len(out)))
+    return out
+
+
+def search_fotmob(query: str, kinds: list[str] | tuple | None = None, limit: int = 10, timeout: float = 10) -> list[dict]:
+    """
+    Ranked FotMob candidates for query. Each candidate has kind, id, name and score.
+    Raises FotmobSearchError if the search API is unusable.
+    """
+    kinds = tuple(kinds) if kinds else SEARCH_KINDS
+    candidates = _suggest(query, timeout)
+
+    # "chelsea vs benfica" usually isn't a suggest term; search one side and
+    # keep the fixtures whose opponent matches the other
+    sides = match_sides(query)
+    if "match" in kinds and len(sides) == 2 and not any(c["kind"] == "match" for c in candidates):
+        candidates.extend(_suggest(sides[0], timeout))
+
+    wanted = [c for c in candidates if c["kind"] in kinds]
+    return _rank(query, wanted, time.time())[: max(1, int(limit))]
+
+
+def resolve_id_via_search(kind: str, query: str) -> str | None:
+    """Best id of `kind` for query from the search API, or None (caller falls back to the UI)."""
+    try:
+        candidates = search_fotmob(query, kinds=(kind,), limit=1)
+    except FotmobSearchError:
+        return None
+    if candidates and candidates[0]["score"] >= MIN_RESOLVE_SCORE:
+        return candidates[0]["id"]
+    return None
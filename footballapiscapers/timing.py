@@ -0,0 +1,125 @@
+"""
+Phase timings for the FotMob scrapers.
+
+The scrapers record how long each step takes (id resolution, browser search,
+API fetch) into a shared PhaseTimer; GET /football/timings reports them.
+
+Run as a module to compare browser profiles on the search -> id -> API path:
+
+    python -m footballapiscapers.timing --kind match --query "chelsea vs benfica" --runs 3
+"""
+from __future__ import annotations
+import time
+import threading
+import statistics
+from collections import deque
+from contextlib import contextmanager
+
+SAMPLES_PER_PHASE = 200
+
+
+class PhaseTimer:
+    def __init__(self, samples: int = SAMPLES_PER_PHASE):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._phases: dict[str, deque] = {}
+
+    def record(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self._phases.setdefault(phase, deque(maxlen=self.samples)).append(seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            phases = {k: list(v) for k, v in self._phases.items()}
+        out = {}
+        for name, xs in sorted(phases.items()):
+            ordered = sorted(xs)
+            out[name] = {
+                "count": len(xs),
+                "avg_ms": round(statistics.fmean(xs) * 1000.0, 1),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000.0, 1),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000.0, 1),
+                "max_ms": round(ordered[-1] * 1000.0, 1),
+                "last_ms": round(xs[-1] * 1000.0, 1),
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._phases.clear()
+
+
+FOTMOB_TIMER = PhaseTimer()
+
+
+def _compare_profiles(kind: str, query: str, runs: int, chromedriver_path: str) -> None:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    from browserpool.network_tap import network_tap
+    from footballapiscapers.fotmob_browser import FOTMOB_API_PATTERNS, FotmobBrowserProfile
+    from footballapiscapers.fotmob_session import fetch_fotmob_json, get_fotmob_session
+    from footballapiscapers.league import _search_league_in_browser
+    from footballapiscapers.match import _search_match_in_browser
+    from footballapiscapers.player import _search_player_in_browser
+
+    targets = {
+        "match": (_search_match_in_browser, "matchDetails", "https://www.fotmob.com/api/data/matchDetails?matchId={}"),
+        "player": (_search_player_in_browser, "playerData", "https://www.fotmob.com/api/data/playerData?id={}"),
+        "league": (_search_league_in_browser, "tltable", "https://www.fotmob.com/api/data/tltable?leagueId={}"),
+    }
+    search, marker, api_fmt = targets[kind]
+    profiles = [
+        ("full page", FotmobBrowserProfile(block=(), page_load_strategy="normal")),
+        ("lean", FotmobBrowserProfile()),
+    ]
+
+    results = {}
+    for label, profile in profiles:
+        timer = PhaseTimer()
+        for i in range(runs):
+            # every run starts cold: new browser, no captured session
+            get_fotmob_session().invalidate()
+            t_total = time.perf_counter()
+            with timer.phase("launch"):
+                driver = webdriver.Chrome(service=Service(executable_path=chromedriver_path), options=profile.options())
+                profile.setup(driver)
+            try:
+                with network_tap(driver, FOTMOB_API_PATTERNS) as tap:
+                    with timer.phase("search"):
+                        entity_id, current_url = search(driver, query)
+                    with timer.phase("api"):
+                        fetch_fotmob_json(api_fmt.format(entity_id), url_marker=marker, entity_id=entity_id,
+                                          page_url=current_url, driver=driver, tap=tap)
+            finally:
+                driver.quit()
+            timer.record("total", time.perf_counter() - t_total)
+            print(f"[timing] {label} run {i + 1}/{runs}: {time.perf_counter() - t_total:.2f}s ({profile.describe()})")
+        results[label] = timer.stats()
+
+    base, lean = results["full page"], results["lean"]
+    print(f"\n{kind} '{query}', {runs} run(s), median ms")
+    print(f"{'phase':<8}{'full page':>12}{'lean':>12}{'speedup':>10}")
+    for name in ("launch", "search", "api", "total"):
+        a, b = base[name]["p50_ms"], lean[name]["p50_ms"]
+        print(f"{name:<8}{a:>12.0f}{b:>12.0f}{(a / b if b else 0):>9.2f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare full-page and lean FotMob browser profiles.")
+    parser.add_argument("--kind", choices=("match", "player", "league"), default="match")
+    parser.add_argument("--query", default="chelsea vs benfica")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--chromedriver", default="./chromedriver")
+    args = parser.parse_args()
+    _compare_profiles(args.kind, args.query, max(1, args.runs), args.chromedriver)
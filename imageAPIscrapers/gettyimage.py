@@ -4,12 +4,18 @@ import time
 import random
 
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from browserpool.cdp_async import lease_page
+from browserpool.driver_pool import lease_driver
+
+GETTY_PROFILE = "getty"
+# AsyncBrowserPool / lease_page settings for the CDP backend
+CDP_SETTINGS = {"args": ["--disable-gpu"]}
+
 
 def human_type(element, text, min_delay=0.05, max_delay=0.18):
     for ch in text:
@@ -17,17 +23,19 @@ def human_type(element, text, min_delay=0.05, max_delay=0.18):
         time.sleep(random.uniform(min_delay, max_delay))
 
 
+def build_chrome_options(headless: bool = False) -> webdriver.ChromeOptions:
+    options = webdriver.ChromeOptions()
+    if headless:  # pooled browsers run without a display
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    return options
+
+
 def scrape_image(player_search_query: str, chromedriver_path: str) -> str:
     """
     Scrape Getty Images for a player image and return JSON with image URL.
     """
-    service = Service(chromedriver_path)
-    options = webdriver.ChromeOptions()
-    # options.add_argument("--headless")  # Uncomment for headless operation
-    options.add_argument("--disable-gpu")
-    driver = webdriver.Chrome(service=service, options=options)
-
-    try:
+    with lease_driver(GETTY_PROFILE, chromedriver_path, build_chrome_options) as driver:
         driver.get("https://www.gettyimages.com")
 
         # Type search query
@@ -86,5 +94,42 @@ def scrape_image(player_search_query: str, chromedriver_path: str) -> str:
             "image_url": core_src
         })
 
-    finally:
-        driver.quit()
+
+async def scrape_image_async(player_search_query: str) -> str:
+    """
+    scrape_image over the asyncio CDP backend: same page flow, no thread held
+    while waiting on the page.
+    """
+    gallery = "div[data-testid='gallery-items-container']"
+    async with lease_page(GETTY_PROFILE, **CDP_SETTINGS) as page:
+        await page.goto("https://www.gettyimages.com")
+
+        # Type search query
+        await page.wait_for("input[placeholder*='Search the']", timeout=15)
+        await page.type("input[placeholder*='Search the']", player_search_query)
+        await page.press_enter()
+
+        # Wait for gallery to load
+        await page.wait_for(gallery, timeout=15)
+
+        # Click Filters, then "Newest"
+        await page.wait_for("button[data-testid='search-nav__filters-toggle-edit']", timeout=15, visible=True)
+        await page.click("button[data-testid='search-nav__filters-toggle-edit']")
+        await page.wait_for("#sortorder-newest", timeout=15, visible=True)
+        await page.click("#sortorder-newest")
+
+        # Wait for refreshed gallery
+        await page.wait_for(f"{gallery} img", timeout=15)
+
+        core_src = await page.evaluate(
+            f"(() => {{ const items = document.querySelectorAll({json.dumps(gallery + ' div[data-testid=galleryMosaicAsset]')});"
+            " if (items.length < 2) return null;"
+            " const img = items[1].querySelector('img'); return img ? img.src : ''; })()"
+        )
+        if core_src is None:
+            raise Exception("Not enough items found after applying filter")
+
+        return json.dumps({
+            "query": player_search_query,
+            "image_url": core_src
+        })
@@ -1,14 +1,21 @@
 import json
 import time
 import random
+import asyncio
 
 from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+from browserpool.cdp_async import lease_page
+from browserpool.driver_pool import lease_driver
+
+IMGFLIP_PROFILE = "imgflip"
+# AsyncBrowserPool / lease_page settings for the CDP backend (same CSS block as setup_driver)
+CDP_SETTINGS = {"args": ["--disable-gpu"], "blocked_urls": ["*.css"]}
+
 
 def human_type(element, text, min_delay=0.05, max_delay=0.18):
     """Simulates human typing into an input element."""
@@ -17,23 +24,26 @@ def human_type(element, text, min_delay=0.05, max_delay=0.18):
         time.sleep(random.uniform(min_delay, max_delay))
 
 
-def scrape_meme(memeQuery: str, chromedriver_path: str) -> str:
-    """
-    Scrape Imgflip meme generator quickly (skip CSS load) and return JSON with meme image URL.
-    """
-    service = Service(chromedriver_path)
+def build_chrome_options(headless: bool = False) -> webdriver.ChromeOptions:
     options = webdriver.ChromeOptions()
     options.page_load_strategy = "none"   # don't wait for full page load
-    # options.add_argument("--headless")  # uncomment if needed
+    if headless:  # pooled browsers run without a display
+        options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
+    return options
 
-    driver = webdriver.Chrome(service=service, options=options)
 
+def setup_driver(driver: webdriver.Chrome) -> None:
     # 🚫 Block CSS files
     driver.execute_cdp_cmd("Network.enable", {})
     driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": ["*.css"]})
 
-    try:
+
+def scrape_meme(memeQuery: str, chromedriver_path: str) -> str:
+    """
+    Scrape Imgflip meme generator quickly (skip CSS load) and return JSON with meme image URL.
+    """
+    with lease_driver(IMGFLIP_PROFILE, chromedriver_path, build_chrome_options, setup=setup_driver) as driver:
         print("Navigating to Imgflip...")
         driver.get("https://imgflip.com/memegenerator")
 
@@ -80,5 +90,44 @@ def scrape_meme(memeQuery: str, chromedriver_path: str) -> str:
             "image_url": img_url
         })
 
-    finally:
-        driver.quit()
+
+async def scrape_meme_async(memeQuery: str) -> str:
+    """
+    scrape_meme over the asyncio CDP backend. Like page_load_strategy "none",
+    navigation doesn't wait for the page; only for the search input.
+    """
+    search = "input[placeholder='Search all memes']"
+    async with lease_page(IMGFLIP_PROFILE, **CDP_SETTINGS) as page:
+        print("Navigating to Imgflip...")
+        await page.goto("https://imgflip.com/memegenerator", wait_for_state=())
+
+        await page.wait_for(search, timeout=20)
+        print("Input element found. Typing...")
+        await page.evaluate(f"document.querySelector({json.dumps(search)}).value = ''")
+        await page.type(search, memeQuery)
+        await asyncio.sleep(0.6)
+
+        # Wait for dropdown results (with fallback if needed)
+        try:
+            await page.wait_for(".mm-search-result-text", timeout=8, visible=True)
+        except asyncio.TimeoutError:
+            print("Dropdown didn't appear — triggering JS fallback...")
+            await page.evaluate(
+                f"(() => {{ const el = document.querySelector({json.dumps(search)});"
+                f" el.value = {json.dumps(memeQuery)};"
+                " el.dispatchEvent(new Event('input', { bubbles: true })); })()"
+            )
+            await page.wait_for(".mm-search-result-text", timeout=8, visible=True)
+
+        # Click the first result
+        await page.click(".mm-search-result-text")
+
+        # Wait for meme image
+        await page.wait_for("img.mm-img.shadow", timeout=20, visible=True)
+        img_url = await page.attribute("img.mm-img.shadow", "src")
+        print("Image URL found:", img_url)
+
+        return json.dumps({
+            "query": memeQuery,
+            "image_url": img_url
+        })
@@ -0,0 +1,99 @@
+"""
+Async Reddit fetchers for the API's event loop.
+
+The paging logic lives in the fetch plans in scrape_reddit.py; here they are
+driven by AsyncRedditClient (httpx), so a /reddit call waiting on Reddit or on
+the rate-limit pacer is a suspended coroutine, not a threadpool thread. Token
+requests are rare (the manager caches the token for a day) and stay on the
+blocking RedditTokenManager via asyncio.to_thread. The SQLite store work the
+plans yield (StoreCall) runs through asyncio.to_thread as well.
+"""
+from __future__ import annotations
+import asyncio
+import time
+
+from socialapiscrapers.reddit_client import get_async_reddit_client
+from socialapiscrapers.reddit_store import get_reddit_store, _key
+from socialapiscrapers.scrape_reddit import (
+    LISTING_PAGES,
+    OAUTH_API_BASE,
+    REFRESH_AGE,
+    SHALLOW_NEW_PAGES,
+    StoreCall,
+    check_response,
+    incremental_plan,
+    listing_plan,
+    multireddit_plan,
+    new_listing_plan,
+    resolve_strategy,
+    strategy_plan,
+)
+
+# one incremental fetch per subreddit at a time on the loop (the store's own
+# subreddit locks are threading locks and must not be held across an await)
+_sub_locks: dict[str, asyncio.Lock] = {}
+
+
+async def reddit_get_async(path: str, params: dict, access_token: str, user_agent: str, token_manager=None, client=None):
+    """Async scrape_reddit.reddit_get. Returns (json, access_token)."""
+    client = client or get_async_reddit_client()
+    url = f"{OAUTH_API_BASE}{path}"
+    for attempt in range(2):
+        headers = {"Authorization": f"bearer {access_token}", "User-Agent": user_agent}
+        resp = await client.get(url, headers=headers, params=params, timeout=20)
+        if resp.status_code == 401 and token_manager is not None and attempt == 0:
+            access_token = await asyncio.to_thread(token_manager.refresh, access_token)
+            continue
+        break
+    check_response(resp)
+    return resp.json(), access_token
+
+
+async def run_plan_async(plan, access_token: str, user_agent: str, token_manager=None, client=None):
+    """Async scrape_reddit.run_plan; store calls run in a worker thread, off the loop."""
+    try:
+        step = next(plan)
+        while True:
+            if isinstance(step, StoreCall):
+                step = plan.send(await asyncio.to_thread(step))
+                continue
+            j, access_token = await reddit_get_async(*step, access_token, user_agent, token_manager, client)
+            step = plan.send(j)
+    except StopIteration as done:
+        return done.value
+
+
+async def fetch_subreddit_new_async(subreddit: str, access_token: str, user_agent: str, cutoff_ts: int, page_limit: int = 100,
+                                    max_pages: int = 50, token_manager=None, client=None):
+    plan = new_listing_plan(subreddit, cutoff_ts, page_limit, max_pages)
+    return await run_plan_async(plan, access_token, user_agent, token_manager, client)
+
+
+async def fetch_subreddit_incremental_async(subreddit: str, access_token: str, user_agent: str, cutoff_ts: int,
+                                            page_limit: int = 100, max_pages: int = 50, token_manager=None, client=None,
+                                            store=None, refresh_age: float = REFRESH_AGE):
+    store = store or get_reddit_store()
+    async with _sub_locks.setdefault(_key(subreddit), asyncio.Lock()):
+        plan = incremental_plan(store, subreddit, cutoff_ts, page_limit, max_pages, refresh_age)
+        return await run_plan_async(plan, access_token, user_agent, token_manager, client)
+
+
+async def fetch_multireddit_new_async(subreddits: list[str], access_token: str, user_agent: str, cutoffs: dict,
+                                      page_limit: int = 100, max_pages: int = 50, token_manager=None, client=None):
+    plan = multireddit_plan(subreddits, cutoffs, page_limit, max_pages)
+    return await run_plan_async(plan, access_token, user_agent, token_manager, client)
+
+
+async def fetch_subreddit_listing_async(subreddit: str, listing: str, access_token: str, user_agent: str, cutoff_ts: int,
+                                        t: str | None = None, page_limit: int = 100, max_pages: int = LISTING_PAGES,
+                                        token_manager=None, client=None):
+    plan = listing_plan(subreddit, listing, cutoff_ts, page_limit, max_pages, t)
+    return await run_plan_async(plan, access_token, user_agent, token_manager, client)
+
+
+async def fetch_subreddit_strategy_async(subreddit: str, strategy: str, access_token: str, user_agent: str, cutoff_ts: int,
+                                         page_limit: int = 100, max_pages: int = 50, listing_pages: int = LISTING_PAGES,
+                                         shallow_pages: int = SHALLOW_NEW_PAGES, token_manager=None, client=None):
+    listing, t = resolve_strategy(strategy, time.time() - cutoff_ts)
+    plan = strategy_plan(subreddit, listing, t, cutoff_ts, page_limit, max_pages, listing_pages, shallow_pages)
+    return await run_plan_async(plan, access_token, user_agent, token_manager, client)
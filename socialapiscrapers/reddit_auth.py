@@ -0,0 +1,152 @@
+"""
+Process-wide Reddit OAuth token cache.
+
+A password-grant token is valid for `expires_in` seconds (a day), so there is
+no reason to fetch one per /reddit call. RedditTokenManager keeps the current
+token, refreshes it in a background thread REDDIT_TOKEN_REFRESH_MARGIN seconds
+(default 300) before it expires, and makes concurrent callers that find it
+stale share a single token request. refresh(stale=token) is what a caller that
+got a 401 uses: if someone else already replaced that token, the new one is
+returned without another round trip.
+"""
+from __future__ import annotations
+import os
+import time
+import threading
+
+from socialapiscrapers.scrape_reddit import request_oauth_token
+
+REFRESH_MARGIN = float(os.getenv("REDDIT_TOKEN_REFRESH_MARGIN", "300"))
+# wait before retrying a failed background refresh (the current token may still be good)
+RETRY_DELAY = 30.0
+
+
+class RedditTokenManager:
+    def __init__(self, client_id: str, client_secret: str, username: str, password: str, user_agent: str,
+                 refresh_margin: float = REFRESH_MARGIN, background: bool = True):
+        self.credentials = (client_id, client_secret, username, password, user_agent)
+        self.refresh_margin = float(refresh_margin)
+        self.background = background
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        # held while a token request is in flight; callers queue on it and reuse the result
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats = {"requests": 0, "failures": 0, "cache_hits": 0, "forced": 0}
+
+    def _fresh(self, now: float | None = None) -> bool:
+        return self._token is not None and (now or time.time()) < self._expires_at - self.refresh_margin
+
+    def token(self) -> str:
+        """The cached token, fetching one first if there is none or it is about to expire."""
+        with self._lock:
+            if self._fresh():
+                self._stats["cache_hits"] += 1
+                return self._token
+            current = self._token
+        return self.refresh(stale=current, force=False)
+
+    def refresh(self, stale: str | None = None, force: bool = True) -> str:
+        """
+        Fetch a new token unless one newer than `stale` is already in place.
+        Concurrent callers wait for the request in flight instead of sending their own.
+        """
+        with self._refresh_lock:
+            with self._lock:
+                if self._token is not None and self._token != stale and time.time() < self._expires_at:
+                    return self._token
+                if not force and self._fresh():
+                    return self._token
+                if force:
+                    self._stats["forced"] += 1
+                self._stats["requests"] += 1
+            try:
+                j = request_oauth_token(*self.credentials)
+            except Exception:
+                with self._lock:
+                    self._stats["failures"] += 1
+                raise
+            with self._lock:
+                self._token = j["access_token"]
+                self._expires_at = time.time() + float(j.get("expires_in") or 3600)
+                token = self._token
+        if self.background:
+            self._ensure_thread()
+            self._wake.set()
+        return token
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+
+    # ---- background refresh ----
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="reddit-token", daemon=True)
+        self._thread.start()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                delay = self._expires_at - self.refresh_margin - time.time() if self._token else None
+            if delay is None:
+                # nothing to keep warm until someone asks for a token
+                self._wake.wait()
+            elif delay > 0:
+                self._wake.wait(delay)
+            else:
+                try:
+                    self.refresh(stale=self._token, force=False)
+                except Exception as e:
+                    print(f"[reddit-auth] background refresh failed: {e}")
+                    self._stop.wait(RETRY_DELAY)
+                continue
+            self._wake.clear()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                has_token=self._token is not None,
+                expires_in=round(max(0.0, self._expires_at - time.time()), 1) if self._token else None,
+                background=self._thread is not None and self._thread.is_alive(),
+            )
+
+
+_manager: RedditTokenManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_reddit_token_manager(client_id: str, client_secret: str, username: str, password: str,
+                             user_agent: str) -> RedditTokenManager:
+    """The shared manager; rebuilt if the credentials change."""
+    global _manager
+    credentials = (client_id, client_secret, username, password, user_agent)
+    with _manager_lock:
+        if _manager is None or _manager.credentials != credentials:
+            if _manager is not None:
+                _manager.close()
+            _manager = RedditTokenManager(*credentials)
+        return _manager
+
+
+def close_reddit_token_manager() -> None:
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+            _manager = None
@@ -0,0 +1,241 @@
+"""
+Pooled Reddit HTTP client that paces itself from Reddit's rate-limit headers.
+
+Every OAuth response carries X-Ratelimit-Remaining (requests left in the
+current window) and X-Ratelimit-Reset (seconds until the window resets).
+RedditClient keeps one keep-alive session for all calls and decides the gap
+before each request from those numbers instead of sleeping a fixed second:
+
+- plenty of budget left (more than `burst` requests): no delay at all
+- budget running low: the remaining requests are spread evenly over what is
+  left of the window
+- at the reserve: wait for the window to reset
+- 429 / 5xx: back off (Retry-After or the reset time, else exponential) and retry
+
+State is shared by every thread using the client, so concurrent /reddit
+calls draw from one budget. AsyncRedditClient is the same on httpx for the
+async endpoint: the waits are `await asyncio.sleep`, so no thread is held.
+"""
+from __future__ import annotations
+import os
+import time
+import random
+import asyncio
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+# below this many remaining requests, start spreading them out
+BURST = float(os.getenv("REDDIT_RATELIMIT_BURST", "60"))
+# requests kept back for other callers / clock skew; at the reserve we wait for the reset
+RESERVE = float(os.getenv("REDDIT_RATELIMIT_RESERVE", "5"))
+MAX_RETRIES = 4
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _header_float(headers, name: str) -> float | None:
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Pacer:
+    """Rate-limit bookkeeping shared by the sync and async clients."""
+
+    def __init__(self, burst: float = BURST, reserve: float = RESERVE, max_retries: int = MAX_RETRIES):
+        self.burst = float(burst)
+        self.reserve = float(reserve)
+        self.max_retries = int(max_retries)
+        self._lock = threading.Lock()
+        self._remaining: float | None = None
+        self._reset_at = 0.0
+        self._next_at = 0.0
+        self._stats = {"requests": 0, "throttled_s": 0.0, "retries": 0, "rate_limited": 0}
+
+    # ---- pacing ----
+
+    def _gap(self, now: float) -> float:
+        # caller holds self._lock
+        if self._remaining is None or now >= self._reset_at:
+            return 0.0
+        window_left = self._reset_at - now
+        if self._remaining <= self.reserve:
+            return window_left
+        if self._remaining > self.burst:
+            return 0.0
+        return window_left / (self._remaining - self.reserve)
+
+    def _reserve_slot(self) -> float:
+        """Seconds to wait before sending; books the slot so parallel callers queue behind it."""
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next_at)
+            if self._remaining is not None and start < self._reset_at:
+                if self._remaining <= self.reserve:
+                    # budget spent: wait for the next window
+                    start = self._reset_at
+                else:
+                    # optimistic: this request will consume one unit of budget
+                    self._remaining -= 1
+            self._next_at = start + self._gap(start)
+            return start - now
+
+    def _observe(self, resp) -> None:
+        remaining = _header_float(resp.headers, "X-Ratelimit-Remaining")
+        reset = _header_float(resp.headers, "X-Ratelimit-Reset")
+        if remaining is None or reset is None:
+            return
+        with self._lock:
+            self._remaining = remaining
+            self._reset_at = time.time() + reset
+
+    def _backoff(self, resp, attempt: int) -> float:
+        if resp is not None:
+            retry_after = _header_float(resp.headers, "Retry-After")
+            if retry_after is not None:
+                return retry_after
+            if resp.status_code == 429:
+                reset = _header_float(resp.headers, "X-Ratelimit-Reset")
+                if reset is not None:
+                    return reset + 1.0
+        return min(60.0, 2.0 ** attempt) + random.uniform(0, 0.5)
+
+    def _before_send(self) -> float:
+        wait = self._reserve_slot()
+        if wait > 0:
+            with self._lock:
+                self._stats["throttled_s"] += wait
+        return wait
+
+    def _done(self, resp, attempt: int) -> bool:
+        """Record a response; True if it should be returned to the caller (not retried)."""
+        with self._lock:
+            self._stats["requests"] += 1
+        self._observe(resp)
+        return resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries
+
+    def _retry_delay(self, resp, attempt: int, url: str) -> float:
+        """Seconds the caller itself sleeps before retrying (0 for a 429: _reserve_slot waits that out for everyone)."""
+        delay = self._backoff(resp, attempt)
+        rate_limited = resp is not None and resp.status_code == 429
+        with self._lock:
+            self._stats["retries"] += 1
+            if rate_limited:
+                self._stats["rate_limited"] += 1
+                self._remaining = 0.0
+                self._reset_at = time.time() + delay
+        print(f"[reddit] {resp.status_code if resp is not None else 'connection error'} on {url}; retrying in {delay:.1f}s")
+        return 0.0 if rate_limited else delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            s = dict(self._stats)
+            remaining, reset_in = self._remaining, max(0.0, self._reset_at - time.time())
+        s["throttled_s"] = round(s["throttled_s"], 2)
+        s["remaining"] = remaining
+        s["reset_in"] = round(reset_in, 1)
+        return s
+
+
+class RedditClient(_Pacer):
+    def __init__(self, burst: float = BURST, reserve: float = RESERVE, max_retries: int = MAX_RETRIES,
+                 pool_maxsize: int = 16):
+        super().__init__(burst, reserve, max_retries)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+    def request(self, method: str, url: str, timeout: float = 20, **kwargs) -> requests.Response:
+        """Send with pacing; 429/5xx and connection errors are retried with backoff. Other statuses are returned."""
+        attempt = 0
+        while True:
+            wait = self._before_send()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                resp = self.http.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                resp = None
+            else:
+                if self._done(resp, attempt):
+                    return resp
+            delay = self._retry_delay(resp, attempt, url)
+            if delay > 0:
+                time.sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+
+class AsyncRedditClient(_Pacer):
+    def __init__(self, burst: float = BURST, reserve: float = RESERVE, max_retries: int = MAX_RETRIES,
+                 max_connections: int = 16):
+        super().__init__(burst, reserve, max_retries)
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=20,
+        )
+
+    async def request(self, method: str, url: str, timeout: float = 20, **kwargs) -> httpx.Response:
+        """Async RedditClient.request."""
+        attempt = 0
+        while True:
+            wait = self._before_send()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                resp = await self.http.request(method, url, timeout=timeout, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException):
+                if attempt >= self.max_retries:
+                    raise
+                resp = None
+            else:
+                if self._done(resp, attempt):
+                    return resp
+            delay = self._retry_delay(resp, attempt, url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+
+_client: RedditClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_reddit_client() -> RedditClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RedditClient()
+        return _client
+
+
+_async_client: AsyncRedditClient | None = None
+
+
+def get_async_reddit_client() -> AsyncRedditClient:
+    """The shared async client (create and use it on the app's event loop)."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncRedditClient()
+    return _async_client
+
+
+async def close_async_reddit_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
@@ -0,0 +1,217 @@
+"""
+Persistent per-subreddit post store for incremental Reddit fetching.
+
+For every subreddit the store keeps the posts seen so far plus the contiguous
+stretch of /new it covers: the newest post (high-water mark) and the oldest
+post of the last page walked (low-water mark). A /reddit call then only pages
+/new for posts newer than the high-water mark (`before=`), walks further back
+(`after=` the low-water mark) only if the requested window reaches past what
+is stored, and re-reads scores/comment counts of stored posts in batches of
+100 through /api/info. The ranked answer is assembled from the store.
+
+Posts older than REDDIT_STORE_MAX_DAYS (default 14) are pruned.
+"""
+from __future__ import annotations
+import os
+import time
+import sqlite3
+import threading
+
+MAX_AGE_DAYS = float(os.getenv("REDDIT_STORE_MAX_DAYS", "14"))
+POST_FIELDS = ("id", "name", "created_utc", "title", "score", "num_comments", "total_awards_received", "permalink", "author")
+
+
+def _key(subreddit: str) -> str:
+    return (subreddit or "").strip().lower()
+
+
+class RedditStore:
+    def __init__(self, path: str, max_age_days: float = MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = float(max_age_days) * 86400.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                name TEXT PRIMARY KEY,
+                subreddit TEXT NOT NULL,
+                id TEXT,
+                created_utc INTEGER NOT NULL,
+                title TEXT,
+                score INTEGER,
+                num_comments INTEGER,
+                total_awards_received INTEGER,
+                permalink TEXT,
+                author TEXT,
+                refreshed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS posts_sub_created ON posts (subreddit, created_utc)")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS marks (
+                subreddit TEXT PRIMARY KEY,
+                newest_name TEXT,
+                newest_created INTEGER,
+                oldest_name TEXT,
+                oldest_created INTEGER,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        # one fetch per subreddit at a time; a second caller waits and reuses the store
+        self._sub_locks: dict[str, threading.Lock] = {}
+
+    def subreddit_lock(self, subreddit: str) -> threading.Lock:
+        with self._lock:
+            return self._sub_locks.setdefault(_key(subreddit), threading.Lock())
+
+    # ---- marks ----
+
+    def marks(self, subreddit: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT newest_name, newest_created, oldest_name, oldest_created, exhausted, updated_at"
+                " FROM marks WHERE subreddit = ?", (_key(subreddit),)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        keys = ("newest_name", "newest_created", "oldest_name", "oldest_created", "exhausted", "updated_at")
+        return dict(zip(keys, row))
+
+    def set_marks(self, subreddit: str, newest: dict | None = None, oldest: dict | None = None,
+                  exhausted: bool | None = None) -> None:
+        """Move the high-water (newest) and/or low-water (oldest) mark to the given posts."""
+        current = self.marks(subreddit) or {}
+        if newest is not None:
+            current["newest_name"], current["newest_created"] = newest["name"], int(newest["created_utc"])
+        if oldest is not None:
+            current["oldest_name"], current["oldest_created"] = oldest["name"], int(oldest["created_utc"])
+        if exhausted is not None:
+            current["exhausted"] = int(exhausted)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO marks (subreddit, newest_name, newest_created, oldest_name, oldest_created,"
+                " exhausted, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    _key(subreddit), current.get("newest_name"), current.get("newest_created"),
+                    current.get("oldest_name"), current.get("oldest_created"), current.get("exhausted", 0), time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def reset(self, subreddit: str) -> None:
+        """Forget the marks (the stored posts stay, and are overwritten as they are seen again)."""
+        with self._lock:
+            self._db.execute("DELETE FROM marks WHERE subreddit = ?", (_key(subreddit),))
+            self._db.commit()
+
+    # ---- posts ----
+
+    def upsert(self, subreddit: str, posts: list[dict]) -> int:
+        if not posts:
+            return 0
+        now = time.time()
+        rows = [
+            (p["name"], _key(subreddit), *(p.get(f) for f in POST_FIELDS if f != "name"), now)
+            for p in posts if p.get("name")
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO posts (name, subreddit, id, created_utc, title, score, num_comments,"
+                " total_awards_received, permalink, author, refreshed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def update_counts(self, posts: list[dict]) -> int:
+        """Store fresh score / num_comments / awards for posts we already have."""
+        now = time.time()
+        rows = [
+            (p.get("score", 0), p.get("num_comments", 0), p.get("total_awards_received", 0), now, p["name"])
+            for p in posts if p.get("name")
+        ]
+        with self._lock:
+            cur = self._db.executemany(
+                "UPDATE posts SET score = ?, num_comments = ?, total_awards_received = ?, refreshed_at = ? WHERE name = ?",
+                rows,
+            )
+            self._db.commit()
+            return cur.rowcount
+
+    def stale_names(self, subreddit: str, cutoff_ts: int, older_than: float) -> list[str]:
+        """Fullnames of stored posts in the window whose counts were last read before `older_than`."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name FROM posts WHERE subreddit = ? AND created_utc >= ? AND refreshed_at < ?"
+                " ORDER BY created_utc DESC",
+                (_key(subreddit), int(cutoff_ts), float(older_than)),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def posts(self, subreddit: str, cutoff_ts: int) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(POST_FIELDS)} FROM posts WHERE subreddit = ? AND created_utc >= ?"
+                " ORDER BY created_utc DESC",
+                (_key(subreddit), int(cutoff_ts)),
+            ).fetchall()
+        return [dict(zip(POST_FIELDS, r)) for r in rows]
+
+    def prune(self, subreddit: str, now: float | None = None) -> int:
+        """Drop posts past max age; the low-water mark moves up to the oldest post kept."""
+        if self.max_age <= 0:
+            return 0
+        cutoff = int((now or time.time()) - self.max_age)
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM posts WHERE subreddit = ? AND created_utc < ?", (_key(subreddit), cutoff)
+            ).rowcount
+            self._db.commit()
+        marks = self.marks(subreddit)
+        if removed and marks and (marks["oldest_created"] or 0) < cutoff:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT name, created_utc FROM posts WHERE subreddit = ? ORDER BY created_utc ASC LIMIT 1",
+                    (_key(subreddit),),
+                ).fetchone()
+            if row is None:
+                self.reset(subreddit)
+            else:
+                self.set_marks(subreddit, oldest={"name": row[0], "created_utc": row[1]}, exhausted=False)
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT subreddit, COUNT(*) FROM posts GROUP BY subreddit").fetchall())
+            marks = self._db.execute("SELECT subreddit, newest_created, oldest_created, updated_at FROM marks").fetchall()
+        return {
+            sub: {
+                "posts": counts.get(sub, 0),
+                "newest_created": newest,
+                "oldest_created": oldest,
+                "updated_at": updated,
+            }
+            for sub, newest, oldest, updated in marks
+        }
+
+
+_store: RedditStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_reddit_store() -> RedditStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            data_dir = os.getenv("CONTENTWORK_DATA_DIR", os.path.expanduser("~/.cache/contentwork"))
+            _store = RedditStore(os.getenv("REDDIT_STORE_PATH", os.path.join(data_dir, "reddit_posts.sqlite3")))
+        return _store
@@ -21,6 +21,7 @@ import argparse
 import math
 import asyncio
 import json
+import time
 import telethon
 from datetime import datetime, timedelta, timezone
 from telethon import TelegramClient
@@ -28,6 +29,13 @@ from telethon import errors as tele_errors
 from telethon.errors import rpcerrorlist
 from telethon.sessions import StringSession
 
+from socialapiscrapers.telegram_store import get_telegram_store
+
+# stored messages whose metrics are older than this are re-read
+REFRESH_AGE = float(os.getenv("TELEGRAM_REFRESH_AGE", "120"))
+# message ids per get_messages call when re-reading metrics
+METRICS_BATCH = 100
+
 # ---------- Helpers (kept from your original) ----------
 
 def safe_text_from_msg(msg) -> str:
@@ -102,6 +110,33 @@ def extract_replies_count(msg) -> int:
     return 0
 
 
+def message_date_utc(msg):
+    """The message date as timezone-aware UTC (None if it has none)."""
+    if not getattr(msg, "date", None):
+        return None
+    try:
+        return msg.date.astimezone(timezone.utc)
+    except Exception:
+        # fallback: treat as naive UTC
+        return msg.date.replace(tzinfo=timezone.utc)
+
+
+def message_entry(msg, msg_date_utc=None) -> dict:
+    """The fields we rank and return for one message."""
+    msg_date_utc = msg_date_utc or message_date_utc(msg)
+    reactions_total, reactions_breakdown = extract_reactions(msg)
+    return {
+        "id": getattr(msg, "id", None),
+        "date": msg_date_utc.isoformat() if msg_date_utc else None,
+        "text": safe_text_from_msg(msg),
+        "views": getattr(msg, "views", None),
+        "forwards": getattr(msg, "forwards", None),
+        "replies": extract_replies_count(msg),
+        "reactions_total": reactions_total,
+        "reactions_breakdown": reactions_breakdown,
+    }
+
+
 def pretty_time(dt_or_iso):
     if dt_or_iso is None:
         return "N/A"
@@ -134,6 +169,15 @@ def compute_engagement_telegram(metrics: dict, alpha: float, beta: float, delta:
     return part_v + part_f + part_r + part_rx
 
 
+def rank_messages(posts: list, alpha: float = 1.5, beta: float = 1.0, delta: float = 1.0, gamma: float = 2.0, award_scale: float = 1.0):
+    """Score posts in place and sort them best first."""
+    for p in posts:
+        p["_engagement_score"] = compute_engagement_telegram(
+            p, alpha=alpha, beta=beta, delta=delta, gamma=gamma, award_scale=award_scale
+        )
+    posts.sort(key=lambda x: x["_engagement_score"], reverse=True)
+
+
 # ---------- Session / login helpers ----------
 
 async def get_client(api_id: int, api_hash: str, session_path: str | None, string_session: str | None, interactive_phone: bool = True):
@@ -184,6 +228,24 @@ async def get_client(api_id: int, api_hash: str, session_path: str | None, strin
 
 # ---------- Main async routine (adapted) ----------
 
+def save_aggregated_json(out_json: str, channel: str, days: float, posts: list, alpha: float, beta: float, delta: float, gamma: float):
+    agg = {
+        "meta": {
+            "channel": channel,
+            "days": days,
+            "scraped_at": datetime.now(timezone.utc).isoformat(),
+            "alpha": alpha,
+            "beta": beta,
+            "delta": delta,
+            "gamma": gamma,
+        },
+        "posts": posts,
+    }
+    with open(out_json, "w", encoding="utf-8") as fh:
+        json.dump(agg, fh, ensure_ascii=False, indent=2)
+    print(f"\nSaved aggregated JSON to {out_json}")
+
+
 async def scrape_channel(
     api_id: int,
     api_hash: str,
@@ -201,7 +263,13 @@ async def scrape_channel(
     session_path: str | None,
     string_session: str | None,
     do_login_and_print_string: bool,
+    client: TelegramClient | None = None,
 ):
+    """
+    Pass `client` to scrape with an already connected client (see telegram_client);
+    it is left connected, and connection errors and FloodWaits are raised for its owner to handle.
+    Without one, a client is connected for this call and disconnected at the end.
+    """
     # If user asked only to create a login string session, do that and exit.
     if do_login_and_print_string:
         # Use an in-memory StringSession so we can export the session string
@@ -243,8 +311,15 @@ async def scrape_channel(
         return
 
     # Normal scraping flow
-    client = await get_client(api_id, api_hash, session_path, string_session, interactive_phone=False)
+    shared = client is not None
+    if not shared:
+        client = await get_client(api_id, api_hash, session_path, string_session, interactive_phone=False)
     # client is connected & authorized
+
+    async def release():
+        if not shared:
+            await client.disconnect()
+
     since = datetime.now(timezone.utc) - timedelta(days=days)
 
     posts = []
@@ -254,36 +329,14 @@ async def scrape_channel(
             if not getattr(msg, "date", None):
                 continue
 
-            # get msg date as timezone-aware UTC
-            try:
-                msg_date_utc = msg.date.astimezone(timezone.utc) if getattr(msg, "date", None) else None
-            except Exception:
-                # fallback: treat as naive UTC
-                msg_date_utc = msg.date.replace(tzinfo=timezone.utc) if getattr(msg, "date", None) else None
-
+            msg_date_utc = message_date_utc(msg)
             if msg_date_utc is None:
                 continue
             if msg_date_utc < since:
                 break
 
             count += 1
-            text = safe_text_from_msg(msg)
-            views = getattr(msg, "views", None)
-            forwards = getattr(msg, "forwards", None)
-            replies = extract_replies_count(msg)
-            reactions_total, reactions_breakdown = extract_reactions(msg)
-
-            entry = {
-                "id": getattr(msg, "id", None),
-                "date": msg_date_utc.isoformat() if msg_date_utc else None,
-                "text": text,
-                "views": views,
-                "forwards": forwards,
-                "replies": replies,
-                "reactions_total": reactions_total,
-                "reactions_breakdown": reactions_breakdown,
-            }
-
+            entry = message_entry(msg, msg_date_utc)
             posts.append(entry)
 
             if out_jsonl:
@@ -295,24 +348,22 @@ async def scrape_channel(
         print("You are likely authenticated as a bot (bot token). Bots cannot fetch channel history.")
         print("Use a user session with API_ID and API_HASH (create at https://my.telegram.org/apps) and login once.")
         print("\nDetailed error from Telethon:", e)
-        await client.disconnect()
+        await release()
         return []
     except KeyboardInterrupt:
         print("\nInterrupted by user. Stopping.")
-        await client.disconnect()
+        await release()
         return []
     except Exception as e:
+        # on the shared client the caller reconnects, and schedules around FloodWaits
+        if shared and isinstance(e, (ConnectionError, OSError, tele_errors.FloodWaitError)):
+            raise
         print("Unexpected error while iterating messages:", repr(e))
-        await client.disconnect()
+        await release()
         return []
 
     # compute engagement and sort
-    for p in posts:
-        p["_engagement_score"] = compute_engagement_telegram(
-            p, alpha=alpha, beta=beta, delta=delta, gamma=gamma, award_scale=award_scale
-        )
-
-    posts.sort(key=lambda x: x["_engagement_score"], reverse=True)
+    rank_messages(posts, alpha=alpha, beta=beta, delta=delta, gamma=gamma, award_scale=award_scale)
 
     top_n = min(top_n, len(posts))
     now_ts = datetime.now(timezone.utc)
@@ -334,28 +385,120 @@ async def scrape_channel(
         print(f"{rank:4d}  {views:8d}  {forwards:8d}  {replies:7d}  {reactions:9d}  {eng:11.4f}  {created:19s}  {pid:6s}  {text_line}")
 
     if out_json:
-        agg = {
-            "meta": {
-                "channel": channel,
-                "days": days,
-                "scraped_at": now_ts.isoformat(),
-                "alpha": alpha,
-                "beta": beta,
-                "delta": delta,
-                "gamma": gamma,
-            },
-            "posts": posts,
-        }
-        with open(out_json, "w", encoding="utf-8") as fh:
-            json.dump(agg, fh, ensure_ascii=False, indent=2)
-        print(f"\nSaved aggregated JSON to {out_json}")
-
-    await client.disconnect()
+        save_aggregated_json(out_json, channel, days, posts, alpha, beta, delta, gamma)
+
+    await release()
     
     # Return the posts data for API use
     return posts
 
 
+# ---------- Incremental fetch (API) ----------
+
+def _stored_entry(msg):
+    msg_date_utc = message_date_utc(msg)
+    if msg_date_utc is None:
+        return None
+    entry = message_entry(msg, msg_date_utc)
+    entry["date_ts"] = int(msg_date_utc.timestamp())
+    return entry
+
+
+async def fetch_channel_incremental(client, channel: str, days: float, store=None, refresh_age: float = REFRESH_AGE):
+    """
+    Like the scrape_channel walk, but backed by the persistent TelegramStore:
+
+    - only messages above the channel's high-water mark are fetched (iter_messages min_id=)
+    - messages below the low-water mark (offset_id=) only if the window reaches past what is stored
+    - stored messages in the window get fresh views / forwards / replies / reactions,
+      METRICS_BATCH ids per get_messages call
+
+    `client` is a connected TelegramClient. The store is SQLite, so its calls run
+    through asyncio.to_thread, off the event loop. Returns (messages in the window, report).
+    """
+    store = store or get_telegram_store()
+    since_ts = int(time.time() - days * 86400)
+    report = {"new_messages": 0, "backfilled": 0, "refreshed": 0, "deleted": 0, "metric_requests": 0, "full_walk": False}
+
+    def save(batch: list[dict], reset: bool = False, **marks):
+        # one store round trip per walk
+        if reset:
+            store.reset(channel)
+        store.upsert(channel, batch)
+        if any(v is not None for v in marks.values()):
+            store.set_marks(channel, **marks)
+
+    def load() -> dict | None:
+        store.prune(channel)
+        return store.marks(channel)
+
+    def refresh(fresh: list[dict], gone: list[int]) -> tuple[int, int]:
+        return store.update_metrics(channel, fresh), store.delete(channel, gone)
+
+    async def walk(**kwargs) -> tuple[list[dict], bool]:
+        # iter_messages from the given offset_id / min_id down to the first message before since_ts
+        batch, crossed = [], False
+        async for msg in client.iter_messages(channel, **kwargs):
+            entry = _stored_entry(msg)
+            if entry is None:
+                continue
+            batch.append(entry)
+            if entry["date_ts"] < since_ts:
+                crossed = True
+                break
+        return batch, crossed
+
+    async def walk_back(offset_id: int, counter: str):
+        # from offset_id (the newest message if 0) down past since_ts
+        batch, crossed = await walk(offset_id=offset_id)
+        report[counter] += len(batch)
+        await asyncio.to_thread(
+            save,
+            batch,
+            newest=batch[0] if batch and not offset_id else None,
+            oldest=batch[-1] if batch else None,
+            exhausted=not crossed,
+        )
+
+    async def walk_forward(min_id: int):
+        batch, crossed = await walk(min_id=min_id)
+        report["new_messages"] += len(batch)
+        if crossed:
+            # more is new than the whole window: the stored range and this one don't meet
+            report["full_walk"] = True
+            await asyncio.to_thread(save, batch, reset=True, newest=batch[0], oldest=batch[-1], exhausted=False)
+        else:
+            await asyncio.to_thread(save, batch, newest=batch[0] if batch else None)
+
+    async with store.channel_lock(channel):
+        marks = await asyncio.to_thread(load)
+        if marks is None:
+            report["full_walk"] = True
+            await walk_back(0, "new_messages")
+        else:
+            await walk_forward(marks["newest_id"])
+        marks = await asyncio.to_thread(store.marks, channel)
+        if marks and not marks["exhausted"] and (marks["oldest_ts"] or 0) >= since_ts:
+            await walk_back(marks["oldest_id"], "backfilled")
+
+        stale = await asyncio.to_thread(store.stale_ids, channel, since_ts, time.time() - refresh_age)
+        for i in range(0, len(stale), METRICS_BATCH):
+            ids = stale[i:i + METRICS_BATCH]
+            msgs = await client.get_messages(channel, ids=ids)
+            report["metric_requests"] += 1
+            fresh, gone = [], []
+            for msg_id, msg in zip(ids, msgs):
+                if msg is None:
+                    gone.append(msg_id)
+                else:
+                    fresh.append(message_entry(msg))
+            refreshed, deleted = await asyncio.to_thread(refresh, fresh, gone)
+            report["refreshed"] += refreshed
+            report["deleted"] += deleted
+
+        return await asyncio.to_thread(store.messages, channel, since_ts), report
+
+
 # ---------- CLI ----------
 
 def main():
@@ -31,12 +31,32 @@ from datetime import datetime, timezone
 import sys
 import json
 
+from socialapiscrapers.reddit_client import get_reddit_client
+from socialapiscrapers.reddit_store import get_reddit_store
+
 TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
 OAUTH_API_BASE = "https://oauth.reddit.com"
+# /api/info takes up to 100 fullnames per call
+INFO_BATCH = 100
+# stored posts whose counts are older than this are re-read from /api/info
+REFRESH_AGE = float(os.getenv("REDDIT_REFRESH_AGE", "120"))
+# subreddits per combined r/a+b+c listing
+MULTI_CHUNK = int(os.getenv("REDDIT_MULTI_CHUNK", "25"))
+# /top?t= windows, smallest first
+TOP_WINDOWS = (("hour", 3600), ("day", 86400), ("week", 7 * 86400), ("month", 30 * 86400), ("year", 365 * 86400))
+STRATEGIES = ("new", "auto", "top", "hot", "rising")
+# pages read from a ranked listing (top / hot / rising); the best posts come first there
+LISTING_PAGES = int(os.getenv("REDDIT_LISTING_PAGES", "3"))
+# /new pages read next to a ranked listing, for posts too fresh to have ranked yet
+SHALLOW_NEW_PAGES = int(os.getenv("REDDIT_SHALLOW_NEW_PAGES", "1"))
 
-def get_oauth_token(client_id: str, client_secret: str, username: str, password: str, user_agent: str, timeout: int = 20) -> str:
+class RedditAuthError(RuntimeError):
+    """Reddit answered 401: the access token expired or was revoked."""
+
+def request_oauth_token(client_id: str, client_secret: str, username: str, password: str, user_agent: str, timeout: int = 20) -> dict:
     """
-    Get OAuth2 access token using "password" grant for script apps.
+    Password grant for script apps. Returns the token response
+    ({"access_token", "expires_in", ...}).
     """
     auth = requests.auth.HTTPBasicAuth(client_id, client_secret)
     data = {"grant_type": "password", "username": username, "password": password}
@@ -45,16 +65,92 @@ def get_oauth_token(client_id: str, client_secret: str, username: str, password:
     if resp.status_code != 200:
         raise RuntimeError(f"Failed to obtain token: {resp.status_code} {resp.text}")
     j = resp.json()
-    return j["access_token"]
+    if "access_token" not in j:
+        # reddit answers 200 with {"error": "invalid_grant"} for bad credentials
+        raise RuntimeError(f"Failed to obtain token: {j.get('error') or j}")
+    return j
 
-def fetch_subreddit_new(subreddit: str, access_token: str, user_agent: str, cutoff_ts: int, page_limit: int = 100, max_pages: int = 50):
+def get_oauth_token(client_id: str, client_secret: str, username: str, password: str, user_agent: str, timeout: int = 20) -> str:
     """
-    Paginate /r/{subreddit}/new and collect posts with created_utc >= cutoff_ts.
-    Stops once it encounters posts older than cutoff (since 'new' is newest-first).
-    Returns list of post data dicts.
+    Get OAuth2 access token using "password" grant for script apps.
     """
-    headers = {"Authorization": f"bearer {access_token}", "User-Agent": user_agent}
-    url = f"{OAUTH_API_BASE}/r/{subreddit}/new"
+    return request_oauth_token(client_id, client_secret, username, password, user_agent, timeout)["access_token"]
+
+def mini_post(post: dict) -> dict:
+    """Keep only the fields we rank and display, to reduce memory."""
+    return {
+        "id": post.get("id"),
+        "name": post.get("name"),  # fullname like t3_xxx
+        "created_utc": int(post.get("created_utc", 0)),
+        "title": post.get("title"),
+        "score": post.get("score", 0),
+        "num_comments": post.get("num_comments", 0),
+        "total_awards_received": post.get("total_awards_received", 0),
+        "permalink": post.get("permalink"),
+        "author": post.get("author"),
+    }
+
+def check_response(resp) -> None:
+    if resp.status_code == 401:
+        raise RedditAuthError("Unauthorized — token probably expired or wrong credentials.")
+    if resp.status_code != 200:
+        raise RuntimeError(f"Reddit API returned {resp.status_code}: {resp.text}")
+
+def reddit_get(path: str, params: dict, access_token: str, user_agent: str, token_manager=None, client=None):
+    """
+    GET an OAuth API path through the shared pooled RedditClient (or `client`),
+    which paces requests from Reddit's rate-limit headers. With a token_manager
+    (reddit_auth.RedditTokenManager) a 401 refreshes the token and retries once.
+    Returns (json, access_token) since the token may have been replaced.
+    """
+    client = client or get_reddit_client()
+    url = f"{OAUTH_API_BASE}{path}"
+    for attempt in range(2):
+        headers = {"Authorization": f"bearer {access_token}", "User-Agent": user_agent}
+        resp = client.get(url, headers=headers, params=params, timeout=20)
+        if resp.status_code == 401 and token_manager is not None and attempt == 0:
+            access_token = token_manager.refresh(stale=access_token)
+            continue
+        break
+    check_response(resp)
+    return resp.json(), access_token
+
+# ---------- fetch plans ----------
+# The fetchers below are written as generators that yield (path, params) for
+# each API call and are sent back the decoded JSON, so the same paging logic
+# runs on the blocking client here and on the async one (reddit_async.py).
+# Store work is yielded too, as a StoreCall, and sent back its result: the
+# async driver runs it in a thread instead of on the event loop.
+
+class StoreCall:
+    """A blocking store operation yielded by a fetch plan; the driver runs it."""
+    __slots__ = ("fn", "args", "kwargs")
+
+    def __init__(self, fn, *args, **kwargs):
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+
+    def __call__(self):
+        return self.fn(*self.args, **self.kwargs)
+
+def store_call(fn, *args, **kwargs):
+    """`result = yield from store_call(store.marks, sub)` inside a plan."""
+    return (yield StoreCall(fn, *args, **kwargs))
+
+def run_plan(plan, access_token: str, user_agent: str, token_manager=None, client=None):
+    """Drive a fetch plan with blocking requests; returns the plan's result."""
+    try:
+        step = next(plan)
+        while True:
+            if isinstance(step, StoreCall):
+                step = plan.send(step())
+                continue
+            j, access_token = reddit_get(*step, access_token, user_agent, token_manager, client)
+            step = plan.send(j)
+    except StopIteration as done:
+        return done.value
+
+def new_listing_plan(subreddit: str, cutoff_ts: int, page_limit: int = 100, max_pages: int = 50):
+    """Plan for fetch_subreddit_new."""
     params = {"limit": page_limit}
     collected = []
     pages = 0
@@ -63,12 +159,8 @@ def fetch_subreddit_new(subreddit: str, access_token: str, user_agent: str, cuto
     while pages < max_pages:
         if after:
             params["after"] = after
-        resp = requests.get(url, headers=headers, params=params, timeout=20)
-        if resp.status_code == 401:
-            raise RuntimeError("Unauthorized — token probably expired or wrong credentials.")
-        if resp.status_code != 200:
-            raise RuntimeError(f"Reddit API returned {resp.status_code}: {resp.text}")
-        data = resp.json().get("data", {})
+        j = yield f"/r/{subreddit}/new", params
+        data = j.get("data", {})
         children = data.get("children", [])
         if not children:
             break
@@ -77,21 +169,8 @@ def fetch_subreddit_new(subreddit: str, access_token: str, user_agent: str, cuto
         stop_early = False
         for ch in children:
             post = ch.get("data", {})
-            created = int(post.get("created_utc", 0))
-            if created >= cutoff_ts:
-                # keep only useful fields to reduce memory
-                mini = {
-                    "id": post.get("id"),
-                    "name": post.get("name"),  # fullname like t3_xxx
-                    "created_utc": created,
-                    "title": post.get("title"),
-                    "score": post.get("score", 0),
-                    "num_comments": post.get("num_comments", 0),
-                    "total_awards_received": post.get("total_awards_received", 0),
-                    "permalink": post.get("permalink"),
-                    "author": post.get("author"),
-                }
-                collected.append(mini)
+            if int(post.get("created_utc", 0)) >= cutoff_ts:
+                collected.append(mini_post(post))
             else:
                 # Once we find a post older than cutoff in 'new' listing, we can stop paging.
                 stop_early = True
@@ -104,11 +183,299 @@ def fetch_subreddit_new(subreddit: str, access_token: str, user_agent: str, cuto
         if not after:
             break
 
-        # be polite / account for rate limits
-        time.sleep(1.0)
+    return collected
+
+def fetch_subreddit_new(subreddit: str, access_token: str, user_agent: str, cutoff_ts: int, page_limit: int = 100, max_pages: int = 50,
+                        token_manager=None, client=None):
+    """
+    Paginate /r/{subreddit}/new and collect posts with created_utc >= cutoff_ts.
+    Stops once it encounters posts older than cutoff (since 'new' is newest-first).
+    Returns list of post data dicts.
+
+    token_manager / client: see reddit_get.
+    """
+    plan = new_listing_plan(subreddit, cutoff_ts, page_limit, max_pages)
+    return run_plan(plan, access_token, user_agent, token_manager, client)
+
+def incremental_plan(store, subreddit: str, cutoff_ts: int, page_limit: int = 100, max_pages: int = 50,
+                     refresh_age: float = REFRESH_AGE):
+    """Plan for fetch_subreddit_incremental (the caller holds the subreddit's lock)."""
+    report = {"requests": 0, "new_posts": 0, "backfilled": 0, "refreshed": 0, "full_walk": False, "truncated": False}
+    listing = f"/r/{subreddit}/new"
+
+    def left() -> int:
+        # one budget for every request of the call
+        return max_pages - report["requests"]
+
+    def get(path: str, params: dict):
+        j = yield path, params
+        report["requests"] += 1
+        return j.get("data", {})
+
+    def save(children: list[dict], **marks):
+        # one store round trip per page
+        if children:
+            store.upsert(subreddit, children)
+        if marks:
+            store.set_marks(subreddit, **marks)
+
+    def load() -> dict | None:
+        store.prune(subreddit)
+        return store.marks(subreddit)
+
+    def walk_back(after: str | None, counter: str):
+        # page /new downwards from `after` (the top if None) until past cutoff_ts
+        first = after is None
+        while left() > 0:
+            params = {"limit": page_limit}
+            if after:
+                params["after"] = after
+            data = yield from get(listing, params)
+            children = [mini_post(ch.get("data", {})) for ch in data.get("children", [])]
+            if not children:
+                yield from store_call(save, [], exhausted=True)
+                return
+            after = data.get("after")
+            marks = {"newest": children[0], "oldest": children[-1], "exhausted": False} if first else {"oldest": children[-1]}
+            if children[-1]["created_utc"] >= cutoff_ts and not after:
+                marks["exhausted"] = True
+            yield from store_call(save, children, **marks)
+            report[counter] += len(children)
+            first = False
+            if children[-1]["created_utc"] < cutoff_ts or not after:
+                return
+        report["truncated"] = True
 
+    def walk_forward(before: str, pages: int):
+        # page /new upwards from the high-water mark; False if `pages` ran out first
+        for _ in range(pages):
+            data = yield from get(listing, {"limit": page_limit, "before": before})
+            children = [mini_post(ch.get("data", {})) for ch in data.get("children", [])]
+            if children:
+                yield from store_call(save, children, newest=children[0])
+                report["new_posts"] += len(children)
+                before = children[0]["name"]
+            if len(children) < page_limit:
+                return True
+        return False
+
+    marks = yield from store_call(load)
+    if marks and marks["newest_created"] >= cutoff_ts and max_pages > 0:
+        # catching up may take at most half the budget; the rest is left for a walk from the top
+        if not (yield from walk_forward(marks["newest_name"], max(1, max_pages // 2))):
+            # too far behind to catch up page by page; start over from the top
+            marks = None
+        elif report["new_posts"] == 0 and left() > 0:
+            # before= returns nothing both when there is nothing new and when the
+            # high-water post was deleted; one post from the top tells them apart
+            data = yield from get(listing, {"limit": 1})
+            top = [mini_post(ch.get("data", {})) for ch in data.get("children", [])]
+            if top and top[0]["name"] != marks["newest_name"] and top[0]["created_utc"] >= marks["newest_created"]:
+                marks = None
+    else:
+        marks = None
+
+    if marks is None:
+        if left() > 0:
+            yield from store_call(store.reset, subreddit)
+            report["full_walk"] = True
+            yield from walk_back(None, "new_posts")
+        else:
+            report["truncated"] = True
+    marks = yield from store_call(store.marks, subreddit)
+    if marks and not marks["exhausted"] and marks["oldest_created"] >= cutoff_ts:
+        yield from walk_back(marks["oldest_name"], "backfilled")
+
+    stale = yield from store_call(store.stale_names, subreddit, cutoff_ts, time.time() - refresh_age)
+    for i in range(0, min(len(stale), max(0, left()) * INFO_BATCH), INFO_BATCH):
+        batch = stale[i:i + INFO_BATCH]
+        data = yield from get("/api/info", {"id": ",".join(batch), "raw_json": 1})
+        fresh = [mini_post(ch.get("data", {})) for ch in data.get("children", [])]
+        report["refreshed"] += yield from store_call(store.update_counts, fresh)
+
+    return (yield from store_call(store.posts, subreddit, cutoff_ts)), report
+
+def fetch_subreddit_incremental(subreddit: str, access_token: str, user_agent: str, cutoff_ts: int, page_limit: int = 100,
+                                max_pages: int = 50, token_manager=None, client=None, store=None, refresh_age: float = REFRESH_AGE):
+    """
+    Like fetch_subreddit_new, but backed by the persistent RedditStore:
+
+    - only posts newer than the subreddit's high-water mark are paged (/new?before=)
+    - /new is walked past the low-water mark (after=) only if cutoff_ts is older than what is stored
+    - stored posts in the window get fresh score / comment counts from /api/info, 100 per request
+
+    max_pages caps all requests of the call together: catching up, the walk from
+    the top or the backfill, then /api/info batches with whatever is left. The
+    report's `truncated` is True if the budget ran out before cutoff_ts.
+    Returns (posts in the window, report of what was fetched).
+    """
+    store = store or get_reddit_store()
+    with store.subreddit_lock(subreddit):
+        plan = incremental_plan(store, subreddit, cutoff_ts, page_limit, max_pages, refresh_age)
+        return run_plan(plan, access_token, user_agent, token_manager, client)
+
+def multireddit_plan(subreddits: list[str], cutoffs: dict, page_limit: int = 100, max_pages: int = 50):
+    """Plan for fetch_multireddit_new."""
+    names = {s.lower(): s for s in subreddits}
+    cut = {s.lower(): int(cutoffs[s]) for s in subreddits}
+    out = {s: [] for s in subreddits}
+    report = {"requests": 0, "streams": 0, "narrowed": 0, "incomplete": []}
+    keys = list(names)
+    for i in range(0, len(keys), MULTI_CHUNK):
+        # subreddits of this stream that haven't reached their cutoff yet
+        active = keys[i:i + MULTI_CHUNK]
+        params = {"limit": page_limit}
+        report["streams"] += 1
+        pages, oldest = 0, None
+        while pages < max_pages:
+            j = yield f"/r/{'+'.join(active)}/new", params
+            report["requests"] += 1
+            pages += 1
+            data = j.get("data", {})
+            children = [ch.get("data", {}) for ch in data.get("children", [])]
+            if not children:
+                break
+            for post in children:
+                sub = (post.get("subreddit") or "").lower()
+                if sub in cut and int(post.get("created_utc", 0)) >= cut[sub]:
+                    out[names[sub]].append(dict(mini_post(post), subreddit=post.get("subreddit")))
+            oldest = int(children[-1].get("created_utc", 0))
+            # the listing is newest first across all of them: past a cutoff, that subreddit is covered
+            remaining = [k for k in active if cut[k] <= oldest]
+            if not remaining or not data.get("after"):
+                break
+            anchor = None
+            if len(remaining) < len(active):
+                anchor = next((p for p in reversed(children) if (p.get("subreddit") or "").lower() in remaining), None)
+            if anchor is not None:
+                # keep paging only the subreddits still short of their cutoff, below their last post seen
+                active = remaining
+                params = {"limit": page_limit, "after": anchor.get("name")}
+                report["narrowed"] += 1
+            else:
+                params["after"] = data["after"]
+        else:
+            # out of pages before every cutoff was reached
+            report["incomplete"] += [names[k] for k in active if oldest is None or cut[k] <= oldest]
+    return out, report
+
+def fetch_multireddit_new(subreddits: list[str], access_token: str, user_agent: str, cutoffs: dict, page_limit: int = 100,
+                          max_pages: int = 50, token_manager=None, client=None):
+    """
+    Page the combined /r/a+b+c/new listing once for several subreddits instead of
+    walking each subreddit's /new separately; small subreddits then share pages.
+
+    cutoffs maps each subreddit to its own cutoff_ts. Posts are split back out
+    by their subreddit and kept only inside that subreddit's window. Once the
+    stream is past a subreddit's cutoff that subreddit is dropped from the
+    combined listing and the rest are paged on their own; the stream stops once
+    every cutoff is reached. Subreddits are combined MULTI_CHUNK at a time, each
+    stream with max_pages requests. Subreddits still short of their cutoff when
+    the pages run out are listed in report["incomplete"].
+    Returns ({subreddit: [posts]}, report).
+    """
+    plan = multireddit_plan(subreddits, cutoffs, page_limit, max_pages)
+    return run_plan(plan, access_token, user_agent, token_manager, client)
+
+def resolve_strategy(strategy: str, window_s: float) -> tuple[str, str | None]:
+    """
+    (listing, t) for a /reddit strategy and a window of window_s seconds.
+    "auto" takes the smallest /top window covering it, or /new past a month;
+    "top" always uses /top (t=year / all for long windows).
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}")
+    if strategy in ("auto", "top"):
+        windows = TOP_WINDOWS if strategy == "top" else TOP_WINDOWS[:4]
+        for t, seconds in windows:
+            if window_s <= seconds:
+                return "top", t
+        return ("top", "all") if strategy == "top" else ("new", None)
+    return strategy, None
+
+def _counted(plan, report: dict, key: str):
+    """Run a sub-plan, counting its requests under report[key] and report["requests"]."""
+    try:
+        call = next(plan)
+        while True:
+            j = yield call
+            report[key] += 1
+            report["requests"] += 1
+            call = plan.send(j)
+    except StopIteration as done:
+        return done.value
+
+def listing_plan(subreddit: str, listing: str, cutoff_ts: int, page_limit: int = 100, max_pages: int = LISTING_PAGES,
+                 t: str | None = None):
+    """Plan for fetch_subreddit_listing."""
+    params = {"limit": page_limit}
+    if t:
+        params["t"] = t
+    collected = []
+    for _ in range(max_pages):
+        j = yield f"/r/{subreddit}/{listing}", params
+        data = j.get("data", {})
+        children = [ch.get("data", {}) for ch in data.get("children", [])]
+        # ranked listings aren't in time order, so filter instead of stopping at the cutoff
+        collected.extend(mini_post(post) for post in children if int(post.get("created_utc", 0)) >= cutoff_ts)
+        if not children or not data.get("after"):
+            break
+        params["after"] = data["after"]
     return collected
 
+def fetch_subreddit_listing(subreddit: str, listing: str, access_token: str, user_agent: str, cutoff_ts: int, t: str | None = None,
+                            page_limit: int = 100, max_pages: int = LISTING_PAGES, token_manager=None, client=None):
+    """
+    Sibling of fetch_subreddit_new for the ranked listings: /top (with t=hour|day|week|month|year|all),
+    /hot and /rising. Reads at most max_pages pages and keeps posts with created_utc >= cutoff_ts.
+    """
+    plan = listing_plan(subreddit, listing, cutoff_ts, page_limit, max_pages, t)
+    return run_plan(plan, access_token, user_agent, token_manager, client)
+
+def strategy_plan(subreddit: str, listing: str, t: str | None, cutoff_ts: int, page_limit: int = 100, max_pages: int = 50,
+                  listing_pages: int = LISTING_PAGES, shallow_pages: int = SHALLOW_NEW_PAGES, now: float | None = None):
+    """Plan for fetch_subreddit_strategy."""
+    window = max(1.0, (now or time.time()) - cutoff_ts)
+    report = {"strategy": f"{listing}:{t}" if t else listing, "requests": 0, "new_requests": 0, "listing_requests": 0,
+              "estimated_new_requests": None, "saved": 0}
+    if listing == "new":
+        posts = yield from _counted(new_listing_plan(subreddit, cutoff_ts, page_limit, max_pages), report, "new_requests")
+        report["estimated_new_requests"] = report["requests"]
+        return posts, report
+
+    fresh = yield from _counted(new_listing_plan(subreddit, cutoff_ts, page_limit, shallow_pages), report, "new_requests")
+    if len(fresh) < report["new_requests"] * page_limit:
+        # the shallow scan already reached the cutoff: /new alone covers the window
+        report["strategy"] = "new"
+        report["estimated_new_requests"] = report["requests"]
+        return fresh, report
+
+    # what walking /new down to the cutoff would have cost, at the posting rate seen on top of /new
+    span = max(1.0, (now or time.time()) - min(p["created_utc"] for p in fresh))
+    report["estimated_new_requests"] = math.ceil(len(fresh) * window / span / page_limit)
+    ranked = yield from _counted(listing_plan(subreddit, listing, cutoff_ts, page_limit, listing_pages, t), report, "listing_requests")
+    merged = {p["name"]: p for p in ranked}
+    merged.update((p["name"], p) for p in fresh)
+    report["saved"] = max(0, report["estimated_new_requests"] - report["requests"])
+    return sorted(merged.values(), key=lambda p: p["created_utc"], reverse=True), report
+
+def fetch_subreddit_strategy(subreddit: str, strategy: str, access_token: str, user_agent: str, cutoff_ts: int, page_limit: int = 100,
+                             max_pages: int = 50, listing_pages: int = LISTING_PAGES, shallow_pages: int = SHALLOW_NEW_PAGES,
+                             token_manager=None, client=None):
+    """
+    Collect a subreddit's candidates for the top posts since cutoff_ts from the cheapest listing
+    (see resolve_strategy) instead of walking /new all the way down to the cutoff:
+
+    - a shallow /new scan (shallow_pages) picks up posts too recent to rank yet; if it already
+      reaches the cutoff, that is the whole fetch
+    - otherwise listing_pages of the ranked listing are read, filtered to the window and merged in
+
+    Returns (posts, report); report["saved"] is the estimated number of /new requests avoided.
+    """
+    listing, t = resolve_strategy(strategy, time.time() - cutoff_ts)
+    plan = strategy_plan(subreddit, listing, t, cutoff_ts, page_limit, max_pages, listing_pages, shallow_pages)
+    return run_plan(plan, access_token, user_agent, token_manager, client)
+
 def compute_engagement(post: dict, alpha: float, beta: float, gamma: float, award_scale: float = 10.0) -> float:
     """
     EngagementScore = α * log10(1 + score)
@@ -138,6 +505,7 @@ def main():
     parser.add_argument("--gamma", type=float, default=2.0, help="Weight for awards (default: 2.0)")
     parser.add_argument("--page-size", type=int, default=100, help="Reddit listing page size (max 100).")
     parser.add_argument("--max-pages", type=int, default=50, help="Maximum pages to fetch (safety limit).")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="new", help="Listing to take candidates from (default: new).")
     parser.add_argument("--save-json", type=str, default="", help="If set, save all fetched posts + scores to this JSON file.")
     args = parser.parse_args()
 
@@ -171,7 +539,12 @@ def main():
 
     print(f"Fetching posts from r/{args.subreddit} after {pretty_time(cutoff_ts)} (last {args.days} days)...")
     try:
-        posts = fetch_subreddit_new(args.subreddit, token, user_agent, cutoff_ts, page_limit=args.page_size, max_pages=args.max_pages)
+        if args.strategy == "new":
+            posts = fetch_subreddit_new(args.subreddit, token, user_agent, cutoff_ts, page_limit=args.page_size, max_pages=args.max_pages)
+        else:
+            posts, report = fetch_subreddit_strategy(args.subreddit, args.strategy, token, user_agent, cutoff_ts,
+                                                     page_limit=args.page_size, max_pages=args.max_pages)
+            print(f"Used {report['strategy']}: {report['requests']} requests, ~{report['saved']} fewer than walking /new.")
     except Exception as e:
         print("Error fetching subreddit posts:", e, file=sys.stderr)
         return
@@ -0,0 +1,150 @@
+"""
+Concurrent multi-channel Telegram scrape over the shared client.
+
+Every channel in a batch runs fetch_channel_incremental on the one
+TelegramClientManager client, at most `concurrency` at a time, each within its
+own deadline. Telegram answers over-eager accounts with FloodWaitError(seconds)
+for the method that was called (ResolveUsername, GetHistory, ...), so
+FloodScheduler remembers until when each method is blocked - across batches
+and for the whole process - and a channel first waits out the methods its
+fetch uses. A channel whose flood wait doesn't fit in its deadline comes back
+with status `throttled`, one whose fetch itself runs past the deadline with
+`timeout`; both carry whatever the store already has for the window instead of
+failing the batch. Any other failure is `error`.
+"""
+from __future__ import annotations
+import time
+import asyncio
+
+from telethon.errors import FloodWaitError
+
+from socialapiscrapers.scrapeTelegramChannel import fetch_channel_incremental, rank_messages
+from socialapiscrapers.telegram_store import channel_key, get_telegram_store
+
+# Telethon requests behind fetch_channel_incremental (entity lookup, history, messages by id)
+FETCH_METHODS = ("ResolveUsernameRequest", "GetHistoryRequest", "GetMessagesRequest", "unknown")
+
+
+class Throttled(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"throttled for {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000.0, 1)
+
+
+class FloodScheduler:
+    def __init__(self):
+        self._blocked: dict[str, float] = {}
+        self._stats = {"flood_waits": 0, "waited_s": 0.0, "throttled": 0, "timeouts": 0}
+
+    def record(self, e: FloodWaitError) -> str:
+        request = getattr(e, "request", None)
+        method = type(request).__name__ if request is not None else "unknown"
+        until = time.time() + float(e.seconds or 0)
+        self._blocked[method] = max(self._blocked.get(method, 0.0), until)
+        self._stats["flood_waits"] += 1
+        print(f"[telegram] FloodWait {e.seconds}s on {method}")
+        return method
+
+    def blocked_for(self, methods=FETCH_METHODS) -> float:
+        now = time.time()
+        return max([0.0] + [self._blocked.get(m, 0.0) - now for m in methods])
+
+    async def run(self, fn, deadline: float, methods=FETCH_METHODS, bound_call: bool = True):
+        """
+        await fn() once none of `methods` is flood-blocked, retrying after a FloodWaitError.
+        Raises Throttled if the wait would run past `deadline` (a time.time() value),
+        asyncio.TimeoutError if fn itself does (with bound_call False fn may run past it).
+        """
+        while True:
+            wait = self.blocked_for(methods)
+            if wait > deadline - time.time():
+                self._stats["throttled"] += 1
+                raise Throttled(wait)
+            if wait > 0:
+                self._stats["waited_s"] += wait
+                await asyncio.sleep(wait)
+            try:
+                if not bound_call:
+                    return await fn()
+                return await asyncio.wait_for(fn(), timeout=max(0.0, deadline - time.time()))
+            except FloodWaitError as e:
+                self.record(e)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                raise
+
+    def stats(self) -> dict:
+        now = time.time()
+        return dict(
+            self._stats,
+            waited_s=round(self._stats["waited_s"], 1),
+            blocked={m: round(until - now, 1) for m, until in self._blocked.items() if until > now},
+        )
+
+
+_scheduler: FloodScheduler | None = None
+
+
+def get_flood_scheduler() -> FloodScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FloodScheduler()
+    return _scheduler
+
+
+async def run_telegram_batch(manager, channels: list[str], days: float, top: int = 20, concurrency: int = 4,
+                             deadline: float = 30.0, deadlines: dict | None = None) -> dict:
+    """
+    Scrape `channels` concurrently. deadline is seconds per channel (deadlines overrides
+    it per channel). Returns {"results": {channel: result}, ...}; a result's status is ok,
+    throttled or timeout (both partial: the stored messages), or error.
+    """
+    t_batch = time.perf_counter()
+    scheduler = get_flood_scheduler()
+    store = get_telegram_store()
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    overrides = {channel_key(k): v for k, v in (deadlines or {}).items()}
+    since_ts = int(time.time() - days * 86400)
+
+    async def partial(channel: str) -> dict:
+        # blocking SQLite read: off the loop, the other channels of the batch keep running
+        posts = await asyncio.to_thread(store.messages, channel, since_ts)
+        rank_messages(posts)
+        return {"top": posts[:top], "count": len(posts)}
+
+    async def scrape(channel: str) -> dict:
+        # the deadline starts now, so time queued behind the semaphore counts too
+        t0 = time.perf_counter()
+        until = time.time() + float(overrides.get(channel_key(channel), deadline))
+        async with sem:
+            try:
+                posts, report = await scheduler.run(
+                    lambda: manager.call(lambda client: fetch_channel_incremental(client, channel, days)), until,
+                )
+            except Throttled as e:
+                return {"ok": False, "status": "throttled", "throttled": True, "retry_after": round(e.retry_after, 1),
+                        **(await partial(channel)), "latency_ms": _ms(t0)}
+            except asyncio.TimeoutError:
+                return {"ok": False, "status": "timeout", "error": "deadline exceeded", **(await partial(channel)),
+                        "latency_ms": _ms(t0)}
+            except Exception as e:
+                return {"ok": False, "status": "error", "error": str(e) or type(e).__name__, "latency_ms": _ms(t0)}
+        rank_messages(posts)
+        return {"ok": True, "status": "ok", "top": posts[:top], "count": len(posts), "fetch": report,
+                "latency_ms": _ms(t0)}
+
+    unique = list(dict.fromkeys(channels))
+    results = dict(zip(unique, await asyncio.gather(*(scrape(c) for c in unique))))
+    return {
+        "results": results,
+        "count": len(results),
+        "throttled": sum(1 for r in results.values() if r["status"] == "throttled"),
+        "timeouts": sum(1 for r in results.values() if r["status"] == "timeout"),
+        "errors": sum(1 for r in results.values() if r["status"] == "error"),
+        "elapsed_ms": _ms(t_batch),
+        "scheduler": scheduler.stats(),
+    }
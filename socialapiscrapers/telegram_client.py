@@ -0,0 +1,125 @@
+"""
+One long-lived Telethon client for the API process.
+
+scrape_channel used to connect, authorize and disconnect a TelegramClient per
+/telegram call, paying the MTProto handshake and session-file I/O each time.
+TelegramClientManager connects once (lazily, or at app startup) and hands the
+same client to every request; Telethon multiplexes concurrent requests over
+the one connection. If the connection drops, the next caller reconnects it,
+and a call that fails with a connection error reconnects and is retried once.
+The FastAPI lifespan disconnects it on shutdown.
+
+The client runs with flood_sleep_threshold=0: Telethon doesn't sleep through
+FloodWaits itself, they surface as FloodWaitError so that
+telegram_batch.FloodScheduler can record the blocked method and schedule
+every caller around it.
+"""
+from __future__ import annotations
+import asyncio
+
+from telethon import TelegramClient
+
+from socialapiscrapers.scrapeTelegramChannel import get_client
+
+# a call failing with one of these reconnects and is retried
+CONNECTION_ERRORS = (ConnectionError, OSError, asyncio.TimeoutError)
+
+
+class TelegramClientManager:
+    def __init__(self, api_id: int, api_hash: str, session_path: str | None = None, string_session: str | None = None,
+                 retries: int = 1, flood_sleep_threshold: int = 0):
+        self.credentials = (int(api_id), api_hash, session_path, string_session)
+        self.retries = int(retries)
+        self.flood_sleep_threshold = int(flood_sleep_threshold)
+        self._client: TelegramClient | None = None
+        # serializes connect / reconnect; calls themselves run concurrently
+        self._lock = asyncio.Lock()
+        self._in_flight = 0
+        self._stats = {"connects": 0, "reconnects": 0, "calls": 0, "retries": 0, "failures": 0}
+
+    async def client(self) -> TelegramClient:
+        """The connected, authorized client; connects on first use and after a drop."""
+        async with self._lock:
+            if self._client is None:
+                self._client = await get_client(*self.credentials, interactive_phone=False)
+                self._client.flood_sleep_threshold = self.flood_sleep_threshold
+                self._stats["connects"] += 1
+            elif not self._client.is_connected():
+                await self._client.connect()
+                self._stats["reconnects"] += 1
+            return self._client
+
+    async def _reconnect(self, dead: TelegramClient) -> None:
+        async with self._lock:
+            if self._client is not dead:
+                # another caller already replaced it
+                return
+            try:
+                await dead.disconnect()
+            except Exception:
+                pass
+            await dead.connect()
+            self._stats["reconnects"] += 1
+
+    async def call(self, fn):
+        """await fn(client) on the shared client, reconnecting and retrying on connection errors."""
+        attempt = 0
+        while True:
+            client = await self.client()
+            self._stats["calls"] += 1
+            self._in_flight += 1
+            try:
+                return await fn(client)
+            except CONNECTION_ERRORS as e:
+                if attempt >= self.retries:
+                    self._stats["failures"] += 1
+                    raise
+                print(f"[telegram] connection error ({e!r}); reconnecting")
+                self._stats["retries"] += 1
+                await self._reconnect(client)
+                attempt += 1
+            finally:
+                self._in_flight -= 1
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._client is not None:
+                try:
+                    await self._client.disconnect()
+                finally:
+                    self._client = None
+
+    def stats(self) -> dict:
+        return dict(
+            self._stats,
+            in_flight=self._in_flight,
+            connected=self._client is not None and self._client.is_connected(),
+        )
+
+
+_manager: TelegramClientManager | None = None
+
+
+def get_telegram_manager(api_id: int, api_hash: str, session_path: str | None = None,
+                         string_session: str | None = None) -> TelegramClientManager:
+    """The shared manager (use it on the app's event loop); replaced if the credentials change."""
+    global _manager
+    credentials = (int(api_id), api_hash, session_path, string_session)
+    if _manager is None or _manager.credentials != credentials:
+        if _manager is not None:
+            asyncio.ensure_future(_manager.close())
+        _manager = TelegramClientManager(*credentials)
+    return _manager
+
+
+def telegram_manager_stats() -> dict:
+    if _manager is None:
+        return {"enabled": False}
+    return {"enabled": True, **_manager.stats()}
+
+
+async def close_telegram_manager() -> None:
+    global _manager
+    if _manager is not None:
+        await _manager.close()
+        _manager = None
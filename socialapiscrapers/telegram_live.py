@@ -0,0 +1,285 @@
+"""
+Live ranked window of Telegram channel posts, kept in memory.
+
+For the channels in TELEGRAM_LIVE_CHANNELS the API does not poll history on
+each /telegram call. At startup every channel is backfilled once through
+fetch_channel_incremental. After that, the shared client's
+events.NewMessage / MessageEdited / MessageDeleted handlers keep an
+in-memory index of the last TELEGRAM_LIVE_DAYS days (default 3) up to date.
+
+Views and reactions don't arrive as events, so every TELEGRAM_LIVE_REFRESH
+seconds (default 60) the posts still in the window are re-read, 100 ids per
+request, and their engagement scores are recomputed. /telegram then answers
+from the index (a filter and slice of an already ranked list) when the
+channel is live and the requested window fits.
+
+The index is updated synchronously in the handlers; the matching
+TelegramStore writes run in a thread, one after the other in arrival order,
+so SQLite never blocks the loop.
+"""
+from __future__ import annotations
+import os
+import time
+import asyncio
+from datetime import datetime
+
+from telethon import events
+from telethon.errors import FloodWaitError
+
+from socialapiscrapers.scrapeTelegramChannel import (
+    METRICS_BATCH,
+    compute_engagement_telegram,
+    fetch_channel_incremental,
+    message_date_utc,
+    message_entry,
+)
+from socialapiscrapers.telegram_batch import Throttled, get_flood_scheduler
+from socialapiscrapers.telegram_store import channel_key, get_telegram_store
+
+LIVE_DAYS = float(os.getenv("TELEGRAM_LIVE_DAYS", "3"))
+REFRESH_INTERVAL = float(os.getenv("TELEGRAM_LIVE_REFRESH", "60"))
+# how long the startup backfill of one channel may wait on FloodWaits
+BACKFILL_DEADLINE = 120.0
+
+
+def _score(entry: dict) -> dict:
+    entry["_engagement_score"] = compute_engagement_telegram(entry, alpha=1.5, beta=1.0, delta=1.0, gamma=2.0)
+    return entry
+
+
+class TelegramLiveIndex:
+    def __init__(self, manager, channels: list[str], days: float = LIVE_DAYS, refresh_interval: float = REFRESH_INTERVAL):
+        self.manager = manager
+        self.channels = {channel_key(c): c for c in channels}
+        self.window = float(days) * 86400.0
+        self.days = float(days)
+        self.refresh_interval = float(refresh_interval)
+        self._posts: dict[str, dict[int, dict]] = {key: {} for key in self.channels}
+        # per channel: posts best first, rebuilt on the next query after a change
+        self._ranked: dict[str, list[dict]] = {}
+        self._ready: set[str] = set()
+        self._peers: dict[int, str] = {}
+        self._handlers = []
+        self._client = None
+        self._task: asyncio.Task | None = None
+        # last queued store write; each write waits for the previous one
+        self._writer: asyncio.Task | None = None
+        self._stats = {"events": 0, "edits": 0, "deletes": 0, "refreshes": 0, "refresh_requests": 0, "queries": 0}
+
+    # ---- lifecycle ----
+
+    async def start(self) -> None:
+        client = self._client = await self.manager.client()
+        for key, channel in self.channels.items():
+            try:
+                self._peers[await client.get_peer_id(channel)] = key
+            except Exception as e:
+                print(f"[telegram-live] cannot resolve {channel}: {e!r}")
+        chats = list(self._peers)
+        if not chats:
+            return
+        for handler, event in (
+            (self._on_message, events.NewMessage(chats=chats)),
+            (self._on_edit, events.MessageEdited(chats=chats)),
+            (self._on_delete, events.MessageDeleted(chats=chats)),
+        ):
+            client.add_event_handler(handler, event)
+            self._handlers.append((handler, event))
+        # handlers first, so nothing posted during the backfill is missed
+        await asyncio.gather(*(self._backfill(key) for key in self._peers.values()))
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _backfill(self, key: str) -> None:
+        channel = self.channels[key]
+        try:
+            posts, _ = await get_flood_scheduler().run(
+                lambda: self.manager.call(lambda client: fetch_channel_incremental(client, channel, self.days)),
+                time.time() + BACKFILL_DEADLINE,
+            )
+        except Throttled as e:
+            print(f"[telegram-live] backfill of {channel} throttled ({e}); starting from the store")
+            posts = await asyncio.to_thread(get_telegram_store().messages, channel, int(time.time() - self.window))
+        except asyncio.TimeoutError:
+            print(f"[telegram-live] backfill of {channel} timed out; starting from the store")
+            posts = await asyncio.to_thread(get_telegram_store().messages, channel, int(time.time() - self.window))
+        except Exception as e:
+            print(f"[telegram-live] backfill of {channel} failed: {e!r}")
+            return
+        stored = self._posts[key]
+        for p in posts:
+            # events that arrived meanwhile are newer than the stored copy
+            stored.setdefault(p["id"], _score(p))
+        self._ranked.pop(key, None)
+        self._ready.add(key)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for handler, event in self._handlers:
+            self._client.remove_event_handler(handler, event)
+        self._handlers = []
+        if self._writer is not None:
+            await self._writer
+            self._writer = None
+
+    # ---- store writes ----
+
+    def _persist(self, method: str, channel: str, arg) -> None:
+        """Queue a TelegramStore write without blocking the loop."""
+        previous = self._writer
+
+        async def write() -> None:
+            if previous is not None:
+                await previous
+            try:
+                await asyncio.to_thread(getattr(get_telegram_store(), method), channel, arg)
+            except Exception as e:
+                print(f"[telegram-live] store {method} for {channel} failed: {e!r}")
+
+        self._writer = asyncio.create_task(write())
+
+    # ---- events ----
+
+    def _put(self, event) -> str | None:
+        key = self._peers.get(event.chat_id)
+        msg_date_utc = message_date_utc(event.message)
+        if key is None or msg_date_utc is None:
+            return None
+        entry = message_entry(event.message, msg_date_utc)
+        self._persist("upsert", self.channels[key], [dict(entry, date_ts=int(msg_date_utc.timestamp()))])
+        entry["_ts"] = msg_date_utc.timestamp()
+        self._posts[key][entry["id"]] = _score(entry)
+        self._ranked.pop(key, None)
+        return key
+
+    async def _on_message(self, event) -> None:
+        if self._put(event):
+            self._stats["events"] += 1
+
+    async def _on_edit(self, event) -> None:
+        if self._put(event):
+            self._stats["edits"] += 1
+
+    async def _on_delete(self, event) -> None:
+        key = self._peers.get(event.chat_id)
+        if key is None:
+            return
+        for msg_id in event.deleted_ids:
+            if self._posts[key].pop(msg_id, None) is not None:
+                self._stats["deletes"] += 1
+        self._persist("delete", self.channels[key], list(event.deleted_ids))
+        self._ranked.pop(key, None)
+
+    # ---- periodic metrics refresh ----
+
+    def _expire(self, key: str, now: float) -> None:
+        posts = self._posts[key]
+        for msg_id in [i for i, p in posts.items() if self._ts(p) < now - self.window]:
+            del posts[msg_id]
+
+    @staticmethod
+    def _ts(p: dict) -> float:
+        if "_ts" not in p:
+            p["_ts"] = datetime.fromisoformat(p["date"]).timestamp()
+        return p["_ts"]
+
+    async def _refresh(self, client, key: str) -> None:
+        posts = self._posts[key]
+        ids = sorted(posts, reverse=True)
+        for i in range(0, len(ids), METRICS_BATCH):
+            batch = ids[i:i + METRICS_BATCH]
+            msgs = await client.get_messages(self.channels[key], ids=batch)
+            self._stats["refresh_requests"] += 1
+            fresh, gone = [], []
+            for msg_id, msg in zip(batch, msgs):
+                if msg is None:
+                    # deleted while no client was listening, or the event was missed
+                    posts.pop(msg_id, None)
+                    gone.append(msg_id)
+                    continue
+                entry = message_entry(msg)
+                current = posts.get(msg_id)
+                if current is not None:
+                    current.update({k: entry[k] for k in ("text", "views", "forwards", "replies", "reactions_total", "reactions_breakdown")})
+                    _score(current)
+                    fresh.append(entry)
+            if fresh:
+                self._persist("update_metrics", self.channels[key], fresh)
+            if gone:
+                self._stats["deletes"] += len(gone)
+                self._persist("delete", self.channels[key], gone)
+        self._ranked.pop(key, None)
+
+    async def _refresh_loop(self) -> None:
+        scheduler = get_flood_scheduler()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            now = time.time()
+            for key in list(self._ready):
+                self._expire(key, now)
+                if scheduler.blocked_for(("GetMessagesRequest", "unknown")) > 0:
+                    continue
+                try:
+                    await self.manager.call(lambda client: self._refresh(client, key))
+                except FloodWaitError as e:
+                    scheduler.record(e)
+                except Exception as e:
+                    print(f"[telegram-live] refresh of {self.channels[key]} failed: {e!r}")
+            self._stats["refreshes"] += 1
+
+    # ---- queries ----
+
+    def covers(self, channel: str, days: float) -> bool:
+        return channel_key(channel) in self._ready and days * 86400.0 <= self.window
+
+    def query(self, channel: str, days: float, top: int) -> dict | None:
+        """Top posts of a live channel in the last `days`; None if the index can't answer."""
+        if not self.covers(channel, days):
+            return None
+        key = channel_key(channel)
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            ranked = self._ranked[key] = sorted(
+                self._posts[key].values(), key=lambda p: p["_engagement_score"], reverse=True,
+            )
+        since = time.time() - days * 86400.0
+        posts = [p for p in ranked if self._ts(p) >= since]
+        self._stats["queries"] += 1
+        return {"top": [{k: v for k, v in p.items() if k != "_ts"} for p in posts[:top]], "count": len(posts)}
+
+    def stats(self) -> dict:
+        return dict(
+            self._stats,
+            days=self.days,
+            channels={self.channels[key]: {"ready": key in self._ready, "posts": len(self._posts[key])} for key in self.channels},
+        )
+
+
+_live: TelegramLiveIndex | None = None
+
+
+def live_channels() -> list[str]:
+    return [c.strip().removeprefix("t/") for c in os.getenv("TELEGRAM_LIVE_CHANNELS", "").split(",") if c.strip()]
+
+
+def get_telegram_live() -> TelegramLiveIndex | None:
+    return _live
+
+
+async def start_telegram_live(manager, channels: list[str]) -> TelegramLiveIndex:
+    global _live
+    _live = TelegramLiveIndex(manager, channels)
+    await _live.start()
+    return _live
+
+
+async def stop_telegram_live() -> None:
+    global _live
+    if _live is not None:
+        await _live.stop()
+        _live = None
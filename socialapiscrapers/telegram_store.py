@@ -0,0 +1,242 @@
+"""
+Persistent per-channel message store for incremental Telegram fetching.
+
+Same idea as reddit_store: for every channel the store keeps the messages seen
+so far plus the contiguous id range it covers - the newest message id
+(high-water mark) and the oldest one walked (low-water mark). A /telegram call
+then only asks for messages above the high-water mark (`min_id`), walks below
+the low-water mark (`offset_id`) only if the requested window reaches past
+what is stored, and re-reads views / forwards / replies / reactions of stored
+messages in batches of 100 ids. The ranked answer is assembled from the store.
+
+Messages older than TELEGRAM_STORE_MAX_DAYS (default 14) are pruned.
+"""
+from __future__ import annotations
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+
+MAX_AGE_DAYS = float(os.getenv("TELEGRAM_STORE_MAX_DAYS", "14"))
+METRIC_FIELDS = ("views", "forwards", "replies", "reactions_total", "reactions_breakdown")
+MESSAGE_FIELDS = ("id", "date", "text") + METRIC_FIELDS
+
+
+def channel_key(channel: str) -> str:
+    key = (channel or "").strip().lower()
+    for prefix in ("https://", "http://", "t.me/", "telegram.me/", "@"):
+        key = key.removeprefix(prefix)
+    return key.rstrip("/")
+
+
+class TelegramStore:
+    def __init__(self, path: str, max_age_days: float = MAX_AGE_DAYS):
+        self.path = path
+        self.max_age = float(max_age_days) * 86400.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                channel TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                date_ts INTEGER NOT NULL,
+                date TEXT,
+                text TEXT,
+                views INTEGER,
+                forwards INTEGER,
+                replies INTEGER,
+                reactions_total INTEGER,
+                reactions_breakdown TEXT,
+                refreshed_at REAL NOT NULL,
+                PRIMARY KEY (channel, id)
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS messages_channel_date ON messages (channel, date_ts)")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS marks (
+                channel TEXT PRIMARY KEY,
+                newest_id INTEGER,
+                oldest_id INTEGER,
+                oldest_ts INTEGER,
+                exhausted INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        # one fetch per channel at a time; a second caller waits and reuses the store
+        self._channel_locks: dict[str, asyncio.Lock] = {}
+
+    def channel_lock(self, channel: str) -> asyncio.Lock:
+        return self._channel_locks.setdefault(channel_key(channel), asyncio.Lock())
+
+    # ---- marks ----
+
+    def marks(self, channel: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT newest_id, oldest_id, oldest_ts, exhausted, updated_at FROM marks WHERE channel = ?",
+                (channel_key(channel),),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return dict(zip(("newest_id", "oldest_id", "oldest_ts", "exhausted", "updated_at"), row))
+
+    def set_marks(self, channel: str, newest: dict | None = None, oldest: dict | None = None,
+                  exhausted: bool | None = None) -> None:
+        """Move the high-water (newest) and/or low-water (oldest) mark to the given messages."""
+        current = self.marks(channel) or {}
+        if newest is not None:
+            current["newest_id"] = max(int(newest["id"]), current.get("newest_id") or 0)
+        if oldest is not None:
+            current["oldest_id"], current["oldest_ts"] = int(oldest["id"]), int(oldest["date_ts"])
+        if exhausted is not None:
+            current["exhausted"] = int(exhausted)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO marks (channel, newest_id, oldest_id, oldest_ts, exhausted, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    channel_key(channel), current.get("newest_id"), current.get("oldest_id"), current.get("oldest_ts"),
+                    current.get("exhausted", 0), time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def reset(self, channel: str) -> None:
+        """Forget the marks (the stored messages stay, and are overwritten as they are seen again)."""
+        with self._lock:
+            self._db.execute("DELETE FROM marks WHERE channel = ?", (channel_key(channel),))
+            self._db.commit()
+
+    # ---- messages ----
+
+    def upsert(self, channel: str, messages: list[dict]) -> int:
+        if not messages:
+            return 0
+        now = time.time()
+        rows = [
+            (
+                channel_key(channel), m["id"], int(m["date_ts"]), m.get("date"), m.get("text"),
+                m.get("views"), m.get("forwards"), m.get("replies"), m.get("reactions_total"),
+                json.dumps(m.get("reactions_breakdown") or [], ensure_ascii=False), now,
+            )
+            for m in messages if m.get("id") is not None
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO messages (channel, id, date_ts, date, text, views, forwards, replies,"
+                " reactions_total, reactions_breakdown, refreshed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+        return len(rows)
+
+    def update_metrics(self, channel: str, messages: list[dict]) -> int:
+        """Store fresh views / forwards / replies / reactions for messages we already have."""
+        now = time.time()
+        rows = [
+            (
+                m.get("views"), m.get("forwards"), m.get("replies"), m.get("reactions_total"),
+                json.dumps(m.get("reactions_breakdown") or [], ensure_ascii=False), now, channel_key(channel), m["id"],
+            )
+            for m in messages if m.get("id") is not None
+        ]
+        with self._lock:
+            cur = self._db.executemany(
+                "UPDATE messages SET views = ?, forwards = ?, replies = ?, reactions_total = ?, reactions_breakdown = ?,"
+                " refreshed_at = ? WHERE channel = ? AND id = ?",
+                rows,
+            )
+            self._db.commit()
+            return cur.rowcount
+
+    def delete(self, channel: str, ids: list[int]) -> int:
+        if not ids:
+            return 0
+        with self._lock:
+            cur = self._db.executemany(
+                "DELETE FROM messages WHERE channel = ? AND id = ?", [(channel_key(channel), int(i)) for i in ids]
+            )
+            self._db.commit()
+            return cur.rowcount
+
+    def stale_ids(self, channel: str, since_ts: int, older_than: float) -> list[int]:
+        """Ids of stored messages in the window whose metrics were last read before `older_than`."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM messages WHERE channel = ? AND date_ts >= ? AND refreshed_at < ? ORDER BY id DESC",
+                (channel_key(channel), int(since_ts), float(older_than)),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def messages(self, channel: str, since_ts: int) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {', '.join(MESSAGE_FIELDS)} FROM messages WHERE channel = ? AND date_ts >= ? ORDER BY id DESC",
+                (channel_key(channel), int(since_ts)),
+            ).fetchall()
+        out = []
+        for r in rows:
+            m = dict(zip(MESSAGE_FIELDS, r))
+            m["reactions_breakdown"] = json.loads(m["reactions_breakdown"] or "[]")
+            out.append(m)
+        return out
+
+    def prune(self, channel: str, now: float | None = None) -> int:
+        """Drop messages past max age; the low-water mark moves up to the oldest message kept."""
+        if self.max_age <= 0:
+            return 0
+        cutoff = int((now or time.time()) - self.max_age)
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM messages WHERE channel = ? AND date_ts < ?", (channel_key(channel), cutoff)
+            ).rowcount
+            self._db.commit()
+        marks = self.marks(channel)
+        if removed and marks and (marks["oldest_ts"] or 0) < cutoff:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT id, date_ts FROM messages WHERE channel = ? ORDER BY id ASC LIMIT 1", (channel_key(channel),)
+                ).fetchone()
+            if row is None:
+                self.reset(channel)
+            else:
+                self.set_marks(channel, oldest={"id": row[0], "date_ts": row[1]}, exhausted=False)
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT channel, COUNT(*) FROM messages GROUP BY channel").fetchall())
+            marks = self._db.execute("SELECT channel, newest_id, oldest_id, oldest_ts, updated_at FROM marks").fetchall()
+        return {
+            channel: {
+                "messages": counts.get(channel, 0),
+                "newest_id": newest,
+                "oldest_id": oldest,
+                "oldest_ts": oldest_ts,
+                "updated_at": updated,
+            }
+            for channel, newest, oldest, oldest_ts, updated in marks
+        }
+
+
+_store: TelegramStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_telegram_store() -> TelegramStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            data_dir = os.getenv("CONTENTWORK_DATA_DIR", os.path.expanduser("~/.cache/contentwork"))
+            _store = TelegramStore(os.getenv("TELEGRAM_STORE_PATH", os.path.join(data_dir, "telegram_messages.sqlite3")))
+        return _store
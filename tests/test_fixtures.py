@@ -0,0 +1,35 @@
+from footballapiscapers.fixtures import FixturesIndex, parse_fixtures
+
+PAYLOAD = {"leagues": [
+    {"name": "MLS", "matches": [
+        {"id": 1, "home": {"name": "Inter Miami CF"}, "away": {"name": "Orlando City"}, "status": {}},
+    ]},
+    {"name": "WSL", "matches": [
+        {"id": 2, "home": {"name": "Arsenal Women"}, "away": {"name": "Chelsea Women"}, "status": {}},
+    ]},
+]}
+
+
+class StaticFixtures(FixturesIndex):
+    def _fetch_day(self, day):
+        return parse_fixtures(PAYLOAD if day == self.window()[0] else {}, day)
+
+
+def index():
+    fixtures = StaticFixtures(days_back=0, days_ahead=0)
+    fixtures.refresh_once()
+    return fixtures
+
+
+def test_exact_and_fuzzy_sides_resolve():
+    fixtures = index()
+    assert fixtures.lookup("orlando city vs inter miami")["id"] == "1"
+    assert fixtures.lookup("Inter Miami vs Orlndo City")["id"] == "1"
+    assert fixtures.lookup("chelsea women vs arsenal women")["id"] == "2"
+
+
+def test_fuzzy_pass_does_not_cross_teams():
+    fixtures = index()
+    assert fixtures.lookup("inter vs orlando city") is None
+    assert fixtures.lookup("arsenal vs chelsea") is None
+    assert fixtures.stats()["misses"] == 2
@@ -0,0 +1,39 @@
+from footballapiscapers.id_index import FUZZY_THRESHOLD, IdIndex, fuzzy_score, normalize_query, side_similarity
+
+
+def match_score(query: str, candidate: str) -> float:
+    return fuzzy_score("match", normalize_query("match", query), normalize_query("match", candidate))
+
+
+def test_club_affixes_and_side_order_still_match():
+    assert match_score("chelsea vs benfica", "Chelsea FC vs Benfica") >= FUZZY_THRESHOLD
+    assert match_score("milan vs inter", "Inter vs AC Milan") >= FUZZY_THRESHOLD
+    assert match_score("Atlético Madrid v Getafe", "atletico madrid vs getafe") == 1.0
+
+
+def test_typo_in_one_side_still_matches():
+    assert match_score("liverpol vs everton", "liverpool vs everton") >= FUZZY_THRESHOLD
+
+
+def test_extra_name_token_is_another_team():
+    assert match_score("inter vs milan", "inter miami vs milan") < FUZZY_THRESHOLD
+    assert side_similarity("inter", "inter miami") < FUZZY_THRESHOLD
+
+
+def test_qualifiers_are_other_teams():
+    assert match_score("arsenal vs chelsea", "arsenal women vs chelsea women") < FUZZY_THRESHOLD
+    assert match_score("arsenal vs chelsea", "arsenal vs chelsea u21") < FUZZY_THRESHOLD
+    assert match_score("barcelona vs real madrid", "barcelona b vs real madrid ii") < FUZZY_THRESHOLD
+    assert match_score("arsenal u21 vs chelsea u21", "arsenal u23 vs chelsea u23") < FUZZY_THRESHOLD
+    assert match_score("arsenal women vs chelsea women", "Chelsea Women vs Arsenal Women") == 1.0
+
+
+def test_index_does_not_resolve_to_another_team(tmp_path):
+    index = IdIndex(str(tmp_path / "index.sqlite3"))
+    index.record("match", "inter miami vs milan", 1)
+    index.record("match", "arsenal women vs chelsea women", 2)
+    index.record("match", "arsenal vs chelsea u21", 3)
+    assert index.lookup("match", "inter vs milan") is None
+    assert index.lookup("match", "arsenal vs chelsea") is None
+    index.record("match", "Arsenal FC vs Chelsea FC", 4)
+    assert index.lookup("match", "arsenal vs chelsea") == "4"
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+from footballapiscapers.payload_cache import PayloadCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PayloadCache(str(tmp_path / "cache"))
+
+
+def test_roundtrip_through_disk(cache):
+    cache.put("player", 42, {"name": "x"}, ttl=None)
+    assert PayloadCache(cache.disk_dir).get("player", "42") == {"name": "x"}
+    assert cache.invalidate(kind="player", entity_id="42") == 2
+
+
+@pytest.mark.parametrize("kind, entity_id", [
+    ("match", "../../outside"),
+    ("match", "1/../../outside"),
+    ("match", "/etc/passwd"),
+    ("match", "12a"),
+    ("..", "1"),
+    ("../..", "1"),
+    ("teams", "1"),
+])
+def test_traversal_is_rejected(cache, tmp_path, kind, entity_id):
+    victim = tmp_path / "outside.json.gz"
+    victim.write_text("keep")
+    with pytest.raises(ValueError):
+        cache.invalidate(kind=kind, entity_id=entity_id)
+    with pytest.raises(ValueError):
+        cache.put(kind, entity_id, {"a": 1}, ttl=None)
+    assert victim.read_text() == "keep"
+
+
+def test_symlink_out_of_the_cache_is_not_followed(cache, tmp_path):
+    outside = tmp_path / "elsewhere"
+    outside.mkdir()
+    (outside / "7.json.gz").write_text("keep")
+    os.makedirs(cache.disk_dir)
+    os.symlink(outside, os.path.join(cache.disk_dir, "match"))
+    assert cache.invalidate(kind="match") == 0
+    assert cache.invalidate() == 0
+    with pytest.raises(ValueError):
+        cache.put("match", 7, {"a": 1}, ttl=None)
+    assert (outside / "7.json.gz").read_text() == "keep"
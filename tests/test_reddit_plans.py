@@ -0,0 +1,184 @@
+import time
+
+import pytest
+
+from socialapiscrapers.reddit_store import RedditStore
+from socialapiscrapers.scrape_reddit import StoreCall, incremental_plan, multireddit_plan
+
+NOW = int(time.time())
+
+
+class FakeSubreddit:
+    """/new, /new?before=, /new?after= and /api/info over an in-memory listing (newest first)."""
+
+    def __init__(self, count: int, spacing: int = 60):
+        self.posts = []
+        self.serial = 0
+        self.spacing = spacing
+        for _ in range(count):
+            self.post(front=False)
+        self.requests = 0
+
+    def post(self, front: bool = True) -> None:
+        self.serial += 1
+        created = NOW + self.serial * self.spacing if front else NOW - self.serial * self.spacing
+        p = {"id": str(self.serial), "name": f"t3_{self.serial}", "created_utc": created, "score": 1}
+        if front:
+            self.posts.insert(0, p)
+        else:
+            self.posts.append(p)
+
+    def _index(self, name: str) -> int:
+        return next(i for i, p in enumerate(self.posts) if p["name"] == name)
+
+    def answer(self, path: str, params: dict) -> dict:
+        self.requests += 1
+        if path == "/api/info":
+            names = set(params["id"].split(","))
+            page = [p for p in self.posts if p["name"] in names]
+            return {"data": {"children": [{"data": p} for p in page]}}
+        limit = params["limit"]
+        if "before" in params:
+            i = self._index(params["before"])
+            page = self.posts[max(0, i - limit):i]
+        else:
+            start = self._index(params["after"]) + 1 if "after" in params else 0
+            page = self.posts[start:start + limit]
+        after = page[-1]["name"] if page and page[-1] is not self.posts[-1] else None
+        return {"data": {"children": [{"data": p} for p in page], "after": after}}
+
+
+def run(plan, reddit: FakeSubreddit):
+    try:
+        step = next(plan)
+        while True:
+            step = plan.send(step() if isinstance(step, StoreCall) else reddit.answer(*step))
+    except StopIteration as done:
+        return done.value
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RedditStore(str(tmp_path / "reddit.sqlite3"))
+
+
+def test_cold_walk_within_budget(store):
+    reddit = FakeSubreddit(300)
+    posts, report = run(incremental_plan(store, "soccer", NOW - 120 * 60, page_limit=25), reddit)
+    assert len(posts) == 120
+    assert not report["truncated"]
+    assert report["requests"] == reddit.requests
+
+
+@pytest.mark.parametrize("max_pages", [1, 2, 3, 5, 8])
+def test_requests_never_exceed_max_pages(store, max_pages):
+    reddit = FakeSubreddit(2000)
+    cutoff = NOW - 1500 * 60
+    # first call: a cold walk that runs out of budget
+    _, report = run(incremental_plan(store, "soccer", cutoff, page_limit=25, max_pages=max_pages), reddit)
+    assert reddit.requests <= max_pages and report["truncated"]
+    # a flood of new posts: catching up, a walk from the top and the backfill share one budget
+    for _ in range(200):
+        reddit.post()
+    reddit.requests = 0
+    _, report = run(incremental_plan(store, "soccer", cutoff, page_limit=25, max_pages=max_pages, refresh_age=0), reddit)
+    assert reddit.requests == report["requests"] <= max_pages
+    # refreshing stale counts draws from the same budget
+    reddit.requests = 0
+    _, report = run(incremental_plan(store, "soccer", cutoff, page_limit=25, max_pages=max_pages, refresh_age=0), reddit)
+    assert reddit.requests == report["requests"] <= max_pages
+
+
+def test_backfill_resumes_where_the_budget_ran_out(store):
+    reddit = FakeSubreddit(400)
+    cutoff = NOW - 300 * 60
+    seen = []
+    for _ in range(10):
+        posts, report = run(incremental_plan(store, "soccer", cutoff, page_limit=25, max_pages=4), reddit)
+        seen.append(len(posts))
+        if not report["truncated"]:
+            break
+    assert seen[-1] == 300 and not report["truncated"]
+    assert seen == sorted(seen)
+
+
+class FakeMultireddit:
+    """/r/a+b/new over posts of several subreddits, newest first."""
+
+    def __init__(self, per_sub: dict):
+        # per_sub: subreddit -> seconds between its posts
+        self.posts = sorted(
+            ({"name": f"t3_{sub}{k}", "id": f"{sub}{k}", "subreddit": sub, "created_utc": NOW - k * gap}
+             for sub, gap in per_sub.items() for k in range(1, 2000)),
+            key=lambda p: -p["created_utc"],
+        )
+        self.paths = []
+
+    def answer(self, path: str, params: dict) -> dict:
+        self.paths.append(path)
+        subs = set(path.split("/")[2].split("+"))
+        listing = [p for p in self.posts if p["subreddit"] in subs]
+        start = 0
+        if "after" in params:
+            start = next(i for i, p in enumerate(listing) if p["name"] == params["after"]) + 1
+        page = listing[start:start + params["limit"]]
+        after = page[-1]["name"] if start + params["limit"] < len(listing) else None
+        return {"data": {"children": [{"data": p} for p in page], "after": after}}
+
+
+def test_multireddit_drops_covered_subreddits():
+    reddit = FakeMultireddit({"busy": 60, "quiet": 3600})
+    cutoffs = {"busy": NOW - 3600, "quiet": NOW - 3 * 86400}
+    out, report = run(multireddit_plan(["busy", "quiet"], cutoffs, page_limit=25), reddit)
+    assert len(out["busy"]) == 60 and len(out["quiet"]) == 72
+    assert report["incomplete"] == [] and report["narrowed"] == 1
+    # once busy is covered, quiet is paged alone instead of through busy's posts
+    assert reddit.paths[-1] == "/r/quiet/new" and report["requests"] == 6
+
+
+def test_multireddit_reports_subreddits_short_of_their_cutoff():
+    reddit = FakeMultireddit({"busy": 60, "quiet": 3600})
+    cutoffs = {"busy": NOW - 600, "quiet": NOW - 30 * 86400}
+    out, report = run(multireddit_plan(["busy", "quiet"], cutoffs, page_limit=25, max_pages=2), reddit)
+    assert report["incomplete"] == ["quiet"]
+    assert len(out["busy"]) == 10
+
+
+def test_async_driver_keeps_store_calls_off_the_loop(store):
+    import asyncio
+    import threading
+
+    from socialapiscrapers import reddit_async
+
+    reddit = FakeSubreddit(300)
+    loop_thread = []
+    store_threads = set()
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, j):
+            self.j = j
+
+        def json(self):
+            return self.j
+
+    class Client:
+        async def get(self, url, headers, params, timeout):
+            loop_thread.append(threading.get_ident())
+            return Response(reddit.answer(url.removeprefix(reddit_async.OAUTH_API_BASE), params))
+
+    class ThreadCheckingStore:
+        def __getattr__(self, name):
+            attr = getattr(store, name)
+
+            def call(*args, **kwargs):
+                store_threads.add(threading.get_ident())
+                return attr(*args, **kwargs)
+            return call
+
+    posts, report = asyncio.run(reddit_async.fetch_subreddit_incremental_async(
+        "soccer", "token", "ua", NOW - 120 * 60, page_limit=25, client=Client(), store=ThreadCheckingStore(),
+    ))
+    assert len(posts) == 120 and report["requests"] == reddit.requests
+    assert store_threads and loop_thread[0] not in store_threads
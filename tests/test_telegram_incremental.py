@@ -0,0 +1,154 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from socialapiscrapers.scrapeTelegramChannel import fetch_channel_incremental
+from socialapiscrapers.telegram_store import TelegramStore
+
+NOW = time.time()
+HOUR = 3600
+
+
+class Message:
+    def __init__(self, msg_id: int, ts: float):
+        self.id = msg_id
+        self.date = datetime.fromtimestamp(ts, timezone.utc)
+        self.message = f"m{msg_id}"
+        self.views, self.forwards, self.replies, self.reactions = msg_id, 0, None, None
+
+
+class FakeChannel:
+    """iter_messages (offset_id= / min_id=, newest first) and get_messages(ids=) over an in-memory channel."""
+
+    def __init__(self):
+        self.messages: dict[int, Message] = {}
+        self.walks = []
+
+    def post(self, msg_id: int, hours_ago: float) -> None:
+        self.messages[msg_id] = Message(msg_id, NOW - hours_ago * HOUR)
+
+    async def iter_messages(self, channel, offset_id=0, min_id=0):
+        self.walks.append({"offset_id": offset_id, "min_id": min_id})
+        for msg_id in sorted(self.messages, reverse=True):
+            if (offset_id and msg_id >= offset_id) or msg_id <= min_id:
+                continue
+            yield self.messages[msg_id]
+
+    async def get_messages(self, channel, ids):
+        return [self.messages.get(i) for i in ids]
+
+
+def ids_within(channel: FakeChannel, days: float) -> list[int]:
+    return sorted((i for i, m in channel.messages.items() if m.date.timestamp() >= NOW - days * 86400), reverse=True)
+
+
+def fetch(channel, store, days, refresh_age=3600.0):
+    posts, report = asyncio.run(fetch_channel_incremental(channel, "chan", days, store=store, refresh_age=refresh_age))
+    return [p["id"] for p in posts], report
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TelegramStore(str(tmp_path / "telegram.sqlite3"))
+
+
+@pytest.fixture
+def channel():
+    c = FakeChannel()
+    for i in range(1, 101):
+        # one message an hour, id 100 half an hour ago
+        c.post(i, 100 - i + 0.5)
+    return c
+
+
+def test_first_walk_sets_both_marks(channel, store):
+    ids, report = fetch(channel, store, 1)
+    assert ids == ids_within(channel, 1) and report["full_walk"]
+    marks = store.marks("chan")
+    # walked down to the first message before the window
+    assert marks["newest_id"] == 100 and marks["oldest_id"] == 76 and not marks["exhausted"]
+    assert channel.walks == [{"offset_id": 0, "min_id": 0}]
+
+
+def test_second_call_only_walks_above_the_high_water_mark(channel, store):
+    fetch(channel, store, 1)
+    channel.post(101, 0.2)
+    channel.post(102, 0.1)
+    ids, report = fetch(channel, store, 1)
+    assert channel.walks[-1] == {"offset_id": 0, "min_id": 100}
+    assert report["new_messages"] == 2 and not report["full_walk"] and report["backfilled"] == 0
+    assert ids[:2] == [102, 101] and store.marks("chan")["newest_id"] == 102
+
+
+def test_forward_walk_past_the_cutoff_resets_the_marks(store):
+    channel = FakeChannel()
+    for i in range(1, 51):
+        channel.post(i, 200 - i)  # 150..199 hours ago
+    fetch(channel, store, 10)
+    assert store.marks("chan")["newest_id"] == 50
+    for i in range(51, 101):
+        channel.post(i, 100 - i + 0.5)
+    ids, report = fetch(channel, store, 1)
+    assert report["full_walk"] and channel.walks[-1]["min_id"] == 50
+    marks = store.marks("chan")
+    assert marks["newest_id"] == 100 and marks["oldest_id"] == 76
+    assert ids == ids_within(channel, 1)
+
+
+def test_longer_window_backfills_below_the_low_water_mark(channel, store):
+    fetch(channel, store, 1)
+    ids, report = fetch(channel, store, 3)
+    # ids 75..29 in the window, and 28 where the walk crossed the cutoff
+    assert channel.walks[-1] == {"offset_id": 76, "min_id": 0}
+    assert report["backfilled"] == 48 and not report["full_walk"]
+    assert ids == ids_within(channel, 3) and store.marks("chan")["oldest_id"] == 28
+
+
+def test_backfill_to_the_start_marks_the_channel_exhausted(channel, store):
+    fetch(channel, store, 1)
+    ids, _ = fetch(channel, store, 7)
+    assert ids == ids_within(channel, 7) and store.marks("chan")["exhausted"]
+    walks = len(channel.walks)
+    fetch(channel, store, 7)
+    # nothing left below the low-water mark: only the walk above the high-water mark
+    assert len(channel.walks) == walks + 1
+
+
+def test_deleted_messages_leave_the_store_on_refresh(channel, store):
+    fetch(channel, store, 1)
+    del channel.messages[90], channel.messages[95]
+    ids, report = fetch(channel, store, 1, refresh_age=0)
+    assert report["deleted"] == 2 and report["metric_requests"] == 1
+    assert 90 not in ids and 95 not in ids
+    assert ids == ids_within(channel, 1)
+
+
+def test_store_calls_run_off_the_event_loop(channel, store):
+    import threading
+
+    loop_thread = []
+    store_threads = set()
+
+    class ThreadCheckingChannel(FakeChannel):
+        async def get_messages(self, channel, ids):
+            loop_thread.append(threading.get_ident())
+            return await super().get_messages(channel, ids)
+
+    class ThreadCheckingStore:
+        def __getattr__(self, name):
+            attr = getattr(store, name)
+            if name == "channel_lock":
+                return attr
+
+            def call(*args, **kwargs):
+                store_threads.add(threading.get_ident())
+                return attr(*args, **kwargs)
+            return call
+
+    checked = ThreadCheckingChannel()
+    checked.messages = channel.messages
+    ids, _ = fetch(checked, ThreadCheckingStore(), 1, refresh_age=0)
+    assert ids == ids_within(channel, 1)
+    assert store_threads and loop_thread[0] not in store_threads
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+from socialapiscrapers import telegram_live
+from socialapiscrapers.telegram_live import TelegramLiveIndex
+from socialapiscrapers.telegram_store import TelegramStore
+from test_telegram_incremental import FakeChannel
+
+
+def test_refresh_drops_deleted_posts_from_the_index_and_the_store(tmp_path, monkeypatch):
+    store = TelegramStore(str(tmp_path / "telegram.sqlite3"))
+    store_threads = set()
+
+    class ThreadCheckingStore:
+        def __getattr__(self, name):
+            attr = getattr(store, name)
+
+            def call(*args, **kwargs):
+                store_threads.add(threading.get_ident())
+                return attr(*args, **kwargs)
+            return call
+
+    monkeypatch.setattr(telegram_live, "get_telegram_store", lambda: ThreadCheckingStore())
+    channel = FakeChannel()
+    for i in range(1, 11):
+        channel.post(i, 10 - i + 0.5)
+
+    async def run():
+        index = TelegramLiveIndex(None, ["chan"], days=1)
+        posts = [dict(telegram_live.message_entry(m), date_ts=int(m.date.timestamp())) for m in channel.messages.values()]
+        store.upsert("chan", posts)
+        index._posts["chan"] = {p["id"]: dict(p) for p in posts}
+        del channel.messages[3], channel.messages[7]
+        channel.messages[10].views = 1000
+        await index._refresh(channel, "chan")
+        # the index is already up to date; the store follows in a thread
+        assert sorted(index._posts["chan"]) == [1, 2, 4, 5, 6, 8, 9, 10]
+        await index._writer
+        return index, threading.get_ident()
+
+    index, loop_thread = asyncio.run(run())
+    stored = {p["id"]: p for p in store.messages("chan", int(time.time()) - 86400)}
+    assert sorted(stored) == [1, 2, 4, 5, 6, 8, 9, 10] and stored[10]["views"] == 1000
+    assert index.stats()["deletes"] == 2
+    assert store_threads and loop_thread not in store_threads
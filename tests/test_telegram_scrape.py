@@ -0,0 +1,59 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.messages import GetHistoryRequest
+
+from socialapiscrapers.scrapeTelegramChannel import scrape_channel
+from socialapiscrapers.telegram_batch import FloodScheduler, Throttled
+
+
+def flood(seconds: int) -> FloodWaitError:
+    request = GetHistoryRequest(peer=None, offset_id=0, offset_date=None, add_offset=0, limit=1, max_id=0, min_id=0, hash=0)
+    return FloodWaitError(request=request, capture=seconds)
+
+
+class Message:
+    def __init__(self, msg_id: int, ts: float):
+        self.id = msg_id
+        self.date = datetime.fromtimestamp(ts, timezone.utc)
+        self.message = f"m{msg_id}"
+        self.views, self.forwards, self.replies, self.reactions = msg_id, 0, None, None
+
+
+class FloodingClient:
+    """iter_messages raises a FloodWait for the first `floods` calls."""
+
+    def __init__(self, seconds: int, floods: int = 1):
+        self.seconds, self.floods = seconds, floods
+
+    async def iter_messages(self, channel, limit=None):
+        if self.floods:
+            self.floods -= 1
+            raise flood(self.seconds)
+        for i in range(5, 0, -1):
+            yield Message(i, time.time() - (5 - i) * 60)
+
+
+def scrape(client):
+    return scrape_channel(
+        1, "hash", "chan", 1, 10, "", "", 100, 1.5, 1.0, 1.0, 2.0, 1.0, None, None, False, client=client,
+    )
+
+
+def test_shared_client_raises_flood_wait():
+    with pytest.raises(FloodWaitError):
+        asyncio.run(scrape(FloodingClient(30)))
+
+
+def test_flood_wait_reaches_the_scheduler():
+    async def main():
+        scheduler = FloodScheduler()
+        client = FloodingClient(0)
+        posts = await scheduler.run(lambda: scrape(client), time.time() + 5, bound_call=False)
+        assert len(posts) == 5 and scheduler.stats()["flood_waits"] == 1
+        with pytest.raises(Throttled):
+            await scheduler.run(lambda: scrape(FloodingClient(30)), time.time() + 5, bound_call=False)
+    asyncio.run(main())